@@ -2,7 +2,33 @@ import requests
 import os
 import time
 import json 
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import ssl
+import certifi
+import errno
+import socket
+import struct
+import enum
+import ipaddress
+import asyncio
+import sqlite3
+import secrets
+import hashlib
+import base64
+import re
+import bisect
+import heapq
+import argparse
+import csv
+import sys
+import signal
+import queue
+import multiprocessing
+import http.server
+import threading
+import contextlib
+import itertools
+from urllib.parse import urlsplit, urlunsplit, urljoin, parse_qs, quote, unquote
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn, Task
@@ -14,21 +40,95 @@ console = Console()
 # Proxy list file
 proxy_file = "proxies.txt" 
 
+# Proxy source (the main source)
+proxy_source = (
+    "https://api.proxyscrape.com/v4/free-proxy-list/get"
+    "?request=display_proxies&proxy_format=protocolipport&format=text"
+)
+
+# Continue an unfinished scan from its checkpoint without asking (set by --resume)
+resume_scan = False
+
+# False when running a headless command: no prompts, pauses or screen clears
+interactive = True
+
 # Configuration file
 CONFIG_FILE = "config.json"
 # Default configurations
 DEFAULT_CONFIG = {
     "max_workers": 30,
-    "hard_check_sites": ["https://www.google.com", "https://www.github.com"]
+    "proxy_sources": [proxy_source], # Proxy lists fetched concurrently and merged by "update"
+    "source_cache_dir": "source_cache", # ETag/Last-Modified and last copy of every source
+    "delta_file": "proxies_new.txt", # Entries added by updates since the last finished new-only scan
+    "scan_new_only": False, # Test only new entries not yet scanned; carry the rest forward
+    "hard_check_sites": ["https://www.google.com", "https://www.github.com"],
+    "scan_engine": "threads", # "threads" (ThreadPoolExecutor) or "asyncio"
+    "async_max_in_flight": 2000, # Concurrent probes kept in flight by the asyncio engine and TCP prefilter
+    "scan_processes": 1, # Worker processes that each run the scan engine on a shard of the list (1 = in-process)
+    "distributed_scan": False, # Serve the scan to remote workers instead of testing locally
+    "coordinator_host": "127.0.0.1", # Address the coordinator listens on (other than loopback only with a token)
+    "coordinator_port": 8898, # Port the coordinator listens on
+    "coordinator_token": "", # Shared secret workers must send (empty = no check)
+    "distributed_batch_size": 200, # Proxies handed to a worker per lease
+    "lease_timeout": 120, # Seconds without a report before a worker's batch is re-queued
+    "worker_retries": 15, # Failed attempts (2 s apart) before a worker gives up on its coordinator
+    "tcp_prefilter": False, # Drop proxies that refuse a plain TCP connect before the HTTP check
+    "tcp_prefilter_timeout": 2.0, # Seconds allowed for the prefilter TCP connect
+    "protocol_probing": False, # Probe each ip:port once for the protocols it speaks before full tests
+    "protocol_probe_timeout": 3.0, # Seconds allowed for each protocol handshake probe
+    "streaming_scan": False, # Read proxies.txt lazily instead of loading the whole list first (duplicates are not dropped; not for sharded/distributed scans)
+    "submission_window": 1000, # Maximum tests submitted to the thread pool but not yet finished
+    "adaptive_concurrency": False, # Let an AIMD controller tune the number of tests in flight
+    "adaptive_min_concurrency": 10, # Lower bound (and additive step) of the adaptive controller
+    "adaptive_max_workers": 500, # Thread engine cap for the adaptive controller (asyncio uses async_max_in_flight)
+    "prioritized_scan": False, # Test likely-good proxies first, by history, protocol and subnet (list mode only)
+    "target_count": 0, # Stop the scan once this many qualifying proxies are found (0 = test the whole list)
+    "target_max_ping": 0, # Ping ceiling in ms for a proxy to count towards the target (0 = no ceiling)
+    "target_min_anonymity": 0, # Minimum anonymity rating (0/5/10) for a proxy to count towards the target
+    "scan_time_budget": 0, # Stop the scan after this many seconds (0 = no limit)
+    "export_dir": "results", # Directory that receives the exported working proxies
+    "export_formats": ["jsonl", "csv", "txt"], # Any of "jsonl", "csv" and "txt" (proto://ip:port in rank order)
+    "rank_by": "ping", # Order of the table and txt export: "ping" or one phase (connect, handshake, tls, ttfb, body)
+    "table_max_rows": 100, # Rows of the results table printed to the terminal (0 = all)
+    "checkpoint_file": "scan_checkpoint.jsonl", # Append-only log of results of the scan in progress (one file per method and list)
+    "checkpoint_interval": 5.0, # Seconds between checkpoint flushes
+    "health_db_file": "proxy_health.db", # SQLite history of every proxy check
+    "health_ttl": 3600, # Seconds during which a checked proxy is not re-tested (0 = always re-test)
+    "revalidate_interval": 300, # Re-validation daemon: seconds between re-checks of a passing proxy
+    "revalidate_fast_ping": 1000, # Passing proxies slower than this (ms) are re-checked at twice the interval
+    "revalidate_max_backoff": 21600, # Longest wait (s) before re-checking a failing proxy; the wait doubles per failure
+    "revalidate_refresh_interval": 3600, # Seconds between proxy source refreshes in the daemon (0 = never; file changes are still picked up)
+    "revalidate_publish_interval": 10, # Seconds between publishes of the live set to <export_dir>/live_<method>.*
+    "soft_check_mode": "separate", # "separate" (example.com + judge) or "judge" (one request to the judge)
+    "judge_url": "http://azenv.net/", # Anonymity judge that echoes the request headers
+    "judge_host": "0.0.0.0", # Listen address of the built-in judge server
+    "judge_port": 8899, # Listen port of the built-in judge server
+    "metrics_enabled": False, # Serve live scan metrics in the Prometheus text format
+    "metrics_host": "127.0.0.1", # Listen address of the metrics endpoint
+    "metrics_port": 9108, # Listen port of the metrics endpoint (GET /metrics)
+    "connect_timeout": 5.0, # Seconds allowed to connect to a proxy (upper bound when adaptive)
+    "read_timeout": 10.0, # Seconds allowed to wait for response data through a proxy (upper bound when adaptive)
+    "speed_test_read_timeout": 30.0, # Seconds a speed test download may stall before it is aborted
+    "adaptive_timeouts": True, # Tighten both timeouts to a multiple of the median latency of passing proxies
+    "adaptive_timeout_multiplier": 4.0, # Timeout = multiplier x median latency observed in the current scan
+    "adaptive_timeout_min_samples": 20, # Passing proxies needed before timeouts are tightened
+    "min_timeout": 1.0, # Adaptive timeouts never drop below this many seconds
+    "validation_max_bytes": 16384, # Bytes of each soft/hard check response read before closing the connection
+    # Per-site validation rules: expected "status", "headers" substrings and a "body_contains" pattern
+    # that must appear within the first validation_max_bytes. Sites without a rule need status 200 and a non-empty body.
+    "site_rules": {
+        "https://www.example.com": {"status": 200, "body_contains": "Example Domain"}
+    }
 }
 # Global variable to hold loaded configurations
 config = {} 
 
-# Proxy source (the main source)
-proxy_source = (
-    "https://api.proxyscrape.com/v4/free-proxy-list/get"
-    "?request=display_proxies&proxy_format=protocolipport&format=text"
-)
+# Site used by the Soft Check
+soft_check_url = "https://www.example.com"
+
+# File downloaded by the speed test
+speed_test_url = "https://speed.cloudflare.com/__down?bytes=1000000" # 1 MB file from Cloudflare
+speed_test_bytes = 1000000 # 1 MB
 
 # --- Configuration File Management Functions ---
 def load_config():
@@ -70,61 +170,711 @@ class ScannedCountTextColumn(TextColumn):
 
     def render(self, task: Task) -> Text:
         """Renders the text showing the number of scanned and total proxies"""
-        return Text(f"{task.completed}/{task.total}", style="bold magenta", justify="right")
+        total = "?" if task.total is None else task.total # Unknown while a streaming scan reads the file
+        return Text(f"{task.completed}/{total}", style="bold magenta", justify="right")
 # --- End of Custom Class ---
 
 
-def fetch_proxies(): 
-    """Fetches the proxy list and saves it to a file with progress indicator."""
-    with console.status(f"[bold green]Fetching proxies...[/bold green]", spinner="dots"):
+# --- Parsed Proxy Records ---
+class ProxyProtocol(enum.IntEnum):
+    HTTP = 1
+    HTTPS = 2
+    SOCKS4 = 3
+    SOCKS5 = 4
+
+    @property
+    def scheme(self):
+        return self.name.lower()
+
+HOSTNAME_PATTERN = re.compile(r"^[a-z0-9_-]+(\.[a-z0-9_-]+)*\.?$")
+
+class ProxyRecord:
+    """
+    Compact parsed proxy entry: protocol, packed IPv4/IPv6 address (or a hostname
+    string for the rare non-IP entry), port and optional (username, password)
+    credentials. Equal records are duplicates.
+    """
+    __slots__ = ("protocol", "address", "port", "credentials")
+
+    def __init__(self, protocol, address, port, credentials=None):
+        self.protocol = protocol
+        self.address = address
+        self.port = port
+        self.credentials = credentials
+
+    @classmethod
+    def parse(cls, line):
+        """Parses a 'protocol://[user:password@]host:port' line. Returns None for invalid entries."""
+        line = line.strip()
+        if "://" not in line:
+            return None
+        scheme, address = line.split("://", 1)
         try:
-            r = requests.get(proxy_source, timeout=15) 
+            protocol = ProxyProtocol[scheme.strip().upper()]
+        except KeyError:
+            return None
+        userinfo, _, address = address.strip().rstrip("/").rpartition("@")
+        credentials = None
+        if userinfo:
+            username, _, password = userinfo.partition(":")
+            if not username:
+                return None
+            credentials = (unquote(username), unquote(password))
+        host, _, port = address.rpartition(":")
+        if host.startswith("[") and host.endswith("]"):
+            host = host[1:-1]
+        if not (port.isascii() and port.isdigit()):
+            return None
+        port = int(port) # Leading zeros are dropped: 08080 is port 8080
+        if not host or not 0 < port < 65536:
+            return None
+        try:
+            ip = ipaddress.ip_address(host)
+        except ValueError:
+            host = host.lower()
+            if not HOSTNAME_PATTERN.match(host):
+                return None
+            return cls(protocol, host, port, credentials) # Hostname entry
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped # ::ffff:a.b.c.d is the same endpoint as a.b.c.d
+        return cls(protocol, ip.packed, port, credentials)
+
+    @property
+    def host(self):
+        if isinstance(self.address, bytes):
+            return socket.inet_ntop(socket.AF_INET if len(self.address) == 4 else socket.AF_INET6, self.address)
+        return self.address
+
+    @property
+    def url(self):
+        host = self.host
+        if ":" in host:
+            host = f"[{host}]"
+        if self.credentials:
+            username, password = self.credentials
+            host = f"{quote(username, safe='')}:{quote(password, safe='')}@{host}"
+        return f"{self.protocol.scheme}://{host}:{self.port}"
+
+    @property
+    def proxy_authorization(self):
+        """Proxy-Authorization header line for HTTP proxies with credentials, else ''."""
+        if not self.credentials:
+            return ""
+        token = base64.b64encode(":".join(self.credentials).encode("utf-8")).decode("ascii")
+        return f"Proxy-Authorization: Basic {token}\r\n"
+
+    @property
+    def proxy_dict(self):
+        """The `proxies` argument for requests."""
+        url = self.url
+        return { "http": url, "https": url }
+
+    def _key(self):
+        return (self.protocol, self.address, self.port, self.credentials)
+
+    def __eq__(self, other):
+        return isinstance(other, ProxyRecord) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def __str__(self):
+        return self.url
+
+    def __repr__(self):
+        return f"ProxyRecord({self.url!r})"
+
+def _as_record(proxy):
+    """Accepts a ProxyRecord or a proxy URL string; returns a ProxyRecord or None."""
+    return proxy if isinstance(proxy, ProxyRecord) else ProxyRecord.parse(proxy)
+
+def iter_proxy_records(path, stats=None, dedupe=True):
+    """
+    Lazily parses a proxy list file into ProxyRecords, dropping invalid lines and
+    exact or normalized duplicates. `stats` (a dict) receives the
+    'invalid' and 'duplicates' counts.
+    Deduplication remembers every record seen, so streaming scans pass dedupe=False to
+    keep memory flat: lists written by an update are already unique, and a duplicate
+    in a hand-edited list is simply tested twice.
+    """
+    if stats is None:
+        stats = {}
+    stats.setdefault("invalid", 0)
+    stats.setdefault("duplicates", 0)
+    seen = set()
+    with open(path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = ProxyRecord.parse(line)
+            if record is None:
+                stats["invalid"] += 1
+                continue
+            if dedupe:
+                if record in seen:
+                    stats["duplicates"] += 1
+                    continue
+                seen.add(record)
+            yield record
+
+
+# --- Proxy List Fetching (multiple sources, conditional requests) ---
+SOURCE_CACHE_INDEX = "index.json"
+
+def _load_source_cache_index():
+    """Returns {source_url: {"etag", "last_modified", "file"}} from the source cache directory."""
+    index_path = os.path.join(config['source_cache_dir'], SOURCE_CACHE_INDEX)
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path, "r") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def _save_source_cache_index(index):
+    index_path = os.path.join(config['source_cache_dir'], SOURCE_CACHE_INDEX)
+    with open(index_path + ".tmp", "w") as f:
+        json.dump(index, f, indent=4)
+    os.replace(index_path + ".tmp", index_path)
+
+def _read_cached_source(cache_entry):
+    """Returns the lines stored for a source at its last successful download."""
+    with open(os.path.join(config['source_cache_dir'], cache_entry['file']), "r") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def _fetch_source(source_url, cache_entry):
+    """
+    Downloads one proxy source with a conditional request, streaming and decompressing the
+    body line by line into the source cache.
+    Returns (status_text, lines, new_cache_entry); lines come from the cache on 304.
+    """
+    headers = {"Accept-Encoding": "gzip, deflate"}
+    if cache_entry:
+        if cache_entry.get("etag"):
+            headers["If-None-Match"] = cache_entry["etag"]
+        if cache_entry.get("last_modified"):
+            headers["If-Modified-Since"] = cache_entry["last_modified"]
+
+    # The duration covers the whole download, so slow sources stand out in the daemon's refreshes
+    start = time.perf_counter()
+    result = "error"
+    try:
+        with requests.get(source_url, headers=headers, timeout=15, stream=True) as r:
+            if r.status_code == 304 and cache_entry:
+                lines = _read_cached_source(cache_entry)
+                result = "not_modified"
+                return "not modified", lines, cache_entry
             r.raise_for_status()
-            lines = [l.strip() for l in r.text.splitlines() if l.strip()]
-            with open(proxy_file, "w") as f: 
-                f.write("\n".join(lines) + "\n")
-            console.print(f"✅ [bold green]Proxies received: {len(lines)}[/bold green] and saved to [bold cyan]{proxy_file}[/bold cyan].")
-        except requests.exceptions.RequestException as e:
-            console.print(f"❌ [bold red]Error fetching proxies: {e}[/bold red]")
-        except Exception as e:
-            console.print(f"❌ [bold red]Unexpected error fetching proxies: {e}[/bold red]")
+
+            cache_name = hashlib.sha1(source_url.encode("utf-8")).hexdigest() + ".txt"
+            cache_path = os.path.join(config['source_cache_dir'], cache_name)
+            lines = []
+            with open(cache_path + ".tmp", "w") as f:
+                # iter_lines decompresses gzip/deflate as the body streams in
+                for raw_line in r.iter_lines():
+                    line = raw_line.decode("utf-8", errors="replace").strip()
+                    if line:
+                        lines.append(line)
+                        f.write(line + "\n")
+            os.replace(cache_path + ".tmp", cache_path)
+            new_entry = {
+                "etag": r.headers.get("ETag"),
+                "last_modified": r.headers.get("Last-Modified"),
+                "file": cache_name,
+            }
+            result = "downloaded"
+            return "downloaded", lines, new_entry
+    finally:
+        metrics.observe("proxy_scanner_source_fetch_seconds", time.perf_counter() - start, source=source_url, result=result)
+
+def fetch_proxies(): 
+    """
+    Fetches every configured proxy source concurrently, merges the lists without
+    duplicates and saves them to the proxy file. Returns True if the file was written.
+    """
+    sources = config['proxy_sources']
+    os.makedirs(config['source_cache_dir'], exist_ok=True)
+    cache_index = _load_source_cache_index()
+    source_lines = {}
+
+    with console.status(f"[bold green]Fetching proxies from {len(sources)} source(s)...[/bold green]", spinner="dots"):
+        with ThreadPoolExecutor(max_workers=max(1, len(sources))) as executor:
+            future_to_source = {executor.submit(_fetch_source, url, cache_index.get(url)): url for url in sources}
+            for future in as_completed(future_to_source):
+                source_url = future_to_source[future]
+                try:
+                    status_text, lines, cache_index[source_url] = future.result()
+                    source_lines[source_url] = lines
+                    console.print(f"  ✔️ [cyan]{source_url}[/cyan] → {status_text} ({len(lines)} entries)")
+                except (requests.exceptions.RequestException, OSError) as e:
+                    if source_url in cache_index:
+                        try:
+                            source_lines[source_url] = _read_cached_source(cache_index[source_url])
+                        except OSError:
+                            pass
+                    fallback = " (using cached copy)" if source_url in source_lines else ""
+                    console.print(f"  ❌ [bold red]{source_url} → Error fetching proxies: {e}{fallback}[/bold red]")
+
+    if not source_lines:
+        console.print("❌ [bold red]No proxy source could be fetched. The proxy file was not changed.[/bold red]")
+        return False
+
+    try:
+        _save_source_cache_index(cache_index)
+    except OSError as e:
+        console.print(f"⚠️ [bold yellow]Could not save the source cache index: {e}[/bold yellow]")
+
+    # Entries of the previous list, to work out what this update changed
+    previous = set()
+    if os.path.exists(proxy_file):
+        previous = {record.url for record in iter_proxy_records(proxy_file)}
+
+    # Merge in source order, keeping the first occurrence of each normalized proxy
+    merged = []
+    seen = set()
+    for source_url in sources:
+        for line in source_lines.get(source_url, []):
+            record = ProxyRecord.parse(line)
+            if record is not None and record not in seen:
+                seen.add(record)
+                merged.append(record.url)
+
+    added = [url for url in merged if url not in previous]
+    removed_count = len(previous.difference(merged))
+
+    # The delta keeps growing until a new-only scan consumes it, so no update's entries are
+    # lost; entries that have since left the list are dropped from it
+    merged_set = set(merged)
+    pending = []
+    if os.path.exists(config['delta_file']):
+        pending = [record.url for record in iter_proxy_records(config['delta_file']) if record.url in merged_set]
+    pending_set = set(pending)
+    pending.extend(url for url in added if url not in pending_set)
+    try:
+        with open(proxy_file, "w") as f: 
+            f.write("\n".join(merged) + "\n")
+        with open(config['delta_file'], "w") as f:
+            f.write("".join(url + "\n" for url in pending))
+        console.print(f"✅ [bold green]Proxies received: {len(merged)}[/bold green] unique from {len(source_lines)} source(s) and saved to [bold cyan]{proxy_file}[/bold cyan].")
+        console.print(f"    [bold green]New:[/bold green] {len(added)}  [bold red]Removed:[/bold red] {removed_count}  [bold cyan]Unchanged:[/bold cyan] {len(merged) - len(added)} ({len(pending)} untested new entries in [cyan]{config['delta_file']}[/cyan])")
+    except OSError as e:
+        console.print(f"❌ [bold red]Error saving proxies: {e}[/bold red]")
+        return False
+    return True
+
+
+# --- Probe Timeouts ---
+class LatencyTracker:
+    """
+    Collects the latency of proxies that passed during the current scan and derives a
+    timeout cutoff from it: a few times the median, so a scan stops waiting on proxies
+    far slower than the ones it keeps.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.samples = []
+        self.cutoff = None # Seconds, or None while there are too few samples
+
+    def record(self, latency_ms):
+        bisect.insort(self.samples, latency_ms / 1000)
+        if config['adaptive_timeouts'] and len(self.samples) >= config['adaptive_timeout_min_samples']:
+            self.cutoff = max(config['min_timeout'], self.median * config['adaptive_timeout_multiplier'])
+
+    @property
+    def median(self):
+        return self.samples[len(self.samples) // 2] if self.samples else None
+
+_latency_tracker = LatencyTracker()
+
+def probe_timeouts():
+    """Returns the (connect, read) timeouts for a proxy check: the configured budgets, tightened by the scan's cutoff."""
+    connect_timeout, read_timeout = config['connect_timeout'], config['read_timeout']
+    cutoff = _latency_tracker.cutoff
+    if cutoff is None:
+        return connect_timeout, read_timeout
+    return min(connect_timeout, cutoff), min(read_timeout, cutoff)
 
 
 # --- Function for checking anonymity level and rating ---
-def check_anonymity(proxy_url):
+def check_anonymity(proxy):
     """
     Determines the anonymity level of a proxy and rates it (0-10).
     Returns: 0, 5, 10 or "Unknown"
     """
-    test_url = "http://azenv.net/" # A common site for proxy anonymity testing
-    
-    proto_part = proxy_url.split("://")[0].lower()
-    proxy_dict = {}
-    if proto_part in ["http", "https", "socks4", "socks5"]:
-        proxy_dict = { "http": proxy_url, "https": proxy_url }
-    else:
-        return "Unknown" # Invalid protocol
+    try:
+        return _run_probe(async_check_anonymity(proxy))
+    except Exception:
+        return "Unknown" # Error connecting to the judge
+
+def _rate_anonymity(content):
+    """Rates anonymity (0, 5 or 10) from the headers echoed back by the judge."""
+    # Check for HTTP_X_FORWARDED_FOR (Transparent Proxy)
+    if "HTTP_X_FORWARDED_FOR" in content:
+        return 0 # Transparent - Lowest anonymity
+
+    # Check for HTTP_VIA (Anonymous Proxy)
+    if "HTTP_VIA" in content:
+        return 5 # Anonymous - Medium anonymity
 
+    # If neither header is found, it is likely Elite.
+    return 10 # Elite - Highest anonymity
+
+def _judge_probe_url():
+    """Returns (url, token): the judge URL tagged with a fresh per-probe correlation token."""
+    token = secrets.token_hex(8)
+    parts = urlsplit(config['judge_url'])
+    query = f"{parts.query}&token={token}" if parts.query else f"token={token}"
+    return urlunsplit((parts.scheme, parts.netloc, parts.path or "/", query, "")), token
+
+def _parse_judge_response(content, token):
+    """
+    Parses a judge response and returns the anonymity rating (0, 5 or 10),
+    or None when the body is not a judge answer to this probe.
+    Understands the JSON payload of the built-in judge and azenv-style HTML pages.
+    """
     try:
-        r = requests.get(test_url, proxies=proxy_dict, timeout=10) 
-        r.raise_for_status()
-        content = r.text
+        payload = json.loads(content)
+    except ValueError:
+        payload = None
+    if isinstance(payload, dict) and "headers" in payload:
+        if payload.get("token") != token:
+            return None # Answer to a different probe (e.g. served from a cache)
+        header_names = {name.lower() for name in payload["headers"]}
+        if "x-forwarded-for" in header_names:
+            return 0
+        if "via" in header_names:
+            return 5
+        return 10
+    if "REMOTE_ADDR" in content or "HTTP_HOST" in content:
+        return _rate_anonymity(content)
+    return None
 
-        # Check for HTTP_X_FORWARDED_FOR (Transparent Proxy)
-        if "HTTP_X_FORWARDED_FOR" in content:
-            return 0 # Transparent - Lowest anonymity
 
-        # Check for HTTP_VIA (Anonymous Proxy)
-        if "HTTP_VIA" in content:
-            return 5 # Anonymous - Medium anonymity
+# --- Interruption ---
+# Every worker thread runs its probe as a task on its own event loop (see _run_probe).
+# A ProbeGroup holds the probes of one scan, speed test or daemon: aborting it cancels
+# their tasks, so in-flight sockets are closed at once instead of running until their
+# timeouts, and probes of that group that have not started yet never open one. Other
+# groups, and probes run outside any group, are not affected.
+_probe_context = threading.local() # .group: the ProbeGroup of a pool's worker thread
 
-        # If neither header is found, it is likely Elite.
-        return 10 # Elite - Highest anonymity
+class ProbeAborted(Exception):
+    """Raised inside a worker thread once the scan it belongs to has been abandoned."""
 
-    except requests.exceptions.RequestException:
-        return "Unknown" # Error connecting to azenv.net
-    except Exception:
-        return "Unknown" # General error
+class ProbeGroup:
+    """The probes run on the thread pools created by executor(); abort() cancels them."""
+    def __init__(self):
+        self.aborted = threading.Event()
+        self.running = {} # worker thread id -> (event loop, task) of the probe it is running
+        self.lock = threading.Lock()
+
+    def executor(self, max_workers):
+        """A thread pool whose worker threads run their probes in this group."""
+        return ThreadPoolExecutor(max_workers=max_workers, initializer=_enter_probe_group, initargs=(self,))
+
+    def abort(self):
+        """Marks the group aborted and cancels every probe of it still running."""
+        self.aborted.set()
+        with self.lock:
+            running = list(self.running.values())
+        for loop, task in running:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass # The probe finished and its loop closed in the meantime
+
+def _enter_probe_group(group):
+    _probe_context.group = group
+
+
+# --- Failure Reason Tracking ---
+# Test functions keep their (success, ping, anonymity, proxy) return values; the reason a
+# proxy failed is recorded here and picked up when the result is stored.
+_failure_reasons = {}
+
+def _record_failure(proxy, reason):
+    """Remembers why the last test of a proxy failed."""
+    _failure_reasons[proxy] = reason
+
+def _failure_reason(error):
+    """Maps an exception raised while probing a proxy to a short failure reason."""
+    if _is_local_socket_error(error):
+        return "local socket error"
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return "timeout (connect)"
+    if isinstance(error, (requests.exceptions.Timeout, asyncio.TimeoutError)):
+        return "timeout (read)"
+    if isinstance(error, requests.exceptions.ProxyError):
+        return "proxy error"
+    if isinstance(error, (requests.exceptions.SSLError, ssl.SSLError)):
+        return "tls error"
+    if isinstance(error, (requests.exceptions.ConnectionError, ConnectionError)):
+        return "connection error"
+    if isinstance(error, (ProbeError, ProbeAborted)):
+        return str(error)
+    return error.__class__.__name__
+
+# Metric label for failure reasons; free-form reasons (exception text, URLs, status codes)
+# collapse into this fixed set so the label's cardinality stays bounded
+FAILURE_CATEGORIES = ("timeout_connect", "timeout_read", "tls", "proxy_refused", "connection", "local_socket", "validation", "other")
+
+def _failure_category(reason):
+    """Maps a failure reason (also one reported by a shard or remote worker) to a FAILURE_CATEGORIES entry."""
+    reason = (reason or "").lower()
+    if reason.startswith("timeout (connect)"):
+        return "timeout_connect"
+    if reason.startswith("timeout"):
+        return "timeout_read"
+    if reason.startswith("local socket"):
+        return "local_socket"
+    if reason.startswith(("tls", "[ssl", "sslerror")) or "certificate" in reason:
+        return "tls"
+    if reason.startswith(("connect refused", "socks", "proxy error")):
+        return "proxy_refused"
+    if reason.startswith(("connection", "tcp connect", "cannot resolve")) or "bytes read on a total" in reason:
+        return "connection"
+    if reason.startswith(("unexpected", "header ", "empty body", "body pattern", "invalid http", "invalid chunk", "invalid content-length", "response line too long", "too many redirects")):
+        return "validation"
+    return "other"
+
+
+# --- Phase Timings ---
+# Every probe request is split into these phases (ms). The ping of a working proxy is the
+# sum of its check request's phases; the anonymity request is never included.
+PHASES = ("connect", "handshake", "tls", "ttfb", "body")
+
+# Like failure reasons, the phases of a passing proxy's check ride alongside the result
+_phase_timings = {}
+
+def _phase_total(timings):
+    return sum(timings.get(phase, 0.0) for phase in PHASES)
+
+def _record_timings(proxy, timings):
+    """Stores the rounded phase timings of a proxy's check request and returns its ping."""
+    _phase_timings[proxy] = {phase: round(timings.get(phase, 0.0), 2) for phase in PHASES}
+    return round(_phase_total(timings), 2)
+
+
+# --- Scan Metrics ---
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and histograms, rendered in the Prometheus text
+    exposition format. Every metric is declared once; samples are keyed by label values.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {} # name -> {"type", "help", "labels", "buckets", "samples"}
+
+    def declare(self, name, metric_type, help_text, labels=(), buckets=None):
+        self.metrics[name] = {"type": metric_type, "help": help_text, "labels": labels, "buckets": buckets, "samples": {}}
+
+    def inc(self, name, value=1, **labels):
+        """Adds to a counter, or to a gauge when value is negative."""
+        metric = self.metrics[name]
+        key = tuple(str(labels[label]) for label in metric["labels"])
+        with self.lock:
+            metric["samples"][key] = metric["samples"].get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        metric = self.metrics[name]
+        key = tuple(str(labels[label]) for label in metric["labels"])
+        with self.lock:
+            metric["samples"][key] = value
+
+    def observe(self, name, value, **labels):
+        """Adds one observation to a histogram."""
+        metric = self.metrics[name]
+        key = tuple(str(labels[label]) for label in metric["labels"])
+        with self.lock:
+            sample = metric["samples"].get(key)
+            if sample is None:
+                sample = metric["samples"][key] = {"buckets": [0] * len(metric["buckets"]), "sum": 0.0, "count": 0}
+            index = bisect.bisect_left(metric["buckets"], value)
+            if index < len(metric["buckets"]):
+                sample["buckets"][index] += 1
+            sample["sum"] += value
+            sample["count"] += 1
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for name, metric in self.metrics.items():
+                lines.append(f"# HELP {name} {metric['help']}")
+                lines.append(f"# TYPE {name} {metric['type']}")
+                for key, sample in sorted(metric["samples"].items()):
+                    pairs = [f'{label}="{_escape_label(value)}"' for label, value in zip(metric["labels"], key)]
+                    if metric["type"] != "histogram":
+                        lines.append(f"{name}{_format_labels(pairs)} {sample}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(metric["buckets"], sample["buckets"]):
+                        cumulative += count
+                        bucket_labels = _format_labels(pairs + [f'le="{bound}"'])
+                        lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+                    bucket_labels = _format_labels(pairs + ['le="+Inf"'])
+                    lines.append(f"{name}_bucket{bucket_labels} {sample['count']}")
+                    lines.append(f"{name}_sum{_format_labels(pairs)} {round(sample['sum'], 6)}")
+                    lines.append(f"{name}_count{_format_labels(pairs)} {sample['count']}")
+        return "\n".join(lines) + "\n"
+
+def _escape_label(value):
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(pairs):
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+# Probes per second is rate(proxy_scanner_probes_total[1m]) on the monitoring side
+metrics = MetricsRegistry()
+metrics.declare("proxy_scanner_probes_total", "counter", "Completed proxy checks.", ("protocol", "result"))
+metrics.declare("proxy_scanner_failures_total", "counter", f"Failed proxy checks by failure category ({', '.join(FAILURE_CATEGORIES)}).", ("protocol", "reason"))
+metrics.declare("proxy_scanner_probes_in_flight", "gauge", "Checks currently running in this process (checks of a sharded scan run in its worker processes and are not counted).")
+metrics.declare("proxy_scanner_queue_depth", "gauge", "Proxies of the current scan that have not been checked yet (list mode).")
+metrics.declare("proxy_scanner_concurrency_limit", "gauge", "Checks the scan engine may run at once.")
+metrics.declare("proxy_scanner_probe_duration_seconds", "histogram", "Wall time of one proxy check run in this process, anonymity probe included (not recorded for sharded scans, whose checks run in worker processes).", (), (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30))
+metrics.declare("proxy_scanner_ping_milliseconds", "histogram", "Ping of working proxies.", ("protocol",), (50, 100, 250, 500, 1000, 2500, 5000, 10000))
+metrics.declare("proxy_scanner_fetch_phase_milliseconds", "histogram", "Per-phase time of the check request of working proxies.", ("phase",), (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000))
+metrics.declare("proxy_scanner_live_proxies", "gauge", "Proxies that passed their latest check in the re-validation daemon.")
+metrics.declare("proxy_scanner_speed_mbps", "histogram", "Download speed of proxies that passed the speed test.", (), (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100))
+metrics.declare("proxy_scanner_source_fetch_seconds", "histogram", "Time to fetch one proxy source, by source URL and result (downloaded, not_modified, error).", ("source", "result"), (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 15, 30))
+
+@contextlib.contextmanager
+def _tracked_probe():
+    """Counts a check as in flight and records its duration (usable in threads and coroutines)."""
+    metrics.inc("proxy_scanner_probes_in_flight")
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.inc("proxy_scanner_probes_in_flight", -1)
+        metrics.observe("proxy_scanner_probe_duration_seconds", time.perf_counter() - start)
+
+def _tracked_test(test_function, *args):
+    """Runs a blocking test function under _tracked_probe (thread engine)."""
+    with _tracked_probe():
+        return test_function(*args)
+
+def _record_probe_metrics(proxy_str, success, ping, failure_reason, phases):
+    """Counts one finished check; called wherever results are merged (in-process, shards, remote)."""
+    protocol = proxy_str.split("://", 1)[0] if "://" in proxy_str else "unknown"
+    metrics.inc("proxy_scanner_probes_total", protocol=protocol, result="success" if success else "failure")
+    if not success:
+        metrics.inc("proxy_scanner_failures_total", protocol=protocol, reason=_failure_category(failure_reason))
+        return
+    metrics.observe("proxy_scanner_ping_milliseconds", ping, protocol=protocol)
+    for phase, duration in (phases or {}).items():
+        metrics.observe("proxy_scanner_fetch_phase_milliseconds", duration, phase=phase)
+
+class MetricsRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Serves GET /metrics."""
+    server_version = "ProxyScannerMetrics"
+
+    def do_GET(self):
+        if urlsplit(self.path).path != "/metrics":
+            self.send_error(404)
+            return
+        body = metrics.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Scrapes must not interleave with the progress bar
+
+_metrics_server = None
+
+def start_metrics_server():
+    """Starts the metrics endpoint once per process when config['metrics_enabled'] is set."""
+    global _metrics_server
+    if not config['metrics_enabled'] or _metrics_server is not None:
+        return
+    try:
+        _metrics_server = http.server.ThreadingHTTPServer((config['metrics_host'], config['metrics_port']), MetricsRequestHandler)
+    except (OSError, OverflowError) as e: # OverflowError: port outside 0-65535
+        console.print(f"⚠️ [bold yellow]Could not start the metrics endpoint on {config['metrics_host']}:{config['metrics_port']}: {e}[/bold yellow]")
+        return
+    _metrics_server.daemon_threads = True
+    threading.Thread(target=_metrics_server.serve_forever, daemon=True).start()
+    console.print(f"📈 [bold cyan]Metrics at http://{config['metrics_host']}:{config['metrics_port']}/metrics[/bold cyan]")
+
+
+# --- Response Validation ---
+DEFAULT_SITE_RULE = {"status": 200}
+
+def _validate_response(site_url, status_code, headers, body_prefix):
+    """
+    Applies the site's rule from config['site_rules'] to a response of which only the
+    first config['validation_max_bytes'] bytes were read. `headers` keys are lowercase.
+    Returns None when the response passes, otherwise a failure reason.
+    """
+    rule = config['site_rules'].get(site_url, DEFAULT_SITE_RULE)
+    expected_status = rule.get("status", 200)
+    if isinstance(expected_status, int):
+        expected_status = [expected_status]
+    if status_code not in expected_status:
+        return f"unexpected status {status_code}"
+    for name, expected_value in rule.get("headers", {}).items():
+        if expected_value.lower() not in headers.get(name.lower(), "").lower():
+            return f"header {name} mismatch"
+    pattern = rule.get("body_contains")
+    if pattern is None:
+        if not body_prefix:
+            return "empty body"
+    elif pattern.encode("utf-8") not in body_prefix:
+        return "body pattern not found"
+    return None
+
+# The thread engine runs the asyncio test functions below, one event loop per worker
+# thread, so both engines share one client, one set of checks and one notion of ping.
+def _run_probe(coroutine):
+    """
+    Runs a probe coroutine to completion on the calling thread. On a ProbeGroup's worker
+    thread the task is registered in the group so ProbeGroup.abort() can cancel it from
+    another thread. Raises ProbeAborted when the probe was aborted.
+    """
+    group = getattr(_probe_context, "group", None)
+    if group is None:
+        return asyncio.run(coroutine) # A direct call, outside any scan
+    thread_id = threading.get_ident()
+
+    async def registered():
+        with group.lock:
+            group.running[thread_id] = (asyncio.get_running_loop(), asyncio.current_task())
+        try:
+            # Checked after registering, so an abort is either seen here or cancels the task
+            if group.aborted.is_set():
+                coroutine.close() # Never started, so never awaited
+                raise ProbeAborted("aborted")
+            return await coroutine
+        finally:
+            with group.lock:
+                group.running.pop(thread_id, None)
+
+    if group.aborted.is_set():
+        coroutine.close()
+        raise ProbeAborted("aborted")
+    try:
+        return asyncio.run(registered())
+    except asyncio.CancelledError:
+        raise ProbeAborted("aborted")
+
+def _run_test(async_test_function, proxy, *args):
+    """
+    Runs an asyncio test function to completion on the calling worker thread (thread
+    engine) and returns its (success, ping, anonymity_rating, proxy_str) result. Any
+    unexpected error fails the proxy instead of the scan.
+    """
+    record = _as_record(proxy)
+    proxy_str = record.url if record is not None else str(proxy)
+    try:
+        return _run_probe(async_test_function(proxy, *args))
+    except Exception as e:
+        _record_failure(proxy_str, _failure_reason(e))
+        return False, None, "Unknown", proxy_str
 
 
 # --- Soft Check Function (with anonymity rating) ---
@@ -133,33 +883,16 @@ def test_proxy_soft(proxy):
     Initial proxy connection check via HTTP/HTTPS/SOCKS
     by testing on example.com and determining the anonymity level.
     """
-    if "://" not in proxy or ":" not in proxy.split("://")[1]:
-        return False, None, "Unknown", proxy 
+    return _run_test(async_test_proxy_soft, proxy)
 
-    proto_part = proxy.split("://")[0].lower()
-    
-    proxy_dict = {}
-    if proto_part in ["http", "https", "socks4", "socks5"]:
-        proxy_dict = { "http": proxy, "https": proxy }
-    else:
-        return False, None, "Unknown", proxy 
-    
-    start_time = time.time()
-    try:
-        test_url = "https://www.example.com" 
-        r = requests.get(test_url, proxies=proxy_dict, timeout=10) 
-        
-        if r.status_code == 200 and "Example Domain" in r.text: 
-            ping_time = round((time.time() - start_time) * 1000, 2)
-            anonymity_rating = check_anonymity(proxy) # Get numerical anonymity rating
-            return True, ping_time, anonymity_rating, proxy 
-            
-    except requests.exceptions.RequestException: 
-        pass 
-    except Exception: 
-        pass
-            
-    return False, None, "Unknown", proxy # Return anonymity as Unknown for failed
+
+# --- Judge Check Function (soft check and anonymity in one request) ---
+def test_proxy_judge(proxy):
+    """
+    Soft check variant that makes a single request to the anonymity judge:
+    the echoed page proves the proxy works and also gives the anonymity rating.
+    """
+    return _run_test(async_test_proxy_judge, proxy)
 
 
 # --- Hard Check Function (with custom sites and anonymity rating) ---
@@ -167,50 +900,24 @@ def test_proxy_hard(proxy, custom_sites):
     """
     More advanced proxy connection check by testing on a list of custom sites
     and determining the anonymity level.
+    All sites and the anonymity probe run concurrently on one event loop; the first
+    failing site fails the proxy and cancels the remaining requests.
     """
-    if "://" not in proxy or ":" not in proxy.split("://")[1]:
-        return False, None, "Unknown", proxy 
-
-    proto_part = proxy.split("://")[0].lower()
-    
-    proxy_dict = {}
-    if proto_part in ["http", "https", "socks4", "socks5"]:
-        proxy_dict = { "http": proxy, "https": proxy }
-    else:
-        return False, None, "Unknown", proxy 
-    
-    start_time = time.time()
-    
-    # Iterate through custom sites
-    for site_url in custom_sites:
-        try:
-            r = requests.get(site_url, proxies=proxy_dict, timeout=15) 
-            if not (r.status_code == 200 and r.text): 
-                return False, None, "Unknown", proxy # If any site fails, the proxy fails
-        except requests.exceptions.RequestException: 
-            return False, None, "Unknown", proxy 
-        except Exception: 
-            return False, None, "Unknown", proxy 
-            
-    # If all custom sites passed, check anonymity
-    anonymity_rating = check_anonymity(proxy) # Get numerical anonymity rating
-    
-    ping_time = round((time.time() - start_time) * 1000, 2)
-    return True, ping_time, anonymity_rating, proxy 
+    return _run_test(async_test_proxy_hard, proxy, custom_sites)
 
 # --- Function for proxy speed test ---
 def perform_speed_test(proxies_with_data): 
     """
     Performs a download speed test for the list of active proxies.
+    Returns the successful results as (proxy_str, speed_mbps).
     """
     if not proxies_with_data:
         console.print("\n⚠️ [bold yellow]No active proxies available for speed test.[/bold yellow]")
-        return
+        return []
 
     console.print("\n⚡ [bold blue]**Performing speed test for active proxies...**[/bold blue]")
+    start_metrics_server()
     speed_results = []
-    test_file_url = "https://speed.cloudflare.com/__down?bytes=1000000" # 1 MB file from Cloudflare
-    file_size_bytes = 1000000 # 1 MB
 
     with Progress(
         SpinnerColumn(spinner_name="dots"),
@@ -223,25 +930,35 @@ def perform_speed_test(proxies_with_data):
         transient=False
     ) as progress:
         task = progress.add_task("[cyan]Speed Test[/cyan]", total=len(proxies_with_data))
+
+        def handle_speed(proxy_str, speed_mbps):
+            if speed_mbps is not None:
+                speed_results.append((proxy_str, speed_mbps))
+                metrics.observe("proxy_scanner_speed_mbps", speed_mbps)
+                progress.console.print(f"  🚀 [bold green]{proxy_str}[/bold green] → Speed: [bold magenta]{speed_mbps:.2f} Mbps[/bold magenta]")
+            else:
+                progress.console.print(f"  ❌ [bold red]{proxy_str}[/bold red] → Speed test failed.")
+            progress.update(task, advance=1) 
         
         # Use config['max_workers']
-        with ThreadPoolExecutor(max_workers=config['max_workers']) as executor: 
-            # We need to extract just proxy string for the speed test
-            future_to_proxy_str = {executor.submit(_test_single_proxy_speed, p[0], test_file_url, file_size_bytes): p[0] for p in proxies_with_data}
-            
-            try:
+        probes = ProbeGroup()
+        executor = probes.executor(config['max_workers'])
+        try:
+            if config['distributed_scan']:
+                # Remote workers download through the proxies; results are merged here
+                _run_coordinator([p[0] for p in proxies_with_data], "speed", None, lambda result: handle_speed(*result))
+            else:
+                # Parse each proxy string into a record for the speed test
+                future_to_proxy_str = {executor.submit(_test_single_proxy_speed, ProxyRecord.parse(p[0]), speed_test_url, speed_test_bytes): p[0] for p in proxies_with_data}
+                
                 for future in as_completed(future_to_proxy_str):
-                    proxy_str, speed_mbps = future.result()
-                    if speed_mbps is not None:
-                        speed_results.append((proxy_str, speed_mbps))
-                        progress.console.print(f"  🚀 [bold green]{proxy_str}[/bold green] → Speed: [bold magenta]{speed_mbps:.2f} Mbps[/bold magenta]")
-                    else:
-                        progress.console.print(f"  ❌ [bold red]{proxy_str}[/bold red] → Speed test failed.")
-                    progress.update(task, advance=1) 
-            except KeyboardInterrupt:
-                console.print("\n[bold yellow]Speed test interrupted. Gathering results...[/bold yellow]")
-                for future in future_to_proxy_str:
-                    future.cancel()
+                    handle_speed(*future.result())
+        except KeyboardInterrupt:
+            console.print("\n[bold yellow]Speed test interrupted. Gathering results...[/bold yellow]")
+            probes.abort() # Running downloads are cancelled
+        finally:
+            # Never block on downloads that are still running; queued ones are cancelled
+            executor.shutdown(wait=False, cancel_futures=True)
 
     console.print(f"✅ [bold green]Speed test finished.[/bold green]")
 
@@ -261,167 +978,2173 @@ def perform_speed_test(proxies_with_data):
     else:
         console.print("\n😔 [bold yellow]No proxy with a successful speed test was found.[/bold yellow]")
     console.print("---\n")
-
-    if working_proxies: # Note: This line uses 'working_proxies' from the outer scope if called from check_proxies_with_method
-        while True:
-            speed_test_choice = console.input("[bold yellow]Do you want to run a speed test on active proxies? (y/n):[/bold yellow] ").strip().lower()
-            if speed_test_choice == "y":
-                # working_proxies contains (proxy_str, ping, anonymity_rating)
-                proxies_for_speed_test = [(p[0], p[1]) for p in working_proxies] # Only pass proxy string and ping
-                perform_speed_test(proxies_for_speed_test)
-                break
-            elif speed_test_choice == "n":
-                console.print("[bold green]Speed test will not be performed.[/bold green]")
-                break
-            else:
-                console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
-                time.sleep(1)
+    return speed_results
 
 def _test_single_proxy_speed(proxy, url, file_size_bytes):
     """
     Helper function to test the speed of a single proxy.
     """
-    if "://" not in proxy or ":" not in proxy.split("://")[1]:
-        return proxy, None
+    try:
+        return _run_probe(async_test_proxy_speed(proxy, url, file_size_bytes))
+    except Exception:
+        record = _as_record(proxy)
+        return (record.url if record is not None else str(proxy)), None
 
-    proto_part = proxy.split("://")[0].lower()
-    proxy_dict = {}
-    if proto_part in ["http", "https", "socks4", "socks5"]:
-        proxy_dict = { "http": proxy, "https": proxy }
-    else:
-        return proxy, None
 
+# --- Asyncio Scan Engine ---
+# A minimal non-blocking HTTP client that speaks to HTTP (CONNECT), SOCKS4 and SOCKS5
+# proxies directly over asyncio streams, so thousands of probes can share one thread.
+
+class ProbeError(Exception):
+    """Raised when an asynchronous probe fails at any stage."""
+
+_ssl_context = ssl.create_default_context(cafile=certifi.where()) # The CA bundle requests verifies against
+_dns_cache = {} # (host, port) -> resolved IPv4 address for SOCKS4/SOCKS5 targets
+
+def _split_url(url):
+    """Splits a target URL into (scheme, host, port, path), the path including any query string."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
     try:
-        start_time = time.time()
-        with requests.get(url, proxies=proxy_dict, timeout=60, stream=True) as r: 
-            r.raise_for_status()
-            bytes_downloaded = 0
-            for chunk in r.iter_content(chunk_size=8192):
-                bytes_downloaded += len(chunk)
-                
-        end_time = time.time()
-        duration = end_time - start_time
+        port = parts.port or (443 if scheme == "https" else 80)
+    except ValueError:
+        raise ProbeError(f"invalid port in {url}")
+    if not parts.hostname:
+        raise ProbeError(f"invalid URL {url}")
+    path = parts.path or "/"
+    if parts.query:
+        path += "?" + parts.query
+    return scheme, parts.hostname, port, path
 
-        if duration > 0 and bytes_downloaded >= file_size_bytes: 
-            speed_bps = (file_size_bytes * 8) / duration # bits per second
-            speed_mbps = speed_bps / (1024 * 1024) # Mbps
-            return proxy, speed_mbps
-        else:
-            return proxy, None 
+async def _async_resolve(host, port):
+    """Resolves a target host to an IPv4 address (SOCKS4 cannot carry hostnames)."""
+    key = (host, port)
+    if key not in _dns_cache:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        if not infos:
+            raise ProbeError(f"cannot resolve {host}")
+        _dns_cache[key] = infos[0][4][0]
+    return _dns_cache[key]
 
-    except requests.exceptions.RequestException: 
-        return proxy, None
-    except Exception: 
-        return proxy, None
+async def _async_readline(reader):
+    """Reads one line; a line longer than the stream limit (64 KiB) fails the probe."""
+    try:
+        return await reader.readline()
+    except ValueError: # LimitOverrunError is re-raised by readline() as ValueError
+        raise ProbeError("response line too long")
 
+async def _async_read_head(reader):
+    """Reads an HTTP status line and headers. Returns (status_code, headers)."""
+    status_line = await _async_readline(reader)
+    parts = status_line.decode("latin-1").split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise ProbeError("invalid HTTP status line")
+    try:
+        status_code = int(parts[1])
+    except ValueError:
+        raise ProbeError("invalid HTTP status code")
+    headers = {}
+    while True:
+        line = await _async_readline(reader)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return status_code, headers
 
-def check_proxies_with_method(test_function, title_message, success_message, custom_sites=None): 
+async def _async_read_body(reader, headers, max_bytes=None):
     """
-    Generic function for checking proxies with a chosen test method (Soft or Hard).
+    Reads an HTTP response body (chunked, Content-Length or until EOF).
+    With max_bytes, stops once that many body bytes have been read.
     """
-    if not os.path.exists(proxy_file): 
-        console.print(f"⚠️ [bold yellow]Proxy list not saved in {proxy_file}. Please update first.[/bold yellow]")
-        time.sleep(2)
-        return
+    limit = max_bytes if max_bytes is not None else float("inf")
+    body = bytearray()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while len(body) < limit:
+            size_line = await _async_readline(reader)
+            try:
+                size = int(size_line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise ProbeError("invalid chunk size")
+            if size == 0:
+                break
+            body += await reader.readexactly(min(size, limit - len(body)))
+            if len(body) >= limit:
+                break
+            await _async_readline(reader) # CRLF after each chunk
+        return bytes(body)
+    if "content-length" in headers:
+        try:
+            return await reader.readexactly(min(int(headers["content-length"]), limit))
+        except ValueError:
+            raise ProbeError("invalid Content-Length")
+    while len(body) < limit:
+        chunk = await reader.read(min(65536, limit - len(body)))
+        if not chunk:
+            break
+        body += chunk
+    return bytes(body)
 
-    with open(proxy_file, "r") as f: 
-        proxies = [line.strip() for line in f.readlines() if "://" in line]
+async def _async_open_tunnel(record, target_host, target_port, tunnel_http, connection=None):
+    """
+    Connects to the proxy (unless an open (reader, writer) connection is given) and,
+    depending on the protocol, performs the SOCKS handshake or an HTTP CONNECT.
+    Returns (reader, writer, absolute_form) where absolute_form tells
+    whether requests must use the absolute URI (plain HTTP through an HTTP proxy).
+    """
+    reader, writer = connection or await asyncio.open_connection(record.host, record.port)
+    try:
+        if record.protocol in (ProxyProtocol.HTTP, ProxyProtocol.HTTPS):
+            if not tunnel_http:
+                return reader, writer, True
+            writer.write(
+                f"CONNECT {target_host}:{target_port} HTTP/1.1\r\n"
+                f"Host: {target_host}:{target_port}\r\n"
+                f"{record.proxy_authorization}\r\n".encode("latin-1")
+            )
+            await writer.drain()
+            status_code, _ = await _async_read_head(reader)
+            if status_code != 200:
+                raise ProbeError(f"CONNECT refused ({status_code})")
+        elif record.protocol == ProxyProtocol.SOCKS4:
+            target_ip = await _async_resolve(target_host, target_port)
+            user_id = record.credentials[0].encode("utf-8") if record.credentials else b""
+            writer.write(struct.pack(">BBH", 4, 1, target_port) + socket.inet_aton(target_ip) + user_id + b"\x00")
+            await writer.drain()
+            reply = await reader.readexactly(8)
+            if reply[1] != 0x5A:
+                raise ProbeError("SOCKS4 request rejected")
+        else: # socks5
+            if record.credentials:
+                writer.write(b"\x05\x02\x00\x02") # Version 5, two methods: none or username/password
+            else:
+                writer.write(b"\x05\x01\x00") # Version 5, one method: no authentication
+            await writer.drain()
+            reply = await reader.readexactly(2)
+            if reply == b"\x05\x02" and record.credentials:
+                # Username/password sub-negotiation (RFC 1929)
+                username, password = (value.encode("utf-8") for value in record.credentials)
+                if len(username) > 255 or len(password) > 255:
+                    raise ProbeError("SOCKS5 credentials too long")
+                writer.write(bytes([1, len(username)]) + username + bytes([len(password)]) + password)
+                await writer.drain()
+                if (await reader.readexactly(2))[1] != 0x00:
+                    raise ProbeError("SOCKS5 authentication failed")
+            elif reply != b"\x05\x00":
+                raise ProbeError("SOCKS5 authentication refused")
+            target_ip = await _async_resolve(target_host, target_port)
+            writer.write(b"\x05\x01\x00\x01" + socket.inet_aton(target_ip) + struct.pack(">H", target_port))
+            await writer.drain()
+            reply = await reader.readexactly(4)
+            if reply[1] != 0x00:
+                raise ProbeError(f"SOCKS5 request rejected ({reply[1]})")
+            # Skip the bound address returned by the proxy
+            if reply[3] == 0x01:
+                await reader.readexactly(4 + 2)
+            elif reply[3] == 0x04:
+                await reader.readexactly(16 + 2)
+            elif reply[3] == 0x03:
+                length = (await reader.readexactly(1))[0]
+                await reader.readexactly(length + 2)
+            else:
+                raise ProbeError("SOCKS5 invalid address type")
+        return reader, writer, False
+    except BaseException:
+        writer.close()
+        raise
 
-    if not proxies:
-        console.print(f"⚠️ [bold yellow]Proxy file {proxy_file} is empty. Please update first.[/bold yellow]")
-        time.sleep(2)
-        return
+async def _async_start_tls(reader, writer, server_hostname):
+    """
+    Upgrades an open connection to TLS and returns the writer to use from then on.
+    StreamWriter.start_tls only exists from Python 3.11; older versions wrap the
+    transport with loop.start_tls, and `reader` keeps receiving the decrypted data.
+    """
+    if hasattr(writer, "start_tls"):
+        await writer.start_tls(_ssl_context, server_hostname=server_hostname)
+        return writer
+    await writer.drain()
+    loop = asyncio.get_running_loop()
+    protocol = writer.transport.get_protocol()
+    transport = await loop.start_tls(writer.transport, protocol, _ssl_context, server_hostname=server_hostname)
+    protocol._over_ssl = True # What StreamWriter.start_tls sets on 3.11, so EOF closes the connection
+    return asyncio.StreamWriter(transport, protocol, reader, loop)
 
-    console.print(f"\n🔍 [bold blue]**{title_message}**[/bold blue]")
-    working_proxies = []
-    failed_proxies_count = 0 
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
 
-    with Progress(
-        SpinnerColumn(spinner_name="dots"),
-        TextColumn("[progress.description]{task.description}"),
-        BarColumn(), 
-        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"), 
-        ScannedCountTextColumn(), 
-        "•",
-        TimeRemainingColumn(), 
-        transient=False
-    ) as progress:
-        task = progress.add_task("[cyan]Testing Proxies[/cyan]", total=len(proxies))
-        
-        # Use config['max_workers']
-        with ThreadPoolExecutor(max_workers=config['max_workers']) as executor: 
-            future_to_proxy = {}
-            for proxy in proxies:
-                if test_function == test_proxy_hard:
-                    future_to_proxy[executor.submit(test_function, proxy, custom_sites)] = proxy
-                else: # For test_proxy_soft
-                    future_to_proxy[executor.submit(test_function, proxy)] = proxy
-            
-            try:
-                for future in as_completed(future_to_proxy):
-                    # Both test_proxy_soft and test_proxy_hard now return 4 values: success, ping, anonymity_rating, proxy_str
-                    success, ping, anonymity_rating, proxy_str = future.result() 
-                    if success:
-                        working_proxies.append((proxy_str, ping, anonymity_rating)) # Store 3 values
-                        console_color = "green"
-                        if anonymity_rating == 0:
-                            console_color = "red" # Transparent is red
-                        elif anonymity_rating == 5:
-                            console_color = "yellow" # Anonymous is yellow
-                        
-                        progress.console.print(f"  ✔️ [bold {console_color}]{proxy_str}[/bold {console_color}] → {success_message} ⏱️ Ping: [bold magenta]{ping} ms[/bold magenta] 🕵️ Anonymity: [bold blue]{anonymity_rating}[/bold blue]/10")
-                    else:
-                        failed_proxies_count += 1
-                    progress.update(task, advance=1) 
-            except KeyboardInterrupt:
-                console.print("\n[bold yellow]Proxy test interrupted. Gathering results...[/bold yellow]")
-                for future in future_to_proxy:
-                    future.cancel()
-            
-    console.print(f"✅ [bold green]Proxy testing finished.[/bold green]")
-    console.print(f"    [bold green]Active Proxies Found:[/bold green] [green]{len(working_proxies)}[/green]")
-    console.print(f"    [bold red]Failed Proxies:[/bold red] [red]{failed_proxies_count}[/red]")
+async def _async_send_get(writer, request_target, host, port, extra_headers=""):
+    """Sends a GET request in the shape requests uses; extra_headers are complete header lines."""
+    host_header = host if port in (80, 443) else f"{host}:{port}"
+    writer.write(
+        f"GET {request_target} HTTP/1.1\r\n"
+        f"Host: {host_header}\r\n"
+        f"User-Agent: python-requests/{requests.__version__}\r\n"
+        f"Accept: */*\r\n"
+        f"{extra_headers}"
+        f"Connection: close\r\n\r\n".encode("latin-1")
+    )
+    await writer.drain()
 
+async def async_fetch(record, url, timeout, max_bytes=None, timings=None):
+    """
+    Performs a GET request through a proxy without blocking the event loop, following
+    redirects like requests does. `timeout` is a (connect, read) tuple: the first bounds
+    the TCP connect to the proxy, the second everything after it (handshake, request
+    and response). With max_bytes, only that much of the body is read before the
+    connection is closed. A `timings` dict receives the per-phase times in ms
+    (see PHASES), summed over redirects.
+    Returns (status_code, headers, body_bytes); raises ProbeError or OSError on failure.
+    """
+    if timings is not None:
+        timings.update(dict.fromkeys(PHASES, 0.0))
+    for _ in range(MAX_REDIRECTS + 1):
+        status_code, headers, body = await _async_fetch_once(record, url, timeout, max_bytes, timings)
+        if status_code not in REDIRECT_STATUSES or "location" not in headers:
+            return status_code, headers, body
+        url = urljoin(url, headers["location"])
+    raise ProbeError("too many redirects")
 
-    if working_proxies:
-        console.print("\n---")
-        console.print(f"🔹 [bold green]Active Proxies (Sorted by lowest ping):[/bold green]")
-        table = Table(show_header=True, header_style="bold magenta")
-        table.add_column("Proxy", style="cyan", no_wrap=True)
-        table.add_column("Ping (ms)", style="green", justify="right")
-        table.add_column("Anonymity (0-10)", style="blue", justify="center") # New column header
+async def _async_fetch_once(record, url, timeout, max_bytes, timings):
+    """One request/response exchange of async_fetch."""
+    connect_timeout, read_timeout = timeout
+    scheme, host, port, path = _split_url(url)
+    phase_start = time.perf_counter()
 
-        working_proxies.sort(key=lambda x: x[1]) # Sort by ping
+    def end_phase(phase):
+        nonlocal phase_start
+        now = time.perf_counter()
+        if timings is not None:
+            timings[phase] += (now - phase_start) * 1000
+        phase_start = now
 
-        for proxy_data in working_proxies:
-            proxy, ping, anonymity_rating = proxy_data
-            anonymity_display_color = "green"
-            if anonymity_rating == 0:
+    try:
+        connection = await asyncio.wait_for(asyncio.open_connection(record.host, record.port), connect_timeout)
+    except asyncio.TimeoutError:
+        raise ProbeError("timeout (connect)")
+    end_phase("connect")
+
+    async def _fetch():
+        reader, writer, absolute_form = await _async_open_tunnel(record, host, port, tunnel_http=(scheme == "https"), connection=connection)
+        try:
+            end_phase("handshake")
+            if scheme == "https":
+                writer = await _async_start_tls(reader, writer, host)
+                end_phase("tls")
+            await _async_send_get(writer, url if absolute_form else path, host, port, record.proxy_authorization if absolute_form else "")
+            status_code, headers = await _async_read_head(reader)
+            end_phase("ttfb")
+            if status_code in REDIRECT_STATUSES and "location" in headers:
+                return status_code, headers, b"" # The body of a redirect is never used
+            body = await _async_read_body(reader, headers, max_bytes)
+            end_phase("body")
+            return status_code, headers, body
+        finally:
+            writer.close()
+
+    try:
+        return await asyncio.wait_for(_fetch(), read_timeout)
+    except asyncio.TimeoutError:
+        raise ProbeError("timeout (read)")
+    except (asyncio.IncompleteReadError, ssl.SSLError, UnicodeError) as e:
+        raise ProbeError(str(e))
+
+async def async_check_anonymity(proxy):
+    """
+    Asynchronous counterpart of check_anonymity.
+    Returns: 0, 5, 10 or "Unknown"
+    """
+    record = _as_record(proxy)
+    if record is None:
+        return "Unknown"
+    judge_url, token = _judge_probe_url()
+    try:
+        status_code, _, body = await async_fetch(record, judge_url, timeout=probe_timeouts())
+        if status_code >= 400:
+            return "Unknown"
+        anonymity_rating = _parse_judge_response(body.decode("utf-8", errors="replace"), token)
+        return "Unknown" if anonymity_rating is None else anonymity_rating
+    except (ProbeError, OSError):
+        return "Unknown"
+
+async def async_test_proxy_soft(proxy):
+    """Asynchronous counterpart of test_proxy_soft with the same return values."""
+    record = _as_record(proxy)
+    if record is None:
+        _record_failure(str(proxy), "invalid proxy")
+        return False, None, "Unknown", str(proxy)
+    proxy = record.url
+
+    timings = {}
+    try:
+        response = await async_fetch(record, soft_check_url, timeout=probe_timeouts(), max_bytes=config['validation_max_bytes'], timings=timings)
+        failure_reason = _validate_response(soft_check_url, *response)
+        if failure_reason is None:
+            ping_time = _record_timings(proxy, timings)
+            anonymity_rating = await async_check_anonymity(record)
+            return True, ping_time, anonymity_rating, proxy
+        _record_failure(proxy, failure_reason)
+    except (ProbeError, OSError) as e:
+        _record_failure(proxy, _failure_reason(e))
+
+    return False, None, "Unknown", proxy
+
+async def async_test_proxy_judge(proxy):
+    """Asynchronous counterpart of test_proxy_judge with the same return values."""
+    record = _as_record(proxy)
+    if record is None:
+        _record_failure(str(proxy), "invalid proxy")
+        return False, None, "Unknown", str(proxy)
+    proxy = record.url
+
+    judge_url, token = _judge_probe_url()
+    timings = {}
+    try:
+        status_code, _, body = await async_fetch(record, judge_url, timeout=probe_timeouts(), timings=timings)
+        anonymity_rating = _parse_judge_response(body.decode("utf-8", errors="replace"), token) if status_code == 200 else None
+        if anonymity_rating is not None:
+            ping_time = _record_timings(proxy, timings)
+            return True, ping_time, anonymity_rating, proxy
+        _record_failure(proxy, "unexpected response")
+    except (ProbeError, OSError) as e:
+        _record_failure(proxy, _failure_reason(e))
+
+    return False, None, "Unknown", proxy
+
+async def async_test_proxy_hard(proxy, custom_sites):
+    """Asynchronous counterpart of test_proxy_hard with the same return values."""
+    record = _as_record(proxy)
+    if record is None:
+        _record_failure(str(proxy), "invalid proxy")
+        return False, None, "Unknown", str(proxy)
+    proxy = record.url
+
+    site_timings = []
+
+    async def check_site(site_url):
+        timings = {}
+        site_timings.append(timings)
+        try:
+            response = await async_fetch(record, site_url, timeout=probe_timeouts(), max_bytes=config['validation_max_bytes'], timings=timings)
+            failure_reason = _validate_response(site_url, *response)
+            if failure_reason is not None:
+                return f"{failure_reason} from {site_url}"
+        except (ProbeError, OSError) as e:
+            return f"{_failure_reason(e)} on {site_url}"
+        return None
+
+    anonymity_task = asyncio.ensure_future(async_check_anonymity(record))
+    pending = {asyncio.ensure_future(check_site(site_url)) for site_url in custom_sites}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                failure_reason = task.result()
+                if failure_reason is not None:
+                    _record_failure(proxy, failure_reason)
+                    return False, None, "Unknown", proxy
+        anonymity_rating = await anonymity_task
+    finally:
+        # Cancel whatever is still running once the outcome is known
+        for task in pending | {anonymity_task}:
+            task.cancel()
+
+    # The slowest site decides the ping, as the proxy is only as good as its worst site
+    ping_time = _record_timings(proxy, max(site_timings, key=_phase_total))
+    return True, ping_time, anonymity_rating, proxy
+
+async def async_test_proxy_speed(proxy, url, file_size_bytes):
+    """
+    Downloads `url` through the proxy and returns (proxy_str, speed_mbps), or
+    (proxy_str, None) when the download fails or is short. The connect is bounded by
+    config['connect_timeout']; the download fails once it stalls for
+    config['speed_test_read_timeout'] seconds.
+    """
+    record = _as_record(proxy)
+    if record is None:
+        return str(proxy), None
+    stall_timeout = config['speed_test_read_timeout']
+    start_time = time.time()
+    bytes_downloaded = 0
+    try:
+        scheme, host, port, path = _split_url(url)
+        connection = await asyncio.wait_for(asyncio.open_connection(record.host, record.port), config['connect_timeout'])
+        reader, writer, absolute_form = await asyncio.wait_for(_async_open_tunnel(record, host, port, tunnel_http=(scheme == "https"), connection=connection), stall_timeout)
+        try:
+            if scheme == "https":
+                writer = await asyncio.wait_for(_async_start_tls(reader, writer, host), stall_timeout)
+            await _async_send_get(writer, url if absolute_form else path, host, port, record.proxy_authorization if absolute_form else "")
+            status_code, headers = await asyncio.wait_for(_async_read_head(reader), stall_timeout)
+            if not 200 <= status_code < 300:
+                return record.url, None
+            while bytes_downloaded < file_size_bytes:
+                chunk = await asyncio.wait_for(reader.read(65536), stall_timeout)
+                if not chunk:
+                    break
+                bytes_downloaded += len(chunk)
+        finally:
+            writer.close()
+    except (ProbeError, OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ssl.SSLError):
+        return record.url, None
+
+    duration = time.time() - start_time
+    if duration > 0 and bytes_downloaded >= file_size_bytes:
+        speed_bps = (file_size_bytes * 8) / duration # bits per second
+        return record.url, speed_bps / (1024 * 1024) # Mbps
+    return record.url, None
+
+# Maps the blocking test functions to their asyncio counterparts
+ASYNC_TEST_FUNCTIONS = {
+    test_proxy_soft: async_test_proxy_soft,
+    test_proxy_judge: async_test_proxy_judge,
+    test_proxy_hard: async_test_proxy_hard,
+}
+
+def _raise_open_file_limit():
+    """Raises the soft open-file limit to the hard limit so thousands of sockets can be open."""
+    try:
+        import resource
+    except ImportError: # Not available on Windows
+        return
+    try:
+        soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard_limit == resource.RLIM_INFINITY or hard_limit > soft_limit:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+    except (ValueError, OSError):
+        pass
+
+async def _async_run_pool(items, coroutine_function, on_result, limit):
+    """
+    Awaits coroutine_function(item) for every item with at most `limit` running at once,
+    calling on_result with each return value as soon as it is available.
+    """
+    item_iter = iter(items) # Consumed lazily, so generators never have to be materialised
+
+    async def worker():
+        for item in item_iter: # The shared iterator hands each item to exactly one worker
+            on_result(await coroutine_function(item))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, limit))))
+
+async def _async_scan(proxies, async_test_function, custom_sites, on_result, inline_prefilter=False, controller=None, deadline=None):
+    """
+    Runs async_test_function over all proxies with at most config['async_max_in_flight']
+    probes in flight (or controller.limit when a ConcurrencyController is given),
+    calling on_result with each (success, ping, anonymity, proxy) tuple.
+    With inline_prefilter, each proxy must first accept a TCP connect.
+    Raises ScanStopped once the time.time() deadline (if any) passes.
+    """
+    async def probe(proxy):
+        with _tracked_probe():
+            try:
+                if inline_prefilter and not await _async_tcp_connect(proxy.host, proxy.port, config['tcp_prefilter_timeout']):
+                    _record_failure(proxy.url, "tcp connect failed")
+                    return False, None, "Unknown", proxy.url
+                if async_test_function == async_test_proxy_hard:
+                    return await async_test_function(proxy, custom_sites)
+                return await async_test_function(proxy)
+            except Exception as e:
+                # Like the thread engine, one misbehaving proxy only fails its own test
+                _record_failure(proxy.url, _failure_reason(e))
+                return False, None, "Unknown", proxy.url
+
+    if controller is not None:
+        run = _async_run_adaptive(proxies, probe, on_result, controller)
+    else:
+        run = _async_run_pool(proxies, probe, on_result, config['async_max_in_flight'])
+    if deadline is None:
+        await run
+        return
+    try:
+        await asyncio.wait_for(run, max(0, deadline - time.time()))
+    except asyncio.TimeoutError:
+        raise ScanStopped("time budget exhausted")
+
+def _run_windowed(executor, items, submit, on_result, window, deadline=None):
+    """
+    Submits submit(executor, item) for every item while keeping at most window()
+    futures outstanding, calling on_result with each result as it completes.
+    `window` is called again after every completion, so the limit may change mid-scan.
+    Raises ScanStopped once the time.time() deadline (if any) passes. Pending futures
+    are cancelled if interrupted or stopped, including by an exception from on_result.
+    """
+    pending = set()
+
+    def collect():
+        nonlocal pending
+        timeout = None if deadline is None else max(0, deadline - time.time())
+        done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            on_result(future.result())
+        if deadline is not None and time.time() >= deadline:
+            raise ScanStopped("time budget exhausted")
+
+    try:
+        for item in items:
+            pending.add(submit(executor, item))
+            while len(pending) >= window():
+                collect()
+        while pending:
+            collect()
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+
+
+# --- Goal-Driven Scans ---
+class ScanStopped(Exception):
+    """Raised to end a scan early; the message says why."""
+
+class ScanGoal:
+    """
+    Stop condition for a scan: K proxies with ping <= max_ping (ms) and anonymity >=
+    min_anonymity, or a wall-clock budget (s). Zero disables each limit.
+    """
+    def __init__(self, target_count, max_ping, min_anonymity, time_budget):
+        self.target_count = target_count
+        self.max_ping = max_ping
+        self.min_anonymity = min_anonymity
+        self.deadline = time.time() + time_budget if time_budget else None
+        self.found = 0
+
+    def qualifies(self, ping, anonymity_rating):
+        if self.max_ping and ping > self.max_ping:
+            return False
+        if self.min_anonymity and (not isinstance(anonymity_rating, int) or anonymity_rating < self.min_anonymity):
+            return False
+        return True
+
+    def record(self, success, ping, anonymity_rating):
+        """Counts a result and raises ScanStopped once the goal is met or the budget is spent."""
+        if success and self.qualifies(ping, anonymity_rating):
+            self.found += 1
+            if self.target_count and self.found >= self.target_count:
+                raise ScanStopped(f"found {self.found} qualifying proxies")
+        if self.deadline is not None and time.time() >= self.deadline:
+            raise ScanStopped("time budget exhausted")
+
+
+# --- Adaptive Concurrency (AIMD) ---
+# errno values that mean the local host, not the proxy, ran out of sockets or ports
+LOCAL_SOCKET_ERRNOS = {errno.EMFILE, errno.ENFILE, errno.ENOBUFS, errno.ENOMEM, errno.EADDRNOTAVAIL}
+
+def _is_local_socket_error(error):
+    """Walks an exception chain (including requests/urllib3 wrappers) looking for a local socket errno."""
+    seen = set()
+    while isinstance(error, BaseException) and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, OSError) and error.errno in LOCAL_SOCKET_ERRNOS:
+            return True
+        wrapped = [getattr(error, "reason", None), error.__cause__, error.__context__]
+        wrapped += [arg for arg in error.args if isinstance(arg, BaseException)]
+        error = next((e for e in wrapped if isinstance(e, BaseException) and id(e) not in seen), None)
+    return False
+
+class ConcurrencyController:
+    """
+    AIMD controller for the number of tests in flight. Starts with slow start (doubling
+    every window), then grows additively and backs off multiplicatively when a window
+    shows local socket errors, a timeout rate well above the best seen, or falling
+    completion throughput.
+    """
+    def __init__(self, initial, minimum, maximum, interval=2.0, warmup=15.0):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.peak = self.limit
+        self.adjustments = 0
+        self.slow_start = True
+        self.interval = interval
+        # Timeouts only show up once the longest probe timeout has elapsed
+        self.timeout_signal_after = time.time() + warmup
+        self.best_throughput = 0.0
+        self.best_timeout_rate = None
+        self._start_window()
+
+    def _start_window(self):
+        self.window_start = time.time()
+        self.window_completed = 0
+        self.window_timeouts = 0
+        self.window_local_errors = 0
+
+    def record(self, failure_reason):
+        """Feeds one completed test (failure_reason None on success) and adjusts the limit when a window closes."""
+        self.window_completed += 1
+        if failure_reason:
+            if failure_reason.startswith("timeout"):
+                self.window_timeouts += 1
+            elif failure_reason.startswith("local socket error"):
+                self.window_local_errors += 1
+        elapsed = time.time() - self.window_start
+        if (elapsed >= self.interval and self.window_completed >= 10) or (self.window_local_errors and elapsed >= 0.5):
+            self._adjust(elapsed)
+
+    def _adjust(self, elapsed):
+        throughput = self.window_completed / elapsed
+        timeout_rate = self.window_timeouts / self.window_completed
+        timeouts_rising = False
+        if time.time() >= self.timeout_signal_after:
+            if self.best_timeout_rate is None or timeout_rate < self.best_timeout_rate:
+                self.best_timeout_rate = timeout_rate
+            timeouts_rising = timeout_rate > self.best_timeout_rate + 0.2
+        throughput_falling = throughput < 0.7 * self.best_throughput
+        self.best_throughput = max(self.best_throughput, throughput)
+
+        previous_limit = self.limit
+        if self.window_local_errors:
+            self.slow_start = False
+            self.limit = max(self.minimum, self.limit // 2)
+        elif timeouts_rising or throughput_falling:
+            self.slow_start = False
+            self.limit = max(self.minimum, int(self.limit * 0.75))
+        elif self.slow_start:
+            self.limit = min(self.maximum, self.limit * 2)
+        else:
+            self.limit = min(self.maximum, self.limit + self.minimum)
+        if self.limit != previous_limit:
+            self.adjustments += 1
+        self.peak = max(self.peak, self.limit)
+        self._start_window()
+
+async def _async_run_adaptive(items, coroutine_function, on_result, controller):
+    """
+    Like _async_run_pool, but the number of coroutines in flight follows controller.limit,
+    which may change while the scan runs.
+    """
+    in_flight = set()
+    finished = []
+    slot_freed = asyncio.Event()
+
+    def task_done(task):
+        in_flight.discard(task)
+        finished.append(task)
+        slot_freed.set()
+
+    async def collect():
+        # Results are handled here rather than in the callback so on_result may raise
+        slot_freed.clear()
+        await slot_freed.wait()
+        while finished:
+            task = finished.pop()
+            if not task.cancelled():
+                on_result(task.result())
+
+    try:
+        for item in items:
+            while len(in_flight) >= controller.limit:
+                await collect()
+            task = asyncio.ensure_future(coroutine_function(item))
+            in_flight.add(task)
+            task.add_done_callback(task_done)
+        while in_flight or finished:
+            await collect()
+    finally:
+        for task in list(in_flight):
+            task.cancel()
+
+
+# --- TCP Connect Prefilter ---
+async def _async_tcp_connect(host, port, timeout):
+    """Returns True when host:port accepts a TCP connection within the timeout."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (asyncio.TimeoutError, OSError):
+        return False
+    writer.close()
+    return True
+
+def _tcp_connect(host, port, timeout):
+    """Blocking counterpart of _async_tcp_connect for the thread engine."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+def _prefiltered_test(test_function, proxy, *args):
+    """Runs test_function only when the proxy accepts a TCP connect (streaming scans)."""
+    if not _tcp_connect(proxy.host, proxy.port, config['tcp_prefilter_timeout']):
+        _record_failure(proxy.url, "tcp connect failed")
+        return False, None, "Unknown", proxy.url
+    return test_function(proxy, *args)
+
+async def _async_tcp_prefilter(proxies, timeout, on_result):
+    """
+    Attempts a plain TCP connect to every proxy's ip:port and calls on_result with
+    (reachable, proxy). Each distinct endpoint is only connected to once, even when
+    it is listed with several protocols.
+    """
+    endpoint_checks = {}
+
+    async def check(proxy):
+        endpoint = (proxy.address, proxy.port)
+        if endpoint not in endpoint_checks:
+            endpoint_checks[endpoint] = asyncio.ensure_future(_async_tcp_connect(proxy.host, proxy.port, timeout))
+        return await endpoint_checks[endpoint], proxy
+
+    await _async_run_pool(proxies, check, on_result, config['async_max_in_flight'])
+
+def tcp_prefilter(proxies, progress):
+    """
+    Runs the TCP connect prefilter over the proxy list, showing its own progress task.
+    Returns (reachable_proxies, unreachable_proxies).
+    """
+    task = progress.add_task("[cyan]TCP Prefilter[/cyan]", total=len(proxies))
+    reachable = []
+    unreachable = []
+
+    def handle_result(result):
+        accepted, proxy = result
+        (reachable if accepted else unreachable).append(proxy)
+        progress.update(task, advance=1)
+
+    _raise_open_file_limit()
+    asyncio.run(_async_tcp_prefilter(proxies, config['tcp_prefilter_timeout'], handle_result))
+    return reachable, unreachable
+
+
+# --- Host-Level Protocol Probing ---
+class _HostUnreachable(Exception):
+    """Raised when a proxy host does not accept the probe connection."""
+
+async def _async_speaks_protocol(host, port, protocol, timeout):
+    """
+    Opens a connection and performs only the opening handshake of `protocol`.
+    Returns True when the host answers in that protocol. Raises _HostUnreachable
+    when the TCP connection itself fails.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    except (asyncio.TimeoutError, OSError):
+        raise _HostUnreachable()
+    try:
+        if protocol == ProxyProtocol.SOCKS5:
+            writer.write(b"\x05\x01\x00")
+            await writer.drain()
+            reply = await asyncio.wait_for(reader.readexactly(2), timeout)
+            return reply[0] == 0x05
+        if protocol == ProxyProtocol.SOCKS4:
+            _, judge_host, judge_port, _ = _split_url(config['judge_url'])
+            try:
+                target_ip = await _async_resolve(judge_host, judge_port)
+            except (ProbeError, OSError):
+                return True # Cannot build a request; leave the decision to the full test
+            writer.write(struct.pack(">BBH", 4, 1, judge_port) + socket.inet_aton(target_ip) + b"\x00")
+            await writer.drain()
+            reply = await asyncio.wait_for(reader.readexactly(8), timeout)
+            return reply[0] == 0x00 and 0x5A <= reply[1] <= 0x5D # Granted or a SOCKS4 rejection code
+        # HTTP/HTTPS: any HTTP status line (even a refusal) proves the proxy speaks HTTP
+        _, judge_host, judge_port, _ = _split_url(config['judge_url'])
+        writer.write(f"CONNECT {judge_host}:{judge_port} HTTP/1.1\r\nHost: {judge_host}:{judge_port}\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        reply = await asyncio.wait_for(reader.readexactly(5), timeout)
+        return reply == b"HTTP/"
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError):
+        return False
+    finally:
+        writer.close()
+
+async def _async_probe_host(records, timeout):
+    """
+    Finds which of the listed protocols one ip:port speaks. The first handshake also
+    serves as the reachability check; the remaining protocols are probed concurrently.
+    Returns [(record, failure_reason or None)].
+    """
+    host, port = records[0].host, records[0].port
+    try:
+        first_ok = await _async_speaks_protocol(host, port, records[0].protocol, timeout)
+    except _HostUnreachable:
+        return [(record, "tcp connect failed") for record in records]
+    results = [(records[0], None if first_ok else "protocol not spoken")]
+    for record in records[1:]:
+        results.append((record, None))
+    if len(records) > 1:
+        verdicts = await asyncio.gather(
+            *(_async_speaks_protocol(host, port, record.protocol, timeout) for record in records[1:]),
+            return_exceptions=True
+        )
+        for index, verdict in enumerate(verdicts, start=1):
+            if verdict is not True:
+                results[index] = (records[index], "protocol not spoken")
+    return results
+
+def protocol_probe(proxies, progress):
+    """
+    Groups the proxy list by ip:port and probes each host once for the protocols it is
+    listed with, showing its own progress task.
+    Returns (supported_proxies, [(unsupported_proxy, failure_reason)]).
+    """
+    hosts = {}
+    for record in proxies:
+        hosts.setdefault((record.address, record.port), []).append(record)
+
+    task = progress.add_task("[cyan]Protocol Probe[/cyan]", total=len(hosts))
+    supported = []
+    unsupported = []
+
+    def handle_result(results):
+        for record, failure_reason in results:
+            if failure_reason is None:
+                supported.append(record)
+            else:
+                unsupported.append((record, failure_reason))
+        progress.update(task, advance=1)
+
+    _raise_open_file_limit()
+    timeout = config['protocol_probe_timeout']
+    asyncio.run(_async_run_pool(hosts.values(), lambda records: _async_probe_host(records, timeout), handle_result, config['async_max_in_flight']))
+    return supported, unsupported
+
+
+# --- Proxy Health Database ---
+HEALTH_LOOKUP_BATCH_SIZE = 500 # Proxies per indexed lookup in streaming scans (below SQLite's 999-parameter limit)
+
+
+class ProxyHealthDB:
+    """
+    SQLite store of the latest check result of every proxy, per check method.
+    Used to skip proxies that were checked recently and to keep results between runs.
+    """
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS proxy_health ("
+            " proxy TEXT NOT NULL,"
+            " method TEXT NOT NULL,"
+            " last_checked REAL NOT NULL,"
+            " success INTEGER NOT NULL,"
+            " ping REAL,"
+            " anonymity TEXT,"
+            " failure_reason TEXT,"
+            " check_count INTEGER NOT NULL DEFAULT 1,"
+            " success_count INTEGER NOT NULL DEFAULT 0,"
+            " phases TEXT,"
+            " PRIMARY KEY (proxy, method))"
+        )
+        # Databases created before phase timings existed get the column added
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(proxy_health)")}
+        if "phases" not in columns:
+            self.conn.execute("ALTER TABLE proxy_health ADD COLUMN phases TEXT")
+        self.pending_writes = 0
+
+    def recent_results(self, method, ttl):
+        """
+        Returns {proxy: (success, ping, anonymity_rating)} for every proxy checked with
+        `method` within the last `ttl` seconds.
+        """
+        if ttl <= 0:
+            return {}
+        rows = self.conn.execute(
+            "SELECT proxy, success, ping, anonymity FROM proxy_health WHERE method = ? AND last_checked >= ?",
+            (method, time.time() - ttl)
+        )
+        return {proxy: (bool(success), ping, _parse_anonymity(anonymity)) for proxy, success, ping, anonymity in rows}
+
+    def recent_results_for(self, proxies, method, ttl):
+        """
+        Like recent_results, limited to the given proxy URLs. Streaming scans look up each
+        batch of the list here so the rows of the whole database are never loaded at once.
+        """
+        if ttl <= 0 or not proxies:
+            return {}
+        placeholders = ",".join("?" * len(proxies))
+        rows = self.conn.execute(
+            "SELECT proxy, success, ping, anonymity FROM proxy_health"
+            f" WHERE method = ? AND last_checked >= ? AND proxy IN ({placeholders})",
+            (method, time.time() - ttl, *proxies)
+        )
+        return {proxy: (bool(success), ping, _parse_anonymity(anonymity)) for proxy, success, ping, anonymity in rows}
+
+    def active_results(self, method):
+        """Returns {proxy: (ping, anonymity_rating)} for every proxy whose last `method` check passed."""
+        rows = self.conn.execute(
+            "SELECT proxy, ping, anonymity FROM proxy_health WHERE method = ? AND success = 1", (method,)
+        )
+        return {proxy: (ping, _parse_anonymity(anonymity)) for proxy, ping, anonymity in rows}
+
+    def outcome_counts(self, method):
+        """Returns {proxy: (check_count, success_count)} over every stored `method` check."""
+        rows = self.conn.execute(
+            "SELECT proxy, check_count, success_count FROM proxy_health WHERE method = ?", (method,)
+        )
+        return {proxy: (check_count, success_count) for proxy, check_count, success_count in rows}
+
+    def schedule_state(self, method):
+        """Returns {proxy: (last_checked, success, ping, anonymity_rating)} for every stored `method` check."""
+        rows = self.conn.execute(
+            "SELECT proxy, last_checked, success, ping, anonymity FROM proxy_health WHERE method = ?", (method,)
+        )
+        return {proxy: (last_checked, bool(success), ping, _parse_anonymity(anonymity)) for proxy, last_checked, success, ping, anonymity in rows}
+
+    def phase_results(self, method):
+        """Returns {proxy: phases} for every proxy whose last `method` check passed with phase timings."""
+        rows = self.conn.execute(
+            "SELECT proxy, phases FROM proxy_health WHERE method = ? AND success = 1 AND phases IS NOT NULL", (method,)
+        )
+        return {proxy: json.loads(phases) for proxy, phases in rows}
+
+    def record(self, proxy, method, success, ping, anonymity_rating, failure_reason=None, phases=None):
+        """Stores the outcome of a check. Writes are committed in batches."""
+        self.conn.execute(
+            "INSERT INTO proxy_health (proxy, method, last_checked, success, ping, anonymity, failure_reason, success_count, phases)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            " ON CONFLICT (proxy, method) DO UPDATE SET"
+            " last_checked = excluded.last_checked, success = excluded.success, ping = excluded.ping,"
+            " anonymity = excluded.anonymity, failure_reason = excluded.failure_reason, phases = excluded.phases,"
+            " check_count = check_count + 1, success_count = success_count + excluded.success_count",
+            (proxy, method, time.time(), int(success), ping, str(anonymity_rating), failure_reason, int(success), json.dumps(phases) if phases else None)
+        )
+        self.pending_writes += 1
+        if self.pending_writes >= 500:
+            self.commit()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending_writes = 0
+
+    def close(self):
+        self.commit()
+        self.conn.close()
+
+def _parse_anonymity(value):
+    """Converts a stored anonymity rating back to 0/5/10 or "Unknown"."""
+    return int(value) if value is not None and value.isdigit() else "Unknown"
+
+# Names under which each check method's results are stored
+TEST_METHOD_NAMES = {
+    test_proxy_soft: "soft",
+    test_proxy_judge: "soft", # Judge mode is a soft check variant
+    test_proxy_hard: "hard",
+}
+
+
+# --- Multi-Process Sharded Scans ---
+# Names under which check functions are handed to worker processes
+SHARD_TEST_FUNCTIONS = {"soft": test_proxy_soft, "judge": test_proxy_judge, "hard": test_proxy_hard}
+
+def _shard_worker(shard, worker_config, method, custom_sites, inline_prefilter, result_queue):
+    """
+    Entry point of a scan worker process. Tests its shard of proxy URLs with the
+    configured engine and streams [(result, failure_reason, phases), ...] batches back,
+    followed by None once the shard is done.
+    """
+    global config
+    config = worker_config
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # The parent handles Ctrl+C and terminates workers
+    test_function = SHARD_TEST_FUNCTIONS[method]
+    batch = []
+    last_send = time.time()
+
+    def on_result(result):
+        nonlocal last_send
+        batch.append((result, _failure_reasons.pop(result[3], None), _phase_timings.pop(result[3], None)))
+        # Batching keeps the channel cheap; the time bound keeps the parent's progress bar live
+        if len(batch) >= 200 or time.time() - last_send >= 0.2:
+            result_queue.put(list(batch))
+            batch.clear()
+            last_send = time.time()
+
+    _scan_records([ProxyRecord.parse(url) for url in shard], test_function, custom_sites, on_result, inline_prefilter)
+    if batch:
+        result_queue.put(batch)
+    result_queue.put(None)
+
+def _scan_records(records, test_function, custom_sites, on_result, inline_prefilter=False):
+    """Runs test_function over records with the configured engine at its fixed concurrency (used by worker processes and remote workers)."""
+    if config['scan_engine'] == "asyncio":
+        _raise_open_file_limit()
+        asyncio.run(_async_scan(records, ASYNC_TEST_FUNCTIONS[test_function], custom_sites, on_result, inline_prefilter))
+        return
+    test_args = (custom_sites,) if test_function == test_proxy_hard else ()
+
+    def submit(executor, proxy):
+        if inline_prefilter:
+            return executor.submit(_tracked_test, _prefiltered_test, test_function, proxy, *test_args)
+        return executor.submit(_tracked_test, test_function, proxy, *test_args)
+
+    probes = ProbeGroup()
+    with probes.executor(config['max_workers']) as executor:
+        try:
+            _run_windowed(executor, records, submit, on_result, lambda: max(config['submission_window'], config['max_workers']))
+        except BaseException:
+            probes.abort() # Leaving the with block waits for running probes; end them first
+            raise
+
+def _run_sharded(proxies, test_function, custom_sites, on_result, inline_prefilter, processes, deadline=None):
+    """
+    Splits the proxies round-robin into one shard per process and runs each shard in its
+    own worker process with its own probe engine. Results are merged back here and
+    passed to on_result in the parent. Raises ScanStopped once the deadline (if any) passes.
+    Returns False if a worker died before finishing its shard, so the scan counts as interrupted.
+    """
+    method = next(name for name, function in SHARD_TEST_FUNCTIONS.items() if function == test_function)
+    urls = [proxy.url for proxy in proxies]
+    shards = [urls[index::processes] for index in range(processes) if urls[index::processes]]
+    # Spawned workers start from a fresh interpreter: forking would copy locks (metrics.lock,
+    # probe groups) that threads of this process may hold at that moment, deadlocking the child
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    workers = [
+        context.Process(target=_shard_worker, args=(shard, dict(config), method, custom_sites, inline_prefilter, result_queue), daemon=True)
+        for shard in shards
+    ]
+    for worker in workers:
+        worker.start()
+    running = len(workers)
+    crashed = set() # Workers that exited with an error
+    try:
+        while running:
+            timeout = 0.5 if deadline is None else max(0, min(0.5, deadline - time.time()))
+            try:
+                batch = result_queue.get(timeout=timeout)
+            except queue.Empty:
+                if deadline is not None and time.time() >= deadline:
+                    raise ScanStopped("time budget exhausted")
+                for index, worker in enumerate(workers):
+                    if worker.exitcode not in (None, 0) and index not in crashed:
+                        crashed.add(index)
+                        console.print(f"⚠️ [bold yellow]Scan worker {index + 1} exited with code {worker.exitcode} before finishing its shard of {len(shards[index])} proxies.[/bold yellow]")
+                if not any(worker.is_alive() for worker in workers):
+                    break # Everything sent before the workers exited has been received
+                continue
+            if batch is None:
+                running -= 1
+                continue
+            for result, failure_reason, phases in batch:
+                if failure_reason is not None:
+                    _record_failure(result[3], failure_reason)
+                if phases is not None:
+                    _phase_timings[result[3]] = phases
+                on_result(result)
+    finally:
+        # Stopped, interrupted or finished: no worker outlives the scan
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+    if running and not crashed:
+        console.print(f"⚠️ [bold yellow]{running} scan worker(s) exited without finishing their shard.[/bold yellow]")
+    return not running
+
+
+# --- Distributed Scans (coordinator and remote workers) ---
+# Protocol (JSON over HTTP, optional X-Coordinator-Token header):
+#   POST /lease   {"worker"}  -> {"batch_id", "method", "proxies", "custom_sites", "settings"}
+#                                | {"wait": seconds} | {"done": true}
+#   POST /results {"worker", "batch_id", "results": [[proxy, ...], ...], "final"} -> {"ok": true}
+# A batch whose worker stops reporting for config['lease_timeout'] seconds goes back to the queue.
+
+# Settings a worker takes from the coordinator so every machine checks the same way
+COORDINATOR_SETTINGS = ["judge_url", "site_rules", "validation_max_bytes", "connect_timeout", "read_timeout", "speed_test_read_timeout"]
+
+class ScanCoordinator:
+    """Hands out batches of proxies to remote workers and collects their results exactly once."""
+    def __init__(self, proxies, method, custom_sites, batch_size, lease_timeout):
+        self.method = method
+        self.custom_sites = custom_sites
+        self.lease_timeout = lease_timeout
+        self.lock = threading.Lock()
+        self.pending = [proxies[index:index + batch_size] for index in range(0, len(proxies), batch_size)]
+        self.pending.reverse() # Popped from the end, so batches go out in list order
+        self.leases = {} # batch_id -> {"worker", "remaining", "expires"}
+        self.next_batch_id = 1
+        self.done = set()
+        self.total = len(set(proxies))
+        self.results = queue.Queue() # Raw result lists, merged by the scan loop
+        self.workers = set()
+        self.closed = False
+
+    @property
+    def complete(self):
+        return len(self.done) >= self.total
+
+    def lease(self, worker):
+        with self.lock:
+            self.workers.add(worker)
+            self._requeue_expired()
+            if self.closed or self.complete:
+                return {"done": True}
+            batch = []
+            while self.pending and not batch:
+                batch = [proxy for proxy in self.pending.pop() if proxy not in self.done]
+            if not batch:
+                return {"wait": 1.0} # Everything is leased; a lost batch may still come back
+            batch_id = self.next_batch_id
+            self.next_batch_id += 1
+            self.leases[batch_id] = {"worker": worker, "remaining": set(batch), "expires": time.time() + self.lease_timeout}
+            return {
+                "batch_id": batch_id,
+                "method": self.method,
+                "proxies": batch,
+                "custom_sites": self.custom_sites,
+                "settings": {key: config[key] for key in COORDINATOR_SETTINGS},
+            }
+
+    def submit(self, worker, batch_id, results, final):
+        """
+        Accepts results only for proxies still outstanding in a live lease held by `worker`.
+        Answers for expired, re-queued or foreign batches are dropped; the proxies are
+        tested again by whoever leases them next.
+        """
+        result_length = 2 if self.method == "speed" else 6
+        if not isinstance(batch_id, int) or not isinstance(results, list):
+            return
+        with self.lock:
+            lease = self.leases.get(batch_id)
+            if lease is None or lease["worker"] != worker:
+                return
+            for result in results:
+                if not isinstance(result, list) or len(result) != result_length:
+                    continue
+                proxy = result[0]
+                if not isinstance(proxy, str) or proxy not in lease["remaining"] or proxy in self.done:
+                    continue
+                self.done.add(proxy)
+                self.results.put(result)
+                lease["remaining"].discard(proxy)
+            lease["expires"] = time.time() + self.lease_timeout
+            if final or not lease["remaining"]:
+                del self.leases[batch_id]
+                self._requeue(lease["remaining"])
+
+    def requeue_expired(self):
+        with self.lock:
+            self._requeue_expired()
+
+    def _requeue_expired(self):
+        now = time.time()
+        for batch_id, lease in list(self.leases.items()):
+            if lease["expires"] < now:
+                del self.leases[batch_id]
+                self._requeue(lease["remaining"])
+
+    def _requeue(self, proxies):
+        remaining = [proxy for proxy in proxies if proxy not in self.done]
+        if remaining:
+            self.pending.append(remaining) # Lost work goes out first
+
+class CoordinatorRequestHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP front end of a ScanCoordinator (see the protocol above)."""
+    protocol_version = "HTTP/1.1"
+    server_version = "ProxyCoordinator"
+
+    def do_POST(self):
+        token = self.server.token
+        if token and self.headers.get("X-Coordinator-Token") != token:
+            return self._reply(403, {"error": "invalid token"})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        except ValueError:
+            return self._reply(400, {"error": "invalid JSON"})
+        if not isinstance(request, dict):
+            return self._reply(400, {"error": "expected a JSON object"})
+        coordinator = self.server.coordinator
+        path = urlsplit(self.path).path
+        if path == "/lease":
+            return self._reply(200, coordinator.lease(str(request.get("worker"))))
+        if path == "/results":
+            coordinator.submit(str(request.get("worker")), request.get("batch_id"), request.get("results", []), bool(request.get("final")))
+            return self._reply(200, {"ok": True})
+        self._reply(404, {"error": "unknown endpoint"})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Workers poll constantly
+
+def _is_loopback_host(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def _run_coordinator(proxies, method, custom_sites, on_result, deadline=None):
+    """
+    Serves `proxies` (URL strings) to remote workers and calls on_result with every raw
+    result list as it arrives. Returns True once every proxy has a result, or False when
+    the coordinator could not be started.
+    Raises ScanStopped once the time.time() deadline (if any) passes.
+    """
+    host, port = config['coordinator_host'], config['coordinator_port']
+    if not config['coordinator_token'] and not _is_loopback_host(host):
+        # Anyone who can reach the port could otherwise lease batches and post results
+        console.print(f"❌ [bold red]Refusing to serve the scan on {host} without a coordinator token. Set one, or listen on 127.0.0.1.[/bold red]")
+        return False
+    try:
+        server = http.server.ThreadingHTTPServer((host, port), CoordinatorRequestHandler)
+    except (OSError, OverflowError) as e: # OverflowError: port outside 0-65535
+        console.print(f"❌ [bold red]Could not start the coordinator on {host}:{port}: {e}[/bold red]")
+        return False
+    coordinator = ScanCoordinator(list(proxies), method, custom_sites, config['distributed_batch_size'], config['lease_timeout'])
+    server.daemon_threads = True
+    server.coordinator = coordinator
+    server.token = config['coordinator_token']
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    console.print(f"🛰️ [bold cyan]Coordinator listening on http://{config['coordinator_host']}:{config['coordinator_port']}/ with {coordinator.total} proxies; start workers with: worker --coordinator URL[/bold cyan]")
+    try:
+        while not (coordinator.complete and coordinator.results.empty()):
+            try:
+                result = coordinator.results.get(timeout=0.5)
+            except queue.Empty:
+                coordinator.requeue_expired()
+                if deadline is not None and time.time() >= deadline:
+                    raise ScanStopped("time budget exhausted")
+                continue
+            on_result(result)
+    finally:
+        coordinator.closed = True
+        time.sleep(min(1.5, config['lease_timeout'])) # Let polling workers hear that the scan is over
+        server.shutdown()
+        server.server_close()
+        console.print(f"🛰️ [bold cyan]Coordinator closed ({len(coordinator.workers)} workers took part).[/bold cyan]")
+    return True
+
+def _run_worker_batch(lease, send):
+    """Runs one leased batch with the local engine; send(results, final) reports back."""
+    pending_results = []
+    last_send = time.time()
+
+    def report(result):
+        nonlocal last_send
+        pending_results.append(result)
+        if len(pending_results) >= 100 or time.time() - last_send >= 1.0:
+            send(list(pending_results), False)
+            pending_results.clear()
+            last_send = time.time()
+
+    if lease["method"] == "speed":
+        probes = ProbeGroup()
+        with probes.executor(config['max_workers']) as executor:
+            try:
+                futures = [executor.submit(_test_single_proxy_speed, ProxyRecord.parse(proxy), speed_test_url, speed_test_bytes) for proxy in lease["proxies"]]
+                for future in as_completed(futures):
+                    report(list(future.result()))
+            except BaseException:
+                probes.abort() # Leaving the with block waits for running downloads; end them first
+                raise
+    else:
+        def on_result(result):
+            success, ping, anonymity_rating, proxy_str = result
+            failure_reason = _failure_reasons.pop(proxy_str, None)
+            phases = _phase_timings.pop(proxy_str, None)
+            _record_probe_metrics(proxy_str, success, ping, failure_reason, phases)
+            report([proxy_str, success, ping, anonymity_rating, failure_reason, phases])
+
+        records = [record for record in map(ProxyRecord.parse, lease["proxies"]) if record is not None]
+        _scan_records(records, SHARD_TEST_FUNCTIONS[lease["method"]], lease["custom_sites"], on_result)
+    send(pending_results, True)
+
+def run_worker(coordinator_url, worker_id=None):
+    """
+    Leases batches from a coordinator until it reports the scan is done, testing each
+    with this machine's engine and workers. Returns the number of proxies tested.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    base_url = coordinator_url.rstrip("/")
+    headers = {"X-Coordinator-Token": config['coordinator_token']} if config['coordinator_token'] else {}
+    tested = 0
+    failures = 0
+
+    def post(path, payload):
+        payload["worker"] = worker_id
+        r = requests.post(base_url + path, json=payload, headers=headers, timeout=30, proxies={"http": None, "https": None})
+        r.raise_for_status()
+        return r.json()
+
+    console.print(f"🛰️ [bold cyan]Worker {worker_id} connecting to {base_url}[/bold cyan]")
+    start_metrics_server()
+    while True:
+        try:
+            lease = post("/lease", {})
+            failures = 0
+        except requests.exceptions.HTTPError as e:
+            console.print(f"❌ [bold red]Coordinator rejected the worker: {e}[/bold red]")
+            break
+        except requests.exceptions.RequestException as e:
+            # The coordinator may not be up yet, or may already have finished
+            failures += 1
+            if failures > config['worker_retries']:
+                console.print(f"⚠️ [bold yellow]Coordinator unreachable ({_failure_reason(e)}); stopping.[/bold yellow]")
+                break
+            time.sleep(2)
+            continue
+        if lease.get("done"):
+            break
+        if "wait" in lease:
+            time.sleep(lease["wait"])
+            continue
+        config.update(lease["settings"])
+        _latency_tracker.reset()
+        batch_id = lease["batch_id"]
+        console.print(f"  📦 Batch {batch_id}: {len(lease['proxies'])} proxies ({lease['method']})")
+        try:
+            _run_worker_batch(lease, lambda results, final: post("/results", {"batch_id": batch_id, "results": results, "final": final}))
+        except requests.exceptions.RequestException as e:
+            console.print(f"⚠️ [bold yellow]Lost contact while reporting batch {batch_id} ({_failure_reason(e)}); it will be re-queued.[/bold yellow]")
+            continue
+        tested += len(lease["proxies"])
+    console.print(f"✅ [bold green]Worker finished: {tested} proxies tested.[/bold green]")
+    return tested
+
+
+# --- Prioritized Scan Order ---
+class ProbeScheduler:
+    """
+    Hands out proxies best-first by a predicted success score: the proxy's own history
+    times the success rates of its protocol and of its /24 (IPv4) or /48 (IPv6) subnet
+    in the current run. Scores fall as neighbours fail, so dead subnets sink mid-scan.
+    Iterate it lazily and feed every result back through observe().
+    """
+    def __init__(self, records, history):
+        self.history = history # {proxy_url: (check_count, success_count)}
+        self.protocol_stats = {} # protocol -> [tested, succeeded]
+        self.subnet_stats = {} # subnet prefix -> [tested, succeeded]
+        self.heap = [(-self._score(record), index, record) for index, record in enumerate(records)]
+        heapq.heapify(self.heap)
+
+    def __len__(self):
+        return len(self.heap)
+
+    @staticmethod
+    def _subnet(record):
+        if isinstance(record.address, str):
+            return None # Hostnames have no meaningful neighbours
+        return record.address[:3] if len(record.address) == 4 else record.address[:6]
+
+    @staticmethod
+    def _rate(stats):
+        tested, succeeded = stats
+        return (succeeded + 1) / (tested + 2) # Laplace-smoothed, 0.5 without data
+
+    def _score(self, record):
+        checks, successes = self.history.get(record.url, (0, 0))
+        score = self._rate((checks, successes))
+        score *= self._rate(self.protocol_stats.get(record.protocol, (0, 0)))
+        subnet = self._subnet(record)
+        if subnet is not None:
+            score *= self._rate(self.subnet_stats.get(subnet, (0, 0)))
+        return score
+
+    def observe(self, record, success):
+        """Feeds back one result (a ProxyRecord or proxy string)."""
+        record = _as_record(record)
+        if record is None:
+            return
+        keyed_stats = [(self.protocol_stats, record.protocol)]
+        subnet = self._subnet(record)
+        if subnet is not None:
+            keyed_stats.append((self.subnet_stats, subnet))
+        for stats, key in keyed_stats:
+            counts = stats.setdefault(key, [0, 0])
+            counts[0] += 1
+            counts[1] += int(success)
+
+    def __iter__(self):
+        while self.heap:
+            negative_score, index, record = heapq.heappop(self.heap)
+            score = self._score(record)
+            # Scores are refreshed lazily: requeue an entry that no longer beats the next one
+            if self.heap and score < -self.heap[0][0]:
+                heapq.heappush(self.heap, (-score, index, record))
+                continue
+            yield record
+
+
+# --- Scan Checkpoints ---
+class ScanCheckpoint:
+    """
+    Append-only JSON-lines log of the scan in progress. The first line describes the
+    scan ({"method", "list", "started"}), every further line is one result:
+    [proxy, success, ping, anonymity, failure_reason, phases]. Lines are flushed every
+    config['checkpoint_interval'] seconds; the file is removed once a scan completes.
+    Every method and list has its own file (see for_scan), so starting a different
+    scan never overwrites an unfinished one.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.last_flush = 0.0
+
+    @classmethod
+    def for_scan(cls, method, list_path):
+        """The checkpoint of one method and list: config['checkpoint_file'] with both worked into the name."""
+        root, extension = os.path.splitext(config['checkpoint_file'])
+        list_key = hashlib.sha1(os.path.abspath(list_path).encode("utf-8")).hexdigest()[:12]
+        return cls(f"{root}.{method}.{list_key}{extension}")
+
+    def load(self, method, list_path):
+        """
+        Returns (started, {proxy: (success, ping, anonymity_rating)}, {proxy: phases}) from
+        an unfinished checkpoint of the same method and list, or None when there is nothing to resume.
+        """
+        if not os.path.exists(self.path):
+            return None
+        results = {}
+        phases = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                return None
+            if not isinstance(header, dict) or header.get("method") != method or header.get("list") != list_path:
+                return None
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    proxy, success, ping, anonymity_rating = entry[:4]
+                except ValueError:
+                    break # A line torn by a crash ends the usable part of the log
+                results[proxy] = (success, ping, anonymity_rating)
+                if len(entry) > 5 and entry[5]:
+                    phases[proxy] = entry[5]
+        return header.get("started"), results, phases
+
+    def open(self, method, list_path, resume):
+        """Starts a new checkpoint, or keeps appending to the existing one when resuming."""
+        if resume:
+            self.file = open(self.path, "a", encoding="utf-8")
+        else:
+            self.file = open(self.path, "w", encoding="utf-8")
+            self.file.write(json.dumps({"method": method, "list": list_path, "started": time.time()}) + "\n")
+            self.file.flush()
+        self.last_flush = time.time()
+
+    def record(self, proxy, success, ping, anonymity_rating, failure_reason=None, phases=None):
+        self.file.write(json.dumps([proxy, success, ping, anonymity_rating, failure_reason, phases]) + "\n")
+        if time.time() - self.last_flush >= config['checkpoint_interval']:
+            self.file.flush()
+            self.last_flush = time.time()
+
+    def close(self, finished):
+        """Flushes the log; a finished scan no longer needs it and deletes the file."""
+        self.file.close()
+        if finished:
+            os.remove(self.path)
+
+
+# --- Result Export ---
+class ResultExporter:
+    """
+    Streams working proxies to <export_dir>/working_<method>.<format> (or <name>.<format>) while a scan runs.
+    Rows go to buffered ".part" files as results complete; finish() adds the sorted plain
+    list and swaps every file into place with os.replace, so readers never see a partial file.
+    """
+    CSV_FIELDS = ["proxy", "protocol", "ping_ms", "anonymity", "method", "checked_at"] + [f"{phase}_ms" for phase in PHASES]
+
+    def __init__(self, method, formats, directory, name=None):
+        self.method = method
+        self.name = name or f"working_{method}"
+        self.formats = [fmt for fmt in formats if fmt in ("jsonl", "csv", "txt")]
+        self.directory = directory
+        self.written = set()
+        self.files = {}
+        self.csv_writer = None
+        if self.formats:
+            os.makedirs(directory, exist_ok=True)
+        for fmt in ("jsonl", "csv"):
+            if fmt in self.formats:
+                self.files[fmt] = open(self._path(fmt) + ".part", "w", encoding="utf-8", newline="", buffering=1 << 16)
+        if "csv" in self.files:
+            self.csv_writer = csv.writer(self.files["csv"])
+            self.csv_writer.writerow(self.CSV_FIELDS)
+
+    def _path(self, fmt):
+        return os.path.join(self.directory, f"{self.name}.{fmt}")
+
+    def write(self, proxy, ping, anonymity_rating, phases=None, checked_at=None):
+        """Appends one working proxy to the streamed formats."""
+        if proxy in self.written:
+            return
+        self.written.add(proxy)
+        checked_at = checked_at or time.time()
+        protocol = proxy.split("://", 1)[0]
+        if "jsonl" in self.files:
+            row = {"proxy": proxy, "protocol": protocol, "ping_ms": ping, "anonymity": anonymity_rating, "method": self.method, "checked_at": round(checked_at, 3), "phases": phases}
+            self.files["jsonl"].write(json.dumps(row) + "\n")
+        if self.csv_writer is not None:
+            phase_columns = [phases.get(phase) if phases else None for phase in PHASES]
+            self.csv_writer.writerow([proxy, protocol, ping, anonymity_rating, self.method, round(checked_at, 3)] + phase_columns)
+
+    def finish(self, working_proxies, proxy_phases):
+        """
+        Writes entries that were carried into the results without a test (TTL, resume,
+        delta mode), the plain list in config['rank_by'] order, and atomically publishes
+        every file. Returns the published paths.
+        """
+        for proxy, ping, anonymity_rating in working_proxies:
+            self.write(proxy, ping, anonymity_rating, proxy_phases.get(proxy))
+        for handle in self.files.values():
+            handle.close()
+        if "txt" in self.formats:
+            with open(self._path("txt") + ".part", "w", encoding="utf-8", buffering=1 << 16) as f:
+                for proxy, _, _ in sorted(working_proxies, key=_rank_key(proxy_phases)):
+                    f.write(proxy + "\n")
+        published = []
+        for fmt in self.formats:
+            os.replace(self._path(fmt) + ".part", self._path(fmt))
+            published.append(self._path(fmt))
+        return published
+
+
+def _rank_key(proxy_phases):
+    """
+    Sort key for (proxy_str, ping, anonymity_rating) entries following config['rank_by']:
+    the ping, or one phase's time with the ping as tie-breaker. Proxies without phase
+    timings go last when ranking by a phase.
+    """
+    rank_by = config['rank_by']
+    if rank_by not in PHASES:
+        return lambda entry: entry[1]
+    return lambda entry: (proxy_phases.get(entry[0], {}).get(rank_by, float("inf")), entry[1])
+
+def _format_phases(phases):
+    """Compact connect/handshake/tls/ttfb/body display of a proxy's phase timings (ms)."""
+    if not phases:
+        return "-"
+    return "/".join(f"{phases.get(phase, 0):.0f}" for phase in PHASES)
+
+def _print_parse_stats(parse_stats):
+    """Reports the entries dropped while parsing the proxy list."""
+    if parse_stats.get("invalid") or parse_stats.get("duplicates"):
+        console.print(f"🧹 [bold cyan]Dropped {parse_stats['duplicates']} duplicate and {parse_stats['invalid']} invalid entries.[/bold cyan]")
+
+def check_proxies_with_method(test_function, title_message, success_message, custom_sites=None): 
+    """
+    Generic function for checking proxies with a chosen test method (Soft or Hard).
+    Returns the working proxies as (proxy_str, ping, anonymity_rating), or None when
+    there is no proxy list to check.
+    """
+    pause = 2 if interactive else 0 # Give menu users time to read the warning
+    if not os.path.exists(proxy_file): 
+        console.print(f"⚠️ [bold yellow]Proxy list not saved in {proxy_file}. Please update first.[/bold yellow]")
+        time.sleep(pause)
+        return
+
+    # In delta mode only the entries added since the last new-only scan are tested
+    new_only = config['scan_new_only']
+    list_path = config['delta_file'] if new_only else proxy_file
+    if new_only and not os.path.exists(list_path):
+        console.print(f"⚠️ [bold yellow]No update delta found in {list_path}. Please update first.[/bold yellow]")
+        time.sleep(pause)
+        return
+
+    streaming = config['streaming_scan']
+    parse_stats = {}
+    if streaming:
+        # The list is read lazily and without deduplication while testing, so memory does not grow with its size
+        proxies = iter_proxy_records(list_path, parse_stats, dedupe=False)
+        list_is_empty = os.path.getsize(list_path) == 0
+    else:
+        proxies = list(iter_proxy_records(list_path, parse_stats))
+        list_is_empty = not proxies
+
+    if list_is_empty and not new_only:
+        console.print(f"⚠️ [bold yellow]Proxy file {proxy_file} is empty. Please update first.[/bold yellow]")
+        time.sleep(pause)
+        return
+
+    console.print(f"\n🔍 [bold blue]**{title_message}**[/bold blue]")
+    start_metrics_server()
+    if not streaming:
+        _print_parse_stats(parse_stats)
+    working_proxies = []
+    proxy_phases = {} # proxy_str -> phase timings (ms) of its check
+    failed_proxies_count = 0 
+    skipped_count = 0
+    tested_count = 0
+
+    # Skip proxies checked within the TTL; earlier active ones are carried into the results
+    method_name = TEST_METHOD_NAMES[test_function]
+    health_db = ProxyHealthDB(config['health_db_file'])
+    # Streaming scans look up recent results batch by batch while reading the list (see stale_proxies)
+    recent_results = {} if streaming else health_db.recent_results(method_name, config['health_ttl'])
+
+    if new_only:
+        # Unchanged entries keep their earlier result: known-good ones go straight into the table
+        active_results = health_db.active_results(method_name)
+        new_urls = {record.url for record in iter_proxy_records(list_path)}
+        carried_count = 0
+        for record in iter_proxy_records(proxy_file):
+            if record.url not in new_urls and record.url in active_results:
+                ping, anonymity_rating = active_results[record.url]
+                working_proxies.append((record.url, ping, anonymity_rating))
+                carried_count += 1
+        console.print(f"🆕 [bold cyan]Testing only the {len(new_urls)} new entries added since the last new-only scan ({carried_count} known-good proxies carried forward).[/bold cyan]")
+
+    # An unfinished scan of the same list and method can be continued from its checkpoint
+    checkpoint = ScanCheckpoint.for_scan(method_name, list_path)
+    resumed_results = {}
+    unfinished = checkpoint.load(method_name, list_path)
+    if unfinished is not None:
+        started, results, phases = unfinished
+        resume = resume_scan
+        if not resume and interactive:
+            started_text = time.strftime("%Y-%m-%d %H:%M", time.localtime(started)) if started else "an earlier run"
+            while True:
+                resume_choice = console.input(f"[bold yellow]Found an unfinished scan from {started_text} ({len(results)} proxies done). Resume it? (y/n):[/bold yellow] ").strip().lower()
+                if resume_choice in ["y", "n"]:
+                    resume = resume_choice == "y"
+                    break
+                console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+        if resume:
+            resumed_results = results
+            proxy_phases.update(phases)
+            console.print(f"⏯️ [bold cyan]Resuming: {len(resumed_results)} proxies already classified will not be re-tested.[/bold cyan]")
+    checkpoint.open(method_name, list_path, resume=bool(resumed_results))
+    exporter = ResultExporter(method_name, config['export_formats'], config['export_dir'])
+    resumed_count = 0
+    interrupted = False # An interrupted scan keeps its checkpoint
+
+    def stale_proxies(entries):
+        nonlocal failed_proxies_count, skipped_count, resumed_count
+        for proxy, recent_results in batched_recent_results(entries):
+            if proxy.url in resumed_results or proxy.url in recent_results:
+                if proxy.url in resumed_results:
+                    resumed_count += 1
+                    success, ping, anonymity_rating = resumed_results[proxy.url]
+                else:
+                    skipped_count += 1
+                    success, ping, anonymity_rating = recent_results[proxy.url]
+                if success:
+                    working_proxies.append((proxy.url, ping, anonymity_rating))
+                else:
+                    failed_proxies_count += 1
+            else:
+                yield proxy
+
+    def batched_recent_results(entries):
+        """Yields (proxy, recent results) pairs, querying the database per batch in streaming mode."""
+        if not streaming:
+            for proxy in entries:
+                yield proxy, recent_results
+            return
+        while True:
+            batch = list(itertools.islice(entries, HEALTH_LOOKUP_BATCH_SIZE))
+            if not batch:
+                return
+            batch_results = health_db.recent_results_for([proxy.url for proxy in batch], method_name, config['health_ttl'])
+            for proxy in batch:
+                yield proxy, batch_results
+
+    if recent_results or resumed_results or (streaming and config['health_ttl'] > 0):
+        proxies = stale_proxies(proxies)
+        if not streaming:
+            proxies = list(proxies)
+            if resumed_count:
+                console.print(f"⏯️ [bold cyan]Carried over {resumed_count} results from the checkpoint.[/bold cyan]")
+            if skipped_count:
+                console.print(f"⏭️ [bold cyan]Skipping {skipped_count} proxies checked within the last {config['health_ttl']} s ({len(working_proxies)} active carried forward).[/bold cyan]")
+
+    with Progress(
+        SpinnerColumn(spinner_name="dots"),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(), 
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"), 
+        ScannedCountTextColumn(), 
+        "•",
+        TimeRemainingColumn(), 
+        transient=False
+    ) as progress:
+        # Streaming scans run the TCP prefilter inline, per proxy, instead of as a separate stage.
+        # Protocol probing needs the whole list to group it by host, so it is list mode only
+        # and replaces the TCP prefilter (a dead host already fails its first handshake).
+        if config['protocol_probing'] and not streaming:
+            try:
+                proxies, unsupported_proxies = protocol_probe(proxies, progress)
+            except KeyboardInterrupt:
+                console.print("\n[bold yellow]Protocol probe interrupted. No proxies were tested.[/bold yellow]")
+                proxies, unsupported_proxies = [], []
+                interrupted = True
+            failed_proxies_count += len(unsupported_proxies)
+            for proxy, failure_reason in unsupported_proxies:
+                health_db.record(proxy.url, method_name, False, None, "Unknown", failure_reason)
+        elif config['tcp_prefilter'] and not streaming:
+            try:
+                proxies, unreachable_proxies = tcp_prefilter(proxies, progress)
+            except KeyboardInterrupt:
+                console.print("\n[bold yellow]TCP prefilter interrupted. No proxies were tested.[/bold yellow]")
+                proxies, unreachable_proxies = [], []
+                interrupted = True
+            failed_proxies_count += len(unreachable_proxies)
+            for proxy in unreachable_proxies:
+                health_db.record(proxy.url, method_name, False, None, "Unknown", "tcp connect failed")
+
+        scheduler = None
+        if config['prioritized_scan'] and not streaming:
+            scheduler = ProbeScheduler(proxies, health_db.outcome_counts(method_name))
+            # Hosts already found dead by the pre-stage count against their subnet
+            if config['protocol_probing']:
+                for proxy, _ in unsupported_proxies:
+                    scheduler.observe(proxy, False)
+            elif config['tcp_prefilter']:
+                for proxy in unreachable_proxies:
+                    scheduler.observe(proxy, False)
+            proxies = scheduler
+
+        scan_total = None if streaming else len(proxies)
+        task = progress.add_task("[cyan]Testing Proxies[/cyan]", total=scan_total)
+        if scan_total is not None:
+            metrics.set("proxy_scanner_queue_depth", scan_total)
+        _latency_tracker.reset() # Timeouts adapt to the latency seen in this scan only
+
+        def handle_result(result):
+            """Records a (success, ping, anonymity_rating, proxy_str) result and advances the progress bar."""
+            nonlocal failed_proxies_count, tested_count
+            tested_count += 1
+            success, ping, anonymity_rating, proxy_str = result
+            failure_reason = _failure_reasons.pop(proxy_str, None)
+            phases = _phase_timings.pop(proxy_str, None)
+            health_db.record(proxy_str, method_name, success, ping, anonymity_rating, failure_reason, phases)
+            checkpoint.record(proxy_str, success, ping, anonymity_rating, failure_reason, phases)
+            _record_probe_metrics(proxy_str, success, ping, failure_reason, phases)
+            if scan_total is not None:
+                metrics.set("proxy_scanner_queue_depth", max(0, scan_total - tested_count))
+            if scheduler is not None:
+                scheduler.observe(proxy_str, success)
+            if controller is not None:
+                controller.record(failure_reason)
+                metrics.set("proxy_scanner_concurrency_limit", controller.limit)
+                progress.update(task, description=f"[cyan]Testing Proxies[/cyan] [dim](concurrency {controller.limit})[/dim]")
+            if success:
+                _latency_tracker.record(ping)
+                working_proxies.append((proxy_str, ping, anonymity_rating)) # Store 3 values
+                if phases:
+                    proxy_phases[proxy_str] = phases
+                exporter.write(proxy_str, ping, anonymity_rating, phases)
+                console_color = "green"
+                if anonymity_rating == 0:
+                    console_color = "red" # Transparent is red
+                elif anonymity_rating == 5:
+                    console_color = "yellow" # Anonymous is yellow
+                
+                progress.console.print(f"  ✔️ [bold {console_color}]{proxy_str}[/bold {console_color}] → {success_message} ⏱️ Ping: [bold magenta]{ping} ms[/bold magenta] [dim]({_format_phases(phases)})[/dim] 🕵️ Anonymity: [bold blue]{anonymity_rating}[/bold blue]/10")
+            else:
+                failed_proxies_count += 1
+            progress.update(task, advance=1) 
+            if goal is not None:
+                goal.record(success, ping, anonymity_rating) # Raises ScanStopped once the goal is met
+
+        inline_prefilter = config['tcp_prefilter'] and streaming
+        controller = None
+        if config['adaptive_concurrency']:
+            maximum = config['async_max_in_flight'] if config['scan_engine'] == "asyncio" else config['adaptive_max_workers']
+            controller = ConcurrencyController(config['max_workers'], config['adaptive_min_concurrency'], maximum)
+        if controller is not None:
+            metrics.set("proxy_scanner_concurrency_limit", controller.limit)
+        else:
+            engine_limit = config['async_max_in_flight'] if config['scan_engine'] == "asyncio" else config['max_workers']
+            metrics.set("proxy_scanner_concurrency_limit", engine_limit * config['scan_processes'])
+        goal = None
+        if config['target_count'] or config['scan_time_budget']:
+            goal = ScanGoal(config['target_count'], config['target_max_ping'], config['target_min_anonymity'], config['scan_time_budget'])
+        deadline = goal.deadline if goal is not None else None
+        stop_reason = None
+
+        if streaming and (config['distributed_scan'] or config['scan_processes'] > 1):
+            # Shards and leased batches are cut from the full URL list, so these modes load it whole
+            progress.console.print("ℹ️ [bold yellow]Sharded and distributed scans load the whole proxy list; streaming only skips deduplication here.[/bold yellow]")
+
+        if config['distributed_scan']:
+            def handle_remote_result(result):
+                proxy_str, success, ping, anonymity_rating, failure_reason, phases = result
+                if failure_reason is not None:
+                    _record_failure(proxy_str, failure_reason)
+                if phases is not None:
+                    _phase_timings[proxy_str] = phases
+                handle_result((success, ping, anonymity_rating, proxy_str))
+
+            method = next(name for name, function in SHARD_TEST_FUNCTIONS.items() if function == test_function)
+            try:
+                if not _run_coordinator([proxy.url for proxy in proxies], method, custom_sites, handle_remote_result, deadline):
+                    interrupted = True # Nothing was tested; keep the checkpoint
+            except ScanStopped as e:
+                stop_reason = str(e)
+            except KeyboardInterrupt:
+                console.print("\n[bold yellow]Proxy test interrupted. Gathering results...[/bold yellow]")
+                interrupted = True
+        elif config['scan_processes'] > 1:
+            try:
+                if not _run_sharded(proxies, test_function, custom_sites, handle_result, inline_prefilter, config['scan_processes'], deadline):
+                    interrupted = True # Proxies of the lost shards stay untested; keep the checkpoint
+            except ScanStopped as e:
+                stop_reason = str(e)
+            except KeyboardInterrupt:
+                console.print("\n[bold yellow]Proxy test interrupted. Gathering results...[/bold yellow]")
+                interrupted = True
+        elif config['scan_engine'] == "asyncio":
+            _raise_open_file_limit()
+            try:
+                asyncio.run(_async_scan(proxies, ASYNC_TEST_FUNCTIONS[test_function], custom_sites, handle_result, inline_prefilter, controller, deadline))
+            except ScanStopped as e:
+                stop_reason = str(e)
+            except KeyboardInterrupt:
+                console.print("\n[bold yellow]Proxy test interrupted. Gathering results...[/bold yellow]")
+                interrupted = True
+        else:
+            test_args = (custom_sites,) if test_function == test_proxy_hard else ()
+
+            def submit(executor, proxy):
+                if inline_prefilter:
+                    return executor.submit(_tracked_test, _prefiltered_test, test_function, proxy, *test_args)
+                return executor.submit(_tracked_test, test_function, proxy, *test_args)
+
+            if controller is not None:
+                # The pool may grow to the controller's cap; the window keeps in-flight tests at its current limit
+                pool_size = controller.maximum
+                window = lambda: controller.limit
+            else:
+                # Use config['max_workers']; at most config['submission_window'] tests are queued at once
+                pool_size = config['max_workers']
+                window = lambda: max(config['submission_window'], config['max_workers'])
+            probes = ProbeGroup()
+            executor = probes.executor(pool_size)
+            try:
+                # Both test_proxy_soft and test_proxy_hard return 4 values: success, ping, anonymity_rating, proxy_str
+                _run_windowed(executor, proxies, submit, handle_result, window, deadline)
+            except ScanStopped as e:
+                stop_reason = str(e)
+                probes.abort()
+            except KeyboardInterrupt:
+                console.print("\n[bold yellow]Proxy test interrupted. Gathering results...[/bold yellow]")
+                interrupted = True
+                probes.abort()
+            finally:
+                # Interrupted or stopped scans do not wait for tests whose results are no longer
+                # needed; queued tests are cancelled and running ones wind down in the background
+                executor.shutdown(wait=False, cancel_futures=True)
+
+        if stop_reason is not None:
+            console.print(f"🎯 [bold cyan]Scan stopped early: {stop_reason} after {tested_count} tests.[/bold cyan]")
+
+        if _latency_tracker.cutoff is not None:
+            connect_timeout, read_timeout = probe_timeouts()
+            console.print(f"⏱️ [bold cyan]Timeouts tightened to {connect_timeout:.1f} s connect / {read_timeout:.1f} s read (median latency {_latency_tracker.median * 1000:.0f} ms).[/bold cyan]")
+        if controller is not None:
+            console.print(f"⚙️ [bold cyan]Adaptive concurrency settled at {controller.limit} (peak {controller.peak}, {controller.adjustments} adjustments).[/bold cyan]")
+        if streaming:
+            progress.update(task, total=tested_count)
+            _print_parse_stats(parse_stats)
+            if resumed_count:
+                console.print(f"⏯️ [bold cyan]Carried over {resumed_count} results from the checkpoint.[/bold cyan]")
+            if skipped_count:
+                console.print(f"⏭️ [bold cyan]Skipped {skipped_count} proxies checked within the last {config['health_ttl']} s.[/bold cyan]")
+            
+    # Proxies carried over without a test keep the phase timings of their stored check
+    if len(proxy_phases) < len(working_proxies):
+        for proxy, phases in health_db.phase_results(method_name).items():
+            proxy_phases.setdefault(proxy, phases)
+    health_db.close()
+    checkpoint.close(finished=not interrupted)
+    if new_only and not interrupted and stop_reason is None:
+        # Every pending new entry has been tested; later updates start a fresh delta
+        try:
+            open(list_path, "w").close()
+        except OSError as e:
+            console.print(f"⚠️ [bold yellow]Could not clear {list_path}: {e}[/bold yellow]")
+    exported_paths = exporter.finish(working_proxies, proxy_phases)
+    if interrupted:
+        console.print(f"💾 [bold cyan]Progress saved to {checkpoint.path}. Run again (or start with --resume) to continue.[/bold cyan]")
+    console.print(f"✅ [bold green]Proxy testing finished.[/bold green]")
+    console.print(f"    [bold green]Active Proxies Found:[/bold green] [green]{len(working_proxies)}[/green]")
+    console.print(f"    [bold red]Failed Proxies:[/bold red] [red]{failed_proxies_count}[/red]")
+    if exported_paths:
+        console.print(f"    [bold green]Exported to:[/bold green] [cyan]{', '.join(exported_paths)}[/cyan]")
+
+    if working_proxies:
+        console.print("\n---")
+        rank_label = "ping" if config['rank_by'] not in PHASES else f"{config['rank_by']} time"
+        console.print(f"🔹 [bold green]Active Proxies (Sorted by lowest {rank_label}):[/bold green]")
+        table = Table(show_header=True, header_style="bold magenta")
+        table.add_column("Proxy", style="cyan", no_wrap=True)
+        table.add_column("Ping (ms)", style="green", justify="right")
+        table.add_column("Phases (ms)", style="dim", justify="right") # connect/handshake/tls/ttfb/body
+        table.add_column("Anonymity (0-10)", style="blue", justify="center") # New column header
+
+        working_proxies.sort(key=_rank_key(proxy_phases)) # Sort by ping or the configured phase
+
+        # Very long lists are only shown in part; the exported files hold every proxy
+        shown_proxies = working_proxies[:config['table_max_rows']] if config['table_max_rows'] else working_proxies
+        for proxy_data in shown_proxies:
+            proxy, ping, anonymity_rating = proxy_data
+            anonymity_display_color = "green"
+            if anonymity_rating == 0:
                 anonymity_display_color = "red"
             elif anonymity_rating == 5:
                 anonymity_display_color = "yellow"
             
-            table.add_row(proxy, str(ping), Text(str(anonymity_rating), style=f"bold {anonymity_display_color}"))
+            table.add_row(proxy, str(ping), _format_phases(proxy_phases.get(proxy)), Text(str(anonymity_rating), style=f"bold {anonymity_display_color}"))
         
         console.print(table)
+        if len(shown_proxies) < len(working_proxies):
+            console.print(f"[dim]... and {len(working_proxies) - len(shown_proxies)} more (see the exported files).[/dim]")
     else:
         console.print("\n😔 [bold yellow]No active proxies were found.[/bold yellow]")
     console.print("---\n")
 
-    if working_proxies:
+    if working_proxies and interactive:
+        while True:
+            speed_test_choice = console.input("[bold yellow]Do you want to run a speed test on active proxies? (y/n):[/bold yellow] ").strip().lower()
+            if speed_test_choice == "y":
+                # working_proxies contains (proxy_str, ping, anonymity_rating)
+                proxies_for_speed_test = [(p[0], p[1]) for p in working_proxies] # Only pass proxy string and ping
+                perform_speed_test(proxies_for_speed_test)
+                break
+            elif speed_test_choice == "n":
+                console.print("[bold green]Speed test will not be performed.[/bold green]")
+                break
+            else:
+                console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+                time.sleep(1)
+    return working_proxies
+
+# --- Re-Validation Daemon ---
+class RevalidationScheduler:
+    """
+    Min-heap of (due_time, proxy_url) over every known proxy. A passing proxy comes back
+    after config['revalidate_interval'] (twice that when slower than revalidate_fast_ping),
+    a failing one after interval x 2^consecutive_failures, capped at revalidate_max_backoff.
+    Rescheduling pushes a new entry; entries that no longer match `due` are skipped when popped.
+    """
+    def __init__(self):
+        self.heap = []
+        self.due = {} # proxy -> due time of its live heap entry (absent while being checked)
+        self.failures = {} # proxy -> consecutive failures; holds every known proxy
+
+    def __len__(self):
+        return len(self.failures)
+
+    def __contains__(self, proxy):
+        return proxy in self.failures
+
+    def add(self, proxy, due_time, failures=0):
+        if proxy in self.failures:
+            return
+        self.failures[proxy] = failures
+        self._push(proxy, due_time)
+
+    def remove(self, proxy):
+        """Forgets a proxy; a check already running for it is ignored when it finishes."""
+        self.due.pop(proxy, None)
+        self.failures.pop(proxy, None)
+
+    def _push(self, proxy, due_time):
+        self.due[proxy] = due_time
+        heapq.heappush(self.heap, (due_time, proxy))
+
+    def _drop_stale(self):
+        while self.heap and self.due.get(self.heap[0][1]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def next_due(self):
+        """Due time of the next proxy, or None when every known proxy is being checked."""
+        self._drop_stale()
+        return self.heap[0][0] if self.heap else None
+
+    def pop_due(self, now):
+        """Returns the next proxy due at `now` (or None), which stays known but leaves the heap."""
+        self._drop_stale()
+        if not self.heap or self.heap[0][0] > now:
+            return None
+        _, proxy = heapq.heappop(self.heap)
+        del self.due[proxy]
+        return proxy
+
+    def interval(self, success, ping, failures):
+        if success:
+            slow = ping is not None and ping > config['revalidate_fast_ping']
+            return config['revalidate_interval'] * (2 if slow else 1)
+        return min(config['revalidate_interval'] * 2 ** failures, config['revalidate_max_backoff'])
+
+    def reschedule(self, proxy, success, ping, now):
+        """Queues the next check after a result. Returns the wait in seconds, or None for a forgotten proxy."""
+        if proxy not in self.failures:
+            return None
+        self.failures[proxy] = 0 if success else self.failures[proxy] + 1
+        wait_time = self.interval(success, ping, self.failures[proxy])
+        self._push(proxy, now + wait_time)
+        return wait_time
+
+def run_revalidation_daemon(test_function, custom_sites=None):
+    """
+    Keeps every proxy of the proxy file re-checked on its own schedule until Ctrl+C.
+    The proxies that passed their latest check are published atomically to
+    <export_dir>/live_<method>.<format>. Newly listed proxies are checked as soon as the
+    file changes, either by a source refresh every config['revalidate_refresh_interval']
+    seconds or by an external update.
+    """
+    if not os.path.exists(proxy_file):
+        console.print(f"⚠️ [bold yellow]Proxy list not saved in {proxy_file}. Please update first.[/bold yellow]")
+        return
+    method_name = TEST_METHOD_NAMES[test_function]
+    test_args = (custom_sites,) if test_function == test_proxy_hard else ()
+    health_db = ProxyHealthDB(config['health_db_file'])
+    scheduler = RevalidationScheduler()
+    live = {} # proxy_str -> (ping, anonymity_rating, phases, checked_at)
+
+    # Earlier checks decide the first due times, so a restart does not re-test everything at once
+    history = health_db.schedule_state(method_name)
+    stored_phases = health_db.phase_results(method_name)
+
+    def load_list():
+        urls = {record.url for record in iter_proxy_records(proxy_file)}
+        removed = [proxy for proxy in scheduler.failures if proxy not in urls]
+        for proxy in removed:
+            scheduler.remove(proxy)
+            live.pop(proxy, None)
+        now = time.time()
+        added = 0
+        for url in urls:
+            if url in scheduler:
+                continue
+            added += 1
+            if url not in history:
+                scheduler.add(url, now)
+                continue
+            last_checked, success, ping, anonymity_rating = history.pop(url)
+            failures = 0 if success else 1
+            scheduler.add(url, last_checked + scheduler.interval(success, ping, failures), failures)
+            if success:
+                live[url] = (ping, anonymity_rating, stored_phases.get(url), last_checked)
+        console.print(f"📋 [bold cyan]Proxy list loaded: {added} added, {len(removed)} removed, {len(scheduler)} known.[/bold cyan]")
+
+    def publish():
+        exporter = ResultExporter(method_name, config['export_formats'], config['export_dir'], name=f"live_{method_name}")
+        entries = [(proxy, ping, anonymity_rating) for proxy, (ping, anonymity_rating, _, _) in live.items()]
+        for proxy, (ping, anonymity_rating, phases, checked_at) in live.items():
+            exporter.write(proxy, ping, anonymity_rating, phases, checked_at)
+        exporter.finish(entries, {proxy: entry[2] for proxy, entry in live.items() if entry[2]})
+        health_db.commit()
+        metrics.set("proxy_scanner_live_proxies", len(live))
+
+    start_metrics_server()
+    load_list()
+    list_mtime = os.path.getmtime(proxy_file)
+    refresh_interval = config['revalidate_refresh_interval']
+    next_refresh = time.time() + refresh_interval if refresh_interval > 0 else None # A hand-edited negative value means never
+    next_publish = 0.0
+    checked_count = 0
+    pending = {} # future -> proxy_str
+    console.print(f"🔁 [bold blue]**Re-validating {len(scheduler)} proxies ({method_name} check). Press Ctrl+C to stop.**[/bold blue]")
+    _latency_tracker.reset() # Timeouts stay at their configured values for the daemon's lifetime
+    probes = ProbeGroup()
+    executor = probes.executor(config['max_workers'])
+    try:
+        while True:
+            now = time.time()
+            if next_refresh is not None and now >= next_refresh:
+                fetch_proxies()
+                next_refresh = time.time() + refresh_interval
+            if os.path.exists(proxy_file) and os.path.getmtime(proxy_file) != list_mtime:
+                list_mtime = os.path.getmtime(proxy_file)
+                load_list()
+
+            while len(pending) < config['max_workers']:
+                proxy = scheduler.pop_due(now)
+                if proxy is None:
+                    break
+                pending[executor.submit(_tracked_test, test_function, ProxyRecord.parse(proxy), *test_args)] = proxy
+
+            # Wake up for the next due proxy, a finished check, or at least once a second
+            next_due = scheduler.next_due()
+            timeout = 1.0 if next_due is None else min(1.0, max(0.0, next_due - time.time()))
+            if pending:
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            else:
+                time.sleep(timeout)
+                done = set()
+
+            for future in done:
+                pending.pop(future)
+                success, ping, anonymity_rating, proxy_str = future.result()
+                failure_reason = _failure_reasons.pop(proxy_str, None)
+                phases = _phase_timings.pop(proxy_str, None)
+                checked_count += 1
+                health_db.record(proxy_str, method_name, success, ping, anonymity_rating, failure_reason, phases)
+                _record_probe_metrics(proxy_str, success, ping, failure_reason, phases)
+                if scheduler.reschedule(proxy_str, success, ping, time.time()) is None:
+                    continue # Dropped from the list while it was being checked
+                if success:
+                    live[proxy_str] = (ping, anonymity_rating, phases, time.time())
+                else:
+                    live.pop(proxy_str, None)
+
+            if time.time() >= next_publish:
+                publish()
+                next_publish = time.time() + config['revalidate_publish_interval']
+                next_due = scheduler.next_due()
+                next_text = f"next check in {max(0, next_due - time.time()):.0f} s" if next_due is not None else "all checks running"
+                console.print(f"🔁 [dim]{time.strftime('%H:%M:%S')}[/dim] [bold green]Live: {len(live)}[/bold green] / {len(scheduler)} known • {checked_count} checks • {len(pending)} running • {next_text}")
+    except KeyboardInterrupt:
+        console.print("\n[bold yellow]Re-validation stopped.[/bold yellow]")
+    finally:
+        probes.abort() # Running checks are cancelled instead of holding the exit
+        executor.shutdown(wait=False, cancel_futures=True)
+        publish()
+        health_db.close()
+    console.print(f"✅ [bold green]Live set of {len(live)} proxies published to {config['export_dir']}.[/bold green]")
+
+
+# --- Built-in Anonymity Judge Server ---
+class JudgeRequestHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Answers every GET with a compact JSON payload:
+    {"ip": client address, "token": correlation token from the query, "headers": {...}}
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = "ProxyJudge"
+
+    def do_GET(self):
+        query = parse_qs(urlsplit(self.path).query)
+        payload = {
+            "ip": self.client_address[0],
+            "token": query.get("token", [None])[0],
+            "headers": dict(self.headers.items()),
+        }
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass # Keep the console quiet under heavy probe load
+
+def start_judge_server(host, port):
+    """Starts the judge server on a background thread and returns the server object."""
+    server = http.server.ThreadingHTTPServer((host, port), JudgeRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_judge_server():
+    """Runs the judge server in the foreground until Ctrl+C."""
+    try:
+        server = start_judge_server(config['judge_host'], config['judge_port'])
+    except OSError as e:
+        console.print(f"❌ [bold red]Could not start judge server on {config['judge_host']}:{config['judge_port']}: {e}[/bold red]")
+        return
+    console.print(f"🕵️ [bold green]Judge server listening on [cyan]http://{config['judge_host']}:{config['judge_port']}/[/cyan][/bold green]")
+    console.print("[dim]Point the Judge URL setting at this host's public address. Press Ctrl+C to stop.[/dim]")
+    try:
         while True:
-            speed_test_choice = console.input("[bold yellow]Do you want to run a speed test on active proxies? (y/n):[/bold yellow] ").strip().lower()
-            if speed_test_choice == "y":
-                # working_proxies contains (proxy_str, ping, anonymity_rating)
-                proxies_for_speed_test = [(p[0], p[1]) for p in working_proxies] # Only pass proxy string and ping
-                perform_speed_test(proxies_for_speed_test)
-                break
-            elif speed_test_choice == "n":
-                console.print("[bold green]Speed test will not be performed.[/bold green]")
-                break
-            else:
-                console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
-                time.sleep(1)
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+    server.server_close()
+    console.print("[bold yellow]Judge server stopped.[/bold yellow]")
+
 
 # --- Configuration Functions ---
 def configure_max_workers():
@@ -483,6 +3206,576 @@ def configure_hard_check_sites():
         console.print("[bold yellow]Hard Check sites configuration remains unchanged.[/bold yellow]")
     time.sleep(1)
 
+def configure_scan_engine():
+    """Selects the scan engine (threads or asyncio), the number of worker processes and the asyncio in-flight limit."""
+    global config
+    console.print("\n[bold yellow]--- Scan Engine Configuration ---[/bold yellow]")
+    console.print(f"Current engine: [cyan]{config['scan_engine']}[/cyan] (asyncio in-flight limit: [cyan]{config['async_max_in_flight']}[/cyan], processes: [cyan]{config['scan_processes']}[/cyan])")
+    console.print("1_threads (ThreadPoolExecutor, uses Max Workers)")
+    console.print("2_asyncio (non-blocking, thousands of probes on one core)")
+    while True:
+        engine_choice = console.input("[bold yellow]Select engine (1/2, or empty to keep current):[/bold yellow] ").strip()
+        if not engine_choice:
+            break
+        if engine_choice in ["1", "2"]:
+            config['scan_engine'] = "threads" if engine_choice == "1" else "asyncio"
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 1 or 2.[/bold red]")
+
+    while True:
+        new_processes = console.input(f"[bold yellow]Worker processes: {config['scan_processes']} (1 = single process, this machine has {os.cpu_count()} cores). Enter new value (or empty to keep current):[/bold yellow] ").strip()
+        if not new_processes:
+            break
+        try:
+            new_processes = int(new_processes)
+        except ValueError:
+            console.print("❌ [bold red]Invalid input! Please enter an integer.[/bold red]")
+            continue
+        if new_processes <= 0:
+            console.print("❌ [bold red]The number of processes must be a positive integer.[/bold red]")
+            continue
+        config['scan_processes'] = new_processes
+        break
+
+    if config['scan_engine'] == "asyncio":
+        while True:
+            new_limit = console.input(f"[bold yellow]Asyncio in-flight limit: {config['async_max_in_flight']}. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+            if not new_limit:
+                break
+            try:
+                new_limit = int(new_limit)
+            except ValueError:
+                console.print("❌ [bold red]Invalid input! Please enter an integer.[/bold red]")
+                continue
+            if new_limit <= 0:
+                console.print("❌ [bold red]The in-flight limit must be a positive integer.[/bold red]")
+                continue
+            config['async_max_in_flight'] = new_limit
+            break
+
+    save_config(config)
+    console.print(f"✅ [bold green]Scan engine set to {config['scan_engine']}.[/bold green]")
+    time.sleep(1)
+
+def configure_tcp_prefilter():
+    """Enables or disables the TCP connect prefilter and sets its timeout."""
+    global config
+    console.print("\n[bold yellow]--- TCP Prefilter Configuration ---[/bold yellow]")
+    console.print(f"Current state: [cyan]{'enabled' if config['tcp_prefilter'] else 'disabled'}[/cyan] (timeout: [cyan]{config['tcp_prefilter_timeout']} s[/cyan])")
+    while True:
+        choice = console.input("[bold yellow]Enable TCP prefilter? (y/n, or empty to keep current):[/bold yellow] ").strip().lower()
+        if not choice:
+            break
+        if choice in ["y", "n"]:
+            config['tcp_prefilter'] = choice == "y"
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+
+    if config['tcp_prefilter']:
+        while True:
+            new_timeout = console.input(f"[bold yellow]Connect timeout: {config['tcp_prefilter_timeout']} s. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+            if not new_timeout:
+                break
+            try:
+                new_timeout = float(new_timeout)
+            except ValueError:
+                console.print("❌ [bold red]Invalid input! Please enter a number.[/bold red]")
+                continue
+            if new_timeout <= 0:
+                console.print("❌ [bold red]The timeout must be a positive number.[/bold red]")
+                continue
+            config['tcp_prefilter_timeout'] = new_timeout
+            break
+
+    save_config(config)
+    console.print(f"✅ [bold green]TCP prefilter {'enabled' if config['tcp_prefilter'] else 'disabled'}.[/bold green]")
+    time.sleep(1)
+
+def configure_health_ttl():
+    """Sets how long a checked proxy is skipped by later checks."""
+    global config
+    while True:
+        new_ttl = console.input(f"[bold yellow]Current Health TTL: {config['health_ttl']} s. Enter new value in seconds (0 = always re-test):[/bold yellow] ").strip()
+        if not new_ttl:
+            console.print(f"[bold green]Health TTL remains unchanged: {config['health_ttl']} s[/bold green]")
+            break
+        try:
+            new_ttl = int(new_ttl)
+        except ValueError:
+            console.print("❌ [bold red]Invalid input! Please enter an integer.[/bold red]")
+            continue
+        if new_ttl < 0:
+            console.print("❌ [bold red]Health TTL cannot be negative.[/bold red]")
+            continue
+        config['health_ttl'] = new_ttl
+        save_config(config)
+        console.print(f"✅ [bold green]Health TTL set to {new_ttl} s.[/bold green]")
+        break
+    time.sleep(1)
+
+def configure_soft_check_mode():
+    """Selects how the Soft Check works and which anonymity judge it uses."""
+    global config
+    console.print("\n[bold yellow]--- Soft Check Mode Configuration ---[/bold yellow]")
+    console.print(f"Current mode: [cyan]{config['soft_check_mode']}[/cyan] (judge: [cyan]{config['judge_url']}[/cyan])")
+    console.print("1_separate (example.com check, then a second request to the judge)")
+    console.print("2_judge (one request to the judge gives liveness, ping and anonymity)")
+    while True:
+        mode_choice = console.input("[bold yellow]Select mode (1/2, or empty to keep current):[/bold yellow] ").strip()
+        if not mode_choice:
+            break
+        if mode_choice in ["1", "2"]:
+            config['soft_check_mode'] = "separate" if mode_choice == "1" else "judge"
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 1 or 2.[/bold red]")
+
+    while True:
+        judge_url = console.input("[bold yellow]Judge URL (or empty to keep current):[/bold yellow] ").strip()
+        if not judge_url:
+            break
+        if not (judge_url.startswith("http://") or judge_url.startswith("https://")):
+            console.print("❌ [bold red]Invalid URL! Must start with http:// or https://.[/bold red]")
+            continue
+        config['judge_url'] = judge_url
+        break
+
+    save_config(config)
+    console.print(f"✅ [bold green]Soft check mode set to {config['soft_check_mode']} (judge: {config['judge_url']}).[/bold green]")
+    time.sleep(1)
+
+def configure_streaming_scan():
+    """Enables or disables streaming scans and sets the thread engine's submission window."""
+    global config
+    console.print("\n[bold yellow]--- Streaming Scan Configuration ---[/bold yellow]")
+    console.print(f"Current state: [cyan]{'enabled' if config['streaming_scan'] else 'disabled'}[/cyan] (submission window: [cyan]{config['submission_window']}[/cyan])")
+    console.print("[dim]Sharded (multi-process) and distributed scans still load the whole list to split it up.[/dim]")
+    while True:
+        choice = console.input("[bold yellow]Read the proxy list lazily while testing? (y/n, or empty to keep current):[/bold yellow] ").strip().lower()
+        if not choice:
+            break
+        if choice in ["y", "n"]:
+            config['streaming_scan'] = choice == "y"
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+
+    while True:
+        new_window = console.input(f"[bold yellow]Submission window: {config['submission_window']}. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+        if not new_window:
+            break
+        try:
+            new_window = int(new_window)
+        except ValueError:
+            console.print("❌ [bold red]Invalid input! Please enter an integer.[/bold red]")
+            continue
+        if new_window <= 0:
+            console.print("❌ [bold red]The submission window must be a positive integer.[/bold red]")
+            continue
+        config['submission_window'] = new_window
+        break
+
+    save_config(config)
+    console.print(f"✅ [bold green]Streaming scan {'enabled' if config['streaming_scan'] else 'disabled'}.[/bold green]")
+    time.sleep(1)
+
+def configure_protocol_probing():
+    """Enables or disables host-level protocol probing and sets its handshake timeout."""
+    global config
+    console.print("\n[bold yellow]--- Protocol Probing Configuration ---[/bold yellow]")
+    console.print(f"Current state: [cyan]{'enabled' if config['protocol_probing'] else 'disabled'}[/cyan] (timeout: [cyan]{config['protocol_probe_timeout']} s[/cyan])")
+    console.print("Groups entries by ip:port and runs full tests only for protocols the host answers in (not used by streaming scans).")
+    while True:
+        choice = console.input("[bold yellow]Enable protocol probing? (y/n, or empty to keep current):[/bold yellow] ").strip().lower()
+        if not choice:
+            break
+        if choice in ["y", "n"]:
+            config['protocol_probing'] = choice == "y"
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+
+    if config['protocol_probing']:
+        while True:
+            new_timeout = console.input(f"[bold yellow]Handshake timeout: {config['protocol_probe_timeout']} s. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+            if not new_timeout:
+                break
+            try:
+                new_timeout = float(new_timeout)
+            except ValueError:
+                console.print("❌ [bold red]Invalid input! Please enter a number.[/bold red]")
+                continue
+            if new_timeout <= 0:
+                console.print("❌ [bold red]The timeout must be a positive number.[/bold red]")
+                continue
+            config['protocol_probe_timeout'] = new_timeout
+            break
+
+    save_config(config)
+    console.print(f"✅ [bold green]Protocol probing {'enabled' if config['protocol_probing'] else 'disabled'}.[/bold green]")
+    time.sleep(1)
+
+def configure_proxy_sources():
+    """Sets the list of proxy sources fetched by the update option."""
+    global config
+    console.print("\n[bold yellow]--- Proxy Sources Configuration ---[/bold yellow]")
+    for i, source_url in enumerate(config['proxy_sources'], start=1):
+        console.print(f"  {i}. [cyan]{source_url}[/cyan]")
+    console.print("Enter one source URL per line (protocol://ip:port per line in the response). Empty line to finish.")
+
+    new_sources = []
+    while True:
+        source_url = console.input(f"[bold yellow]Source URL {len(new_sources) + 1} (or empty to finish):[/bold yellow] ").strip()
+        if not source_url:
+            break
+        if not (source_url.startswith("http://") or source_url.startswith("https://")):
+            console.print("❌ [bold red]Invalid URL! Must start with http:// or https://.[/bold red]")
+            continue
+        new_sources.append(source_url)
+
+    if new_sources:
+        config['proxy_sources'] = new_sources
+        save_config(config)
+        console.print(f"✅ [bold green]{len(new_sources)} proxy source(s) configured.[/bold green]")
+    else:
+        console.print("[bold yellow]Proxy sources remain unchanged.[/bold yellow]")
+    time.sleep(1)
+
+def configure_scan_scope():
+    """Chooses between testing the whole proxy list and only the new entries not yet scanned."""
+    global config
+    console.print("\n[bold yellow]--- Scan Scope Configuration ---[/bold yellow]")
+    console.print(f"Current scope: [cyan]{'new entries only' if config['scan_new_only'] else 'full list'}[/cyan]")
+    console.print("1_full list")
+    console.print(f"2_new entries only (from [cyan]{config['delta_file']}[/cyan]; known-good unchanged proxies are carried forward)")
+    while True:
+        scope_choice = console.input("[bold yellow]Select scope (1/2, or empty to keep current):[/bold yellow] ").strip()
+        if not scope_choice:
+            break
+        if scope_choice in ["1", "2"]:
+            config['scan_new_only'] = scope_choice == "2"
+            save_config(config)
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 1 or 2.[/bold red]")
+    console.print(f"✅ [bold green]Scan scope: {'new entries only' if config['scan_new_only'] else 'full list'}.[/bold green]")
+    time.sleep(1)
+
+def configure_adaptive_concurrency():
+    """Enables or disables the AIMD concurrency controller and sets its bounds."""
+    global config
+    console.print("\n[bold yellow]--- Adaptive Concurrency Configuration ---[/bold yellow]")
+    console.print(f"Current state: [cyan]{'enabled' if config['adaptive_concurrency'] else 'disabled'}[/cyan] (minimum: [cyan]{config['adaptive_min_concurrency']}[/cyan], thread cap: [cyan]{config['adaptive_max_workers']}[/cyan])")
+    console.print("[dim]Starts at Max Workers and adjusts to completion throughput, timeouts and local socket errors. The asyncio engine is capped by its in-flight limit.[/dim]")
+    while True:
+        choice = console.input("[bold yellow]Enable adaptive concurrency? (y/n, or empty to keep current):[/bold yellow] ").strip().lower()
+        if not choice:
+            break
+        if choice in ["y", "n"]:
+            config['adaptive_concurrency'] = choice == "y"
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+
+    for key, label in [('adaptive_min_concurrency', "Minimum concurrency"), ('adaptive_max_workers', "Thread cap")]:
+        while True:
+            new_value = console.input(f"[bold yellow]{label}: {config[key]}. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+            if not new_value:
+                break
+            try:
+                new_value = int(new_value)
+            except ValueError:
+                console.print("❌ [bold red]Invalid input! Please enter an integer.[/bold red]")
+                continue
+            if new_value <= 0:
+                console.print(f"❌ [bold red]{label} must be a positive integer.[/bold red]")
+                continue
+            config[key] = new_value
+            break
+
+    save_config(config)
+    console.print(f"✅ [bold green]Adaptive concurrency {'enabled' if config['adaptive_concurrency'] else 'disabled'}.[/bold green]")
+    time.sleep(1)
+
+def configure_timeouts():
+    """Sets the connect/read timeout budgets and the latency-adaptive cutoff."""
+    global config
+    console.print("\n[bold yellow]--- Timeout Configuration ---[/bold yellow]")
+    console.print(f"Current budgets: [cyan]{config['connect_timeout']} s[/cyan] connect, [cyan]{config['read_timeout']} s[/cyan] read, [cyan]{config['speed_test_read_timeout']} s[/cyan] speed test read")
+    console.print(f"Adaptive cutoff: [cyan]{'enabled' if config['adaptive_timeouts'] else 'disabled'}[/cyan] ([cyan]{config['adaptive_timeout_multiplier']}[/cyan] x median latency, at least [cyan]{config['min_timeout']} s[/cyan], after [cyan]{config['adaptive_timeout_min_samples']}[/cyan] passing proxies)")
+    for key, label in [('connect_timeout', "Connect timeout"), ('read_timeout', "Read timeout"), ('speed_test_read_timeout', "Speed test read timeout")]:
+        while True:
+            new_timeout = console.input(f"[bold yellow]{label}: {config[key]} s. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+            if not new_timeout:
+                break
+            try:
+                new_timeout = float(new_timeout)
+            except ValueError:
+                console.print("❌ [bold red]Invalid input! Please enter a number.[/bold red]")
+                continue
+            if new_timeout <= 0:
+                console.print("❌ [bold red]The timeout must be a positive number.[/bold red]")
+                continue
+            config[key] = new_timeout
+            break
+
+    while True:
+        choice = console.input("[bold yellow]Tighten timeouts from the latency of passing proxies? (y/n, or empty to keep current):[/bold yellow] ").strip().lower()
+        if not choice:
+            break
+        if choice in ["y", "n"]:
+            config['adaptive_timeouts'] = choice == "y"
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+
+    if config['adaptive_timeouts']:
+        while True:
+            new_multiplier = console.input(f"[bold yellow]Median latency multiplier: {config['adaptive_timeout_multiplier']}. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+            if not new_multiplier:
+                break
+            try:
+                new_multiplier = float(new_multiplier)
+            except ValueError:
+                console.print("❌ [bold red]Invalid input! Please enter a number.[/bold red]")
+                continue
+            if new_multiplier < 1:
+                console.print("❌ [bold red]The multiplier must be at least 1.[/bold red]")
+                continue
+            config['adaptive_timeout_multiplier'] = new_multiplier
+            break
+
+    save_config(config)
+    console.print(f"✅ [bold green]Timeouts set to {config['connect_timeout']} s connect / {config['read_timeout']} s read{' (adaptive)' if config['adaptive_timeouts'] else ''}.[/bold green]")
+    time.sleep(1)
+
+def _describe_scan_goal():
+    """Returns a one-line summary of the configured scan goal."""
+    if not config['target_count'] and not config['scan_time_budget']:
+        return "whole list"
+    parts = []
+    if config['target_count']:
+        criteria = []
+        if config['target_max_ping']:
+            criteria.append(f"ping <= {config['target_max_ping']} ms")
+        if config['target_min_anonymity']:
+            criteria.append(f"anonymity >= {config['target_min_anonymity']}")
+        parts.append(f"first {config['target_count']} working" + (f" ({', '.join(criteria)})" if criteria else ""))
+    if config['scan_time_budget']:
+        parts.append(f"at most {config['scan_time_budget']} s")
+    return ", ".join(parts)
+
+def configure_scan_goal():
+    """Sets the goal-driven stop condition: K qualifying proxies and/or a time budget."""
+    global config
+    console.print("\n[bold yellow]--- Scan Goal Configuration ---[/bold yellow]")
+    console.print(f"Current goal: [cyan]{_describe_scan_goal()}[/cyan]")
+    console.print("[dim]Enter 0 to disable a limit. The scan stops as soon as the target count is reached or the budget runs out.[/dim]")
+    prompts = [
+        ('target_count', "Target number of working proxies", int),
+        ('target_max_ping', "Maximum ping (ms)", float),
+        ('target_min_anonymity', "Minimum anonymity (0/5/10)", int),
+        ('scan_time_budget', "Time budget (s)", float),
+    ]
+    for key, label, value_type in prompts:
+        while True:
+            new_value = console.input(f"[bold yellow]{label}: {config[key]}. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+            if not new_value:
+                break
+            try:
+                new_value = value_type(new_value)
+            except ValueError:
+                console.print("❌ [bold red]Invalid input! Please enter a number.[/bold red]")
+                continue
+            if new_value < 0:
+                console.print("❌ [bold red]The value cannot be negative.[/bold red]")
+                continue
+            config[key] = new_value
+            break
+
+    save_config(config)
+    console.print(f"✅ [bold green]Scan goal: {_describe_scan_goal()}.[/bold green]")
+    time.sleep(1)
+
+def configure_scan_order():
+    """Chooses between file order and the prioritized (predicted best first) scan order."""
+    global config
+    console.print("\n[bold yellow]--- Scan Order Configuration ---[/bold yellow]")
+    console.print(f"Current order: [cyan]{'prioritized' if config['prioritized_scan'] else 'file order'}[/cyan]")
+    console.print("[dim]Prioritized scans test proxies with a good history first and push back subnets whose neighbours keep failing. List mode only.[/dim]")
+    while True:
+        choice = console.input("[bold yellow]Test likely-good proxies first? (y/n, or empty to keep current):[/bold yellow] ").strip().lower()
+        if not choice:
+            break
+        if choice in ["y", "n"]:
+            config['prioritized_scan'] = choice == "y"
+            save_config(config)
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+    console.print(f"✅ [bold green]Scan order: {'prioritized' if config['prioritized_scan'] else 'file order'}.[/bold green]")
+    time.sleep(1)
+
+def configure_export():
+    """Sets the export directory, the exported formats and the terminal table size."""
+    global config
+    console.print("\n[bold yellow]--- Result Export Configuration ---[/bold yellow]")
+    console.print(f"Current formats: [cyan]{', '.join(config['export_formats']) or 'none'}[/cyan] in [cyan]{config['export_dir']}[/cyan] (table rows: [cyan]{config['table_max_rows'] or 'all'}[/cyan])")
+    while True:
+        new_formats = console.input("[bold yellow]Formats, comma-separated from jsonl, csv, txt ('none' to disable, or empty to keep current):[/bold yellow] ").strip().lower()
+        if not new_formats:
+            break
+        if new_formats == "none":
+            config['export_formats'] = []
+            break
+        formats = [fmt.strip() for fmt in new_formats.split(",") if fmt.strip()]
+        if all(fmt in ("jsonl", "csv", "txt") for fmt in formats):
+            config['export_formats'] = list(dict.fromkeys(formats))
+            break
+        console.print("⚠️ [bold red]Invalid input! Use jsonl, csv and/or txt.[/bold red]")
+
+    new_dir = console.input(f"[bold yellow]Export directory: {config['export_dir']}. Enter new path (or empty to keep current):[/bold yellow] ").strip()
+    if new_dir:
+        config['export_dir'] = new_dir
+
+    while True:
+        new_rows = console.input(f"[bold yellow]Table rows: {config['table_max_rows']} (0 = all). Enter new value (or empty to keep current):[/bold yellow] ").strip()
+        if not new_rows:
+            break
+        try:
+            new_rows = int(new_rows)
+        except ValueError:
+            console.print("❌ [bold red]Invalid input! Please enter an integer.[/bold red]")
+            continue
+        if new_rows < 0:
+            console.print("❌ [bold red]The value cannot be negative.[/bold red]")
+            continue
+        config['table_max_rows'] = new_rows
+        break
+
+    while True:
+        new_rank = console.input(f"[bold yellow]Rank proxies by: {config['rank_by']} (ping, {', '.join(PHASES)}). Enter new value (or empty to keep current):[/bold yellow] ").strip().lower()
+        if not new_rank:
+            break
+        if new_rank == "ping" or new_rank in PHASES:
+            config['rank_by'] = new_rank
+            break
+        console.print(f"⚠️ [bold red]Invalid input! Use ping or one of {', '.join(PHASES)}.[/bold red]")
+
+    save_config(config)
+    console.print(f"✅ [bold green]Export: {', '.join(config['export_formats']) or 'disabled'}.[/bold green]")
+    time.sleep(1)
+
+def configure_distributed_scan():
+    """Enables or disables coordinator mode and sets its address, token and batching."""
+    global config
+    console.print("\n[bold yellow]--- Distributed Scan Configuration ---[/bold yellow]")
+    console.print(f"Current state: [cyan]{'enabled' if config['distributed_scan'] else 'disabled'}[/cyan] (listening on [cyan]{config['coordinator_host']}:{config['coordinator_port']}[/cyan], batch size: [cyan]{config['distributed_batch_size']}[/cyan], lease timeout: [cyan]{config['lease_timeout']} s[/cyan])")
+    console.print("[dim]When enabled, checks are handed out to workers started with 'Ver4.py worker --coordinator URL' (or menu option 6).[/dim]")
+    console.print("[dim]Listening on anything but loopback requires a shared token.[/dim]")
+    while True:
+        choice = console.input("[bold yellow]Act as coordinator for checks? (y/n, or empty to keep current):[/bold yellow] ").strip().lower()
+        if not choice:
+            break
+        if choice in ["y", "n"]:
+            config['distributed_scan'] = choice == "y"
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+
+    new_host = console.input(f"[bold yellow]Listen address: {config['coordinator_host']} (0.0.0.0 for all interfaces). Enter new value (or empty to keep current):[/bold yellow] ").strip()
+    if new_host:
+        config['coordinator_host'] = new_host
+
+    for key, label in [('coordinator_port', "Coordinator port"), ('distributed_batch_size', "Batch size"), ('lease_timeout', "Lease timeout (s)")]:
+        while True:
+            new_value = console.input(f"[bold yellow]{label}: {config[key]}. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+            if not new_value:
+                break
+            try:
+                new_value = int(new_value)
+            except ValueError:
+                console.print("❌ [bold red]Invalid input! Please enter an integer.[/bold red]")
+                continue
+            if new_value <= 0:
+                console.print(f"❌ [bold red]{label} must be a positive integer.[/bold red]")
+                continue
+            if key == 'coordinator_port' and new_value > 65535:
+                console.print("❌ [bold red]Port must be between 1 and 65535.[/bold red]")
+                continue
+            config[key] = new_value
+            break
+
+    new_token = console.input("[bold yellow]Shared token ('none' to clear, or empty to keep current):[/bold yellow] ").strip()
+    if new_token:
+        config['coordinator_token'] = "" if new_token.lower() == "none" else new_token
+
+    save_config(config)
+    console.print(f"✅ [bold green]Distributed scan {'enabled' if config['distributed_scan'] else 'disabled'}.[/bold green]")
+    time.sleep(1)
+
+def configure_metrics():
+    """Enables or disables the Prometheus metrics endpoint and sets its address."""
+    global config
+    console.print("\n[bold yellow]--- Metrics Endpoint Configuration ---[/bold yellow]")
+    console.print(f"Current state: [cyan]{'enabled' if config['metrics_enabled'] else 'disabled'}[/cyan] (http://{config['metrics_host']}:{config['metrics_port']}/metrics)")
+    console.print("[dim]The endpoint starts with the next scan, speed test or worker and stays up until the program exits.[/dim]")
+    while True:
+        choice = console.input("[bold yellow]Serve live scan metrics? (y/n, or empty to keep current):[/bold yellow] ").strip().lower()
+        if not choice:
+            break
+        if choice in ["y", "n"]:
+            config['metrics_enabled'] = choice == "y"
+            break
+        console.print("⚠️ [bold red]Invalid input! Please enter 'y' or 'n'.[/bold red]")
+
+    new_host = console.input(f"[bold yellow]Listen address: {config['metrics_host']}. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+    if new_host:
+        config['metrics_host'] = new_host
+
+    while True:
+        new_port = console.input(f"[bold yellow]Port: {config['metrics_port']}. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+        if not new_port:
+            break
+        try:
+            new_port = int(new_port)
+        except ValueError:
+            console.print("❌ [bold red]Invalid input! Please enter an integer.[/bold red]")
+            continue
+        if not 0 < new_port < 65536:
+            console.print("❌ [bold red]Port must be between 1 and 65535.[/bold red]")
+            continue
+        config['metrics_port'] = new_port
+        break
+
+    save_config(config)
+    console.print(f"✅ [bold green]Metrics endpoint {'enabled' if config['metrics_enabled'] else 'disabled'}.[/bold green]")
+    time.sleep(1)
+
+def configure_revalidation():
+    """Sets the re-check interval, failure backoff and source refresh of the re-validation daemon."""
+    global config
+    console.print("\n[bold yellow]--- Re-Validation Daemon Configuration ---[/bold yellow]")
+    console.print(f"Current schedule: passing proxies every [cyan]{config['revalidate_interval']} s[/cyan] (x2 above [cyan]{config['revalidate_fast_ping']} ms[/cyan]), failing ones backed off up to [cyan]{config['revalidate_max_backoff']} s[/cyan], sources refreshed every [cyan]{config['revalidate_refresh_interval'] or 'never'}[/cyan]")
+    settings = [
+        ('revalidate_interval', "Re-check interval for passing proxies (s)", 1),
+        ('revalidate_fast_ping', "Ping above which the interval doubles (ms)", 1),
+        ('revalidate_max_backoff', "Longest backoff for failing proxies (s)", 1),
+        ('revalidate_refresh_interval', "Source refresh interval (s, 0 = never)", 0),
+        ('revalidate_publish_interval', "Live set publish interval (s)", 1),
+    ]
+    for key, label, minimum in settings:
+        while True:
+            new_value = console.input(f"[bold yellow]{label}: {config[key]}. Enter new value (or empty to keep current):[/bold yellow] ").strip()
+            if not new_value:
+                break
+            try:
+                new_value = int(new_value)
+            except ValueError:
+                console.print("❌ [bold red]Invalid input! Please enter an integer.[/bold red]")
+                continue
+            if new_value < minimum:
+                console.print(f"❌ [bold red]The value must be at least {minimum}.[/bold red]")
+                continue
+            config[key] = new_value
+            break
+
+    save_config(config)
+    console.print(f"✅ [bold green]Re-validation: every {config['revalidate_interval']} s, backoff up to {config['revalidate_max_backoff']} s.[/bold green]")
+    time.sleep(1)
+
 def settings_menu():
     """Settings menu."""
     while True:
@@ -492,7 +3785,23 @@ def settings_menu():
         settings_table.add_column("Option", justify="left", style="white")
         settings_table.add_row("1_Configure Max Workers")
         settings_table.add_row("2_Configure Hard Check Sites")
-        settings_table.add_row("3_Return to Main Menu")
+        settings_table.add_row("3_Configure Scan Engine")
+        settings_table.add_row("4_Configure TCP Prefilter")
+        settings_table.add_row("5_Configure Health TTL")
+        settings_table.add_row("6_Configure Soft Check Mode")
+        settings_table.add_row("7_Configure Streaming Scan")
+        settings_table.add_row("8_Configure Protocol Probing")
+        settings_table.add_row("9_Configure Proxy Sources")
+        settings_table.add_row("10_Configure Scan Scope")
+        settings_table.add_row("11_Configure Adaptive Concurrency")
+        settings_table.add_row("12_Configure Timeouts")
+        settings_table.add_row("13_Configure Scan Goal")
+        settings_table.add_row("14_Configure Scan Order")
+        settings_table.add_row("15_Configure Result Export")
+        settings_table.add_row("16_Configure Distributed Scan")
+        settings_table.add_row("17_Configure Metrics Endpoint")
+        settings_table.add_row("18_Configure Re-Validation Daemon")
+        settings_table.add_row("19_Return to Main Menu")
         console.print(settings_table, justify="center")
 
         cmd_input = console.input("\n[bold yellow]Enter the option number:[/bold yellow] ").strip()
@@ -504,13 +3813,253 @@ def settings_menu():
             configure_hard_check_sites()
             console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
         elif cmd_input == "3":
+            configure_scan_engine()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "4":
+            configure_tcp_prefilter()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "5":
+            configure_health_ttl()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "6":
+            configure_soft_check_mode()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "7":
+            configure_streaming_scan()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "8":
+            configure_protocol_probing()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "9":
+            configure_proxy_sources()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "10":
+            configure_scan_scope()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "11":
+            configure_adaptive_concurrency()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "12":
+            configure_timeouts()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "13":
+            configure_scan_goal()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "14":
+            configure_scan_order()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "15":
+            configure_export()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "16":
+            configure_distributed_scan()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "17":
+            configure_metrics()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "18":
+            configure_revalidation()
+            console.input("[bold green]✅ Settings complete. Press Enter to continue...[/bold green]")
+        elif cmd_input == "19":
             break
         else:
-            console.print("⚠️ [bold red]Invalid input![/bold red] Please enter a number from 1 to 3.")
+            console.print("⚠️ [bold red]Invalid input![/bold red] Please enter a number from 1 to 19.")
             time.sleep(2)
 
 
+# --- Command-Line Interface ---
+def _positive_int(value):
+    """Argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+def _non_negative_int(value):
+    """Argparse type for intervals where 0 switches the feature off."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {number}")
+    return number
+
+def _positive_float(value):
+    """Argparse type for durations that must be greater than 0."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid float value: '{value}'")
+    if not number > 0: # Also rejects nan
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+def _port_number(value):
+    """Argparse type for TCP ports."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if not 0 < number < 65536:
+        raise argparse.ArgumentTypeError(f"must be between 1 and 65535, got {number}")
+    return number
+
+def build_arg_parser():
+    """Builds the parser for the headless subcommands (no subcommand starts the menu)."""
+    parser = argparse.ArgumentParser(description="Proxy Checker Tool. Run without a command for the interactive menu.")
+    parser.add_argument("--resume", action="store_true", help="continue an unfinished scan from its checkpoint without asking")
+    parser.add_argument("--proxy-file", help=f"proxy list to update and check (default: {proxy_file})")
+    subparsers = parser.add_subparsers(dest="command")
+
+    update_parser = subparsers.add_parser("update", help="fetch the proxy sources into the proxy file")
+    update_parser.add_argument("--source", action="append", dest="sources", metavar="URL", help="proxy source URL (repeatable, replaces the configured sources)")
+
+    scan_options = argparse.ArgumentParser(add_help=False)
+    scan_options.add_argument("--workers", type=_positive_int, help="maximum number of concurrent tests")
+    scan_options.add_argument("--connect-timeout", type=_positive_float, help="seconds allowed to connect to a proxy")
+    scan_options.add_argument("--read-timeout", type=_positive_float, help="seconds allowed to wait for data through a proxy")
+    scan_options.add_argument("--metrics-port", type=_port_number, metavar="PORT", help="serve Prometheus metrics on this port while running")
+
+    check_parser = subparsers.add_parser("check", parents=[scan_options], help="test the proxy file")
+    mode = check_parser.add_mutually_exclusive_group()
+    mode.add_argument("--soft", dest="mode", action="store_const", const="soft", help="soft check (default)")
+    mode.add_argument("--hard", dest="mode", action="store_const", const="hard", help="hard check against the hard check sites")
+    mode.add_argument("--judge", dest="mode", action="store_const", const="judge", help="soft check with a single judge request")
+    check_parser.add_argument("--site", action="append", dest="sites", metavar="URL", help="hard check site (repeatable, replaces the configured sites)")
+    check_parser.add_argument("--engine", choices=["threads", "asyncio"], help="scan engine")
+    check_parser.add_argument("--processes", type=_positive_int, help="worker processes, each scanning a shard of the list")
+    check_parser.add_argument("--streaming", action="store_true", help="read the proxy list lazily while testing (duplicates are not dropped; sharded and distributed scans still load the whole list)")
+    check_parser.add_argument("--new-only", action="store_true", help="test only the entries added since the last --new-only scan")
+    check_parser.add_argument("--target", type=_positive_int, metavar="K", help="stop after K working proxies")
+    check_parser.add_argument("--time-budget", type=_positive_float, metavar="SECONDS", help="stop after this many seconds")
+    check_parser.add_argument("--output-dir", help="directory for the exported results")
+    check_parser.add_argument("--formats", help="comma-separated export formats (jsonl, csv, txt)")
+    check_parser.add_argument("--rank-by", choices=("ping",) + PHASES, help="order the results by ping or by one probe phase")
+    check_parser.add_argument("--speedtest", action="store_true", help="run a speed test on the working proxies afterwards")
+    check_parser.add_argument("--distributed", action="store_true", help="act as coordinator and let remote workers run the tests")
+    check_parser.add_argument("--host", help="coordinator listen address for --distributed (non-loopback requires --token)")
+    check_parser.add_argument("--port", type=_port_number, help="coordinator port for --distributed")
+    check_parser.add_argument("--token", help="shared secret workers must send with --distributed")
+
+    speed_parser = subparsers.add_parser("speedtest", parents=[scan_options], help="speed test a list of proxies")
+    speed_parser.add_argument("--input", required=True, help="file with one proto://ip:port per line (e.g. an exported .txt list)")
+
+    worker_parser = subparsers.add_parser("worker", parents=[scan_options], help="test batches handed out by a remote coordinator")
+    worker_parser.add_argument("--coordinator", required=True, metavar="URL", help="coordinator address, e.g. http://10.0.0.5:8898")
+    worker_parser.add_argument("--id", dest="worker_id", help="worker name reported to the coordinator (default: host-pid)")
+    worker_parser.add_argument("--engine", choices=["threads", "asyncio"], help="scan engine")
+    worker_parser.add_argument("--token", help="shared secret expected by the coordinator")
+
+    daemon_parser = subparsers.add_parser("daemon", parents=[scan_options], help="keep re-validating the proxy file and publish the live set until Ctrl+C")
+    daemon_mode = daemon_parser.add_mutually_exclusive_group()
+    daemon_mode.add_argument("--soft", dest="mode", action="store_const", const="soft", help="soft check (default)")
+    daemon_mode.add_argument("--hard", dest="mode", action="store_const", const="hard", help="hard check against the hard check sites")
+    daemon_mode.add_argument("--judge", dest="mode", action="store_const", const="judge", help="soft check with a single judge request")
+    daemon_parser.add_argument("--interval", type=_positive_int, metavar="SECONDS", help="re-check interval for passing proxies")
+    daemon_parser.add_argument("--refresh", type=_non_negative_int, metavar="SECONDS", help="proxy source refresh interval (0 = never)")
+    daemon_parser.add_argument("--output-dir", help="directory for the published live set")
+    daemon_parser.add_argument("--formats", help="comma-separated export formats (jsonl, csv, txt)")
+
+    subparsers.add_parser("judge", help="run the built-in anonymity judge server until Ctrl+C")
+    return parser
+
+def _apply_cli_overrides(args):
+    """Applies command-line flags to the in-memory configuration (config.json is not changed)."""
+    overrides = {
+        'max_workers': getattr(args, "workers", None),
+        'connect_timeout': getattr(args, "connect_timeout", None),
+        'read_timeout': getattr(args, "read_timeout", None),
+        'proxy_sources': getattr(args, "sources", None),
+        'hard_check_sites': getattr(args, "sites", None),
+        'scan_engine': getattr(args, "engine", None),
+        'scan_processes': getattr(args, "processes", None),
+        'target_count': getattr(args, "target", None),
+        'scan_time_budget': getattr(args, "time_budget", None),
+        'export_dir': getattr(args, "output_dir", None),
+        'rank_by': getattr(args, "rank_by", None),
+        'coordinator_host': getattr(args, "host", None),
+        'coordinator_port': getattr(args, "port", None),
+        'coordinator_token': getattr(args, "token", None),
+        'metrics_port': getattr(args, "metrics_port", None),
+        'revalidate_interval': getattr(args, "interval", None),
+        'revalidate_refresh_interval': getattr(args, "refresh", None),
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            config[key] = value
+    if getattr(args, "metrics_port", None) is not None:
+        config['metrics_enabled'] = True
+    if getattr(args, "formats", None) is not None:
+        config['export_formats'] = [fmt.strip() for fmt in args.formats.split(",") if fmt.strip()]
+    if getattr(args, "streaming", False):
+        config['streaming_scan'] = True
+    if getattr(args, "new_only", False):
+        config['scan_new_only'] = True
+    if getattr(args, "distributed", False):
+        config['distributed_scan'] = True
+
+def run_cli(args):
+    """Runs one headless subcommand without prompts or screen clears. Returns the exit code."""
+    global proxy_file, interactive, resume_scan
+    interactive = False
+    resume_scan = args.resume
+    if args.proxy_file:
+        proxy_file = args.proxy_file
+    _apply_cli_overrides(args)
+
+    if args.command == "update":
+        return 0 if fetch_proxies() else 1
+    if args.command == "check":
+        mode = args.mode or "soft"
+        if mode == "hard":
+            working = check_proxies_with_method(test_proxy_hard, "Testing Proxies (Hard Check)...", "Real Connection Successful!", custom_sites=config['hard_check_sites'])
+        else:
+            use_judge = mode == "judge" or config['soft_check_mode'] == "judge"
+            working = check_proxies_with_method(test_proxy_judge if use_judge else test_proxy_soft, "Testing Proxies (Soft Check)...", "Connection Successful!")
+        if working is None:
+            return 2 # No proxy list to check
+        if args.speedtest and working:
+            perform_speed_test([(p[0], p[1]) for p in working])
+        return 0 if working else 1
+    if args.command == "speedtest":
+        try:
+            with open(args.input, "r", encoding="utf-8") as f:
+                proxies = [(line.strip(), None) for line in f if ProxyRecord.parse(line) is not None]
+        except OSError as e:
+            console.print(f"❌ [bold red]Could not read {args.input}: {e}[/bold red]")
+            return 2
+        results = perform_speed_test(proxies)
+        return 0 if results else 1
+    if args.command == "worker":
+        run_worker(args.coordinator, args.worker_id)
+        return 0
+    if args.command == "daemon":
+        mode = args.mode or "soft"
+        if mode == "hard":
+            run_revalidation_daemon(test_proxy_hard, custom_sites=config['hard_check_sites'])
+        else:
+            use_judge = mode == "judge" or config['soft_check_mode'] == "judge"
+            run_revalidation_daemon(test_proxy_judge if use_judge else test_proxy_soft)
+        return 0 if os.path.exists(proxy_file) else 2
+    if args.command == "judge":
+        run_judge_server()
+        return 0
+    return 2
+
+
 if __name__ == "__main__":
+    args = build_arg_parser().parse_args()
+    if args.command:
+        load_config()
+        sys.exit(run_cli(args))
+    resume_scan = args.resume
+    if args.proxy_file:
+        proxy_file = args.proxy_file
+
     console.print("[bold blue]--- Proxy Checker Tool ---[/bold blue]")
     os.system('cls' if os.name == 'nt' else 'clear') 
     
@@ -524,9 +4073,29 @@ if __name__ == "__main__":
         menu_table.add_row("2_check (Soft)") 
         menu_table.add_row("3_check (Hard)") 
         menu_table.add_row("4_settings") 
-        menu_table.add_row("5_exit")     
+        menu_table.add_row("5_judge server")
+        menu_table.add_row("6_distributed worker")
+        menu_table.add_row("7_re-validation daemon")
+        menu_table.add_row("8_exit")     
         # Changed style to "dim white" for smaller text
         menu_table.add_row(Text(f"Max Workers: {config['max_workers']}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Proxy Sources: {len(config['proxy_sources'])}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Scan Engine: {config['scan_engine']}" + (f" x {config['scan_processes']} processes" if config['scan_processes'] > 1 else ""), style="dim white", justify="center"))
+        if config['distributed_scan']:
+            menu_table.add_row(Text(f"Distributed: coordinator on port {config['coordinator_port']}", style="dim white", justify="center"))
+        if config['metrics_enabled']:
+            menu_table.add_row(Text(f"Metrics: http://{config['metrics_host']}:{config['metrics_port']}/metrics", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"TCP Prefilter: {'on' if config['tcp_prefilter'] else 'off'}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Health TTL: {config['health_ttl']} s", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Soft Check Mode: {config['soft_check_mode']}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Streaming Scan: {'on' if config['streaming_scan'] else 'off'}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Scan Scope: {'new entries only' if config['scan_new_only'] else 'full list'}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Timeouts: {config['connect_timeout']} s connect / {config['read_timeout']} s read{' (adaptive)' if config['adaptive_timeouts'] else ''}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Adaptive Concurrency: {'on' if config['adaptive_concurrency'] else 'off'}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Scan Order: {'prioritized' if config['prioritized_scan'] else 'file order'}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Scan Goal: {_describe_scan_goal()}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Protocol Probing: {'on' if config['protocol_probing'] else 'off'}", style="dim white", justify="center"))
+        menu_table.add_row(Text(f"Export: {', '.join(config['export_formats']) or 'off'} ({config['export_dir']})", style="dim white", justify="center"))
         menu_table.add_row(Text(f"Hard Check Sites: {', '.join(config['hard_check_sites'])}", style="dim white", justify="center"))
         menu_table.add_row(Text("version 4", style="dim white", justify="center")) 
         
@@ -539,7 +4108,7 @@ if __name__ == "__main__":
             console.input("[bold green]✅ Update complete. Press Enter to continue...[/bold green]")
         elif cmd_input == "2": 
             check_proxies_with_method(
-                test_proxy_soft, 
+                test_proxy_judge if config['soft_check_mode'] == "judge" else test_proxy_soft, 
                 "Testing Proxies (Soft Check)...", 
                 "Connection Successful!"
             )
@@ -555,8 +4124,30 @@ if __name__ == "__main__":
         elif cmd_input == "4": 
             settings_menu()
         elif cmd_input == "5": 
+            run_judge_server()
+            console.input("[bold green]✅ Press Enter to continue...[/bold green]")
+        elif cmd_input == "6": 
+            coordinator_url = console.input("[bold yellow]Coordinator URL (e.g. http://10.0.0.5:8898):[/bold yellow] ").strip()
+            if coordinator_url:
+                try:
+                    run_worker(coordinator_url)
+                except KeyboardInterrupt:
+                    console.print("\n[bold yellow]Worker stopped. Its batch will be re-queued by the coordinator.[/bold yellow]")
+            console.input("[bold green]✅ Press Enter to continue...[/bold green]")
+        elif cmd_input == "7": 
+            while True:
+                daemon_choice = console.input("[bold yellow]Re-validate with the Soft or the Hard Check? (s/h):[/bold yellow] ").strip().lower()
+                if daemon_choice in ["s", "h"]:
+                    break
+                console.print("⚠️ [bold red]Invalid input! Please enter 's' or 'h'.[/bold red]")
+            if daemon_choice == "h":
+                run_revalidation_daemon(test_proxy_hard, custom_sites=config['hard_check_sites'])
+            else:
+                run_revalidation_daemon(test_proxy_judge if config['soft_check_mode'] == "judge" else test_proxy_soft)
+            console.input("[bold green]✅ Press Enter to continue...[/bold green]")
+        elif cmd_input == "8": 
             console.print("[bold red]Goodbye![/bold red]")
             break
         else:
-            console.print("⚠️ [bold red]Invalid input![/bold red] Please enter a number from 1 to 5.")
+            console.print("⚠️ [bold red]Invalid input![/bold red] Please enter a number from 1 to 8.")
             time.sleep(2)
@@ -0,0 +1,282 @@
+import asyncio
+import base64
+import os
+import select
+import shutil
+import socket
+import socketserver
+import ssl
+import struct
+import subprocess
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Ver4
+
+
+def run_check(engine, proxy):
+    """Runs the judge check of one proxy with the thread engine or the asyncio engine."""
+    if engine == "threads":
+        return Ver4.test_proxy_judge(proxy)
+    return asyncio.run(Ver4.async_test_proxy_judge(proxy))
+
+
+def _pipe(source, destination):
+    try:
+        while True:
+            readable, _, _ = select.select([source], [], [], 5)
+            if not readable:
+                break
+            data = source.recv(65536)
+            if not data:
+                break
+            destination.sendall(data)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, destination):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+def _relay(client, upstream):
+    thread = threading.Thread(target=_pipe, args=(upstream, client), daemon=True)
+    thread.start()
+    _pipe(client, upstream)
+    thread.join()
+    upstream.close()
+
+
+def _recv_exact(sock, count):
+    data = b""
+    while len(data) < count:
+        chunk = sock.recv(count - len(data))
+        if not chunk:
+            raise ConnectionError("client closed the connection")
+        data += chunk
+    return data
+
+
+class StandInProxyHandler(socketserver.BaseRequestHandler):
+    """A minimal HTTP (absolute form and CONNECT) and SOCKS5 proxy for local targets."""
+    credentials = None # (username, password) the client must send
+
+    def handle(self):
+        client = self.request
+        first = client.recv(1, socket.MSG_PEEK)
+        if first == b"\x05":
+            self.handle_socks5(client)
+        elif first:
+            self.handle_http(client)
+
+    def handle_http(self, client):
+        head = b""
+        while b"\r\n\r\n" not in head:
+            chunk = client.recv(4096)
+            if not chunk:
+                return
+            head += chunk
+        head, _, rest = head.partition(b"\r\n\r\n")
+        request_line, _, header_block = head.partition(b"\r\n")
+        method, target, version = request_line.decode("latin-1").split(" ")
+        if self.credentials:
+            token = base64.b64encode(":".join(self.credentials).encode("utf-8"))
+            if b"Proxy-Authorization: Basic " + token not in header_block:
+                client.sendall(b"HTTP/1.1 407 Proxy Authentication Required\r\nContent-Length: 0\r\n\r\n")
+                return
+        if method == "CONNECT":
+            host, _, port = target.rpartition(":")
+            upstream = socket.create_connection((host, int(port)))
+            client.sendall(b"HTTP/1.1 200 Connection established\r\n\r\n")
+            if rest:
+                upstream.sendall(rest)
+        else:
+            netloc, _, path = target.split("://", 1)[1].partition("/")
+            host, _, port = netloc.partition(":")
+            upstream = socket.create_connection((host, int(port or 80)))
+            upstream.sendall(f"{method} /{path} {version}\r\n".encode("latin-1") + header_block + b"\r\n\r\n" + rest)
+        _relay(client, upstream)
+
+    def handle_socks5(self, client):
+        _, method_count = _recv_exact(client, 2)
+        methods = _recv_exact(client, method_count)
+        if self.credentials:
+            if 2 not in methods:
+                client.sendall(b"\x05\xff")
+                return
+            client.sendall(b"\x05\x02")
+            _recv_exact(client, 1)
+            username = _recv_exact(client, _recv_exact(client, 1)[0]).decode("utf-8")
+            password = _recv_exact(client, _recv_exact(client, 1)[0]).decode("utf-8")
+            if (username, password) != self.credentials:
+                client.sendall(b"\x01\x01")
+                return
+            client.sendall(b"\x01\x00")
+        else:
+            client.sendall(b"\x05\x00")
+        _, _, _, address_type = _recv_exact(client, 4)
+        if address_type == 1:
+            host = socket.inet_ntoa(_recv_exact(client, 4))
+        elif address_type == 3:
+            host = _recv_exact(client, _recv_exact(client, 1)[0]).decode("idna")
+        else:
+            host = socket.inet_ntop(socket.AF_INET6, _recv_exact(client, 16))
+        port = struct.unpack("!H", _recv_exact(client, 2))[0]
+        upstream = socket.create_connection((host, port))
+        client.sendall(b"\x05\x00\x00\x01" + socket.inet_aton("0.0.0.0") + b"\x00\x00")
+        _relay(client, upstream)
+
+
+class AuthProxyHandler(StandInProxyHandler):
+    credentials = ("scanner", "p@ss:word")
+
+
+class StallingProxyHandler(StandInProxyHandler):
+    """Accepts connections and never answers while server.stall is set; proxies normally otherwise."""
+
+    def handle(self):
+        if not self.server.stall.is_set():
+            return super().handle()
+        self.server.stalled.set()
+        try:
+            while self.request.recv(4096):
+                pass # Hold the connection until the client gives up
+        except OSError:
+            pass
+
+
+class FloodProxyHandler(socketserver.BaseRequestHandler):
+    """Answers every request with a status line far longer than the client's line limit."""
+
+    def handle(self):
+        self.request.recv(4096)
+        try:
+            self.request.sendall(b"HTTP/1.1 200 " + b"X" * 200000)
+        except OSError:
+            pass
+
+
+def _serve(handler):
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(autouse=True)
+def scanner_config(tmp_path, monkeypatch):
+    """Runs every test on a fresh default configuration inside a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    config = dict(Ver4.DEFAULT_CONFIG)
+    config.update(connect_timeout=2.0, read_timeout=5.0, adaptive_timeouts=False)
+    monkeypatch.setattr(Ver4, "config", config)
+    Ver4._failure_reasons.clear()
+    Ver4._phase_timings.clear()
+    Ver4._latency_tracker.reset()
+    return config
+
+
+@pytest.fixture(scope="session")
+def judge_server():
+    server = Ver4.start_judge_server("127.0.0.1", 0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def tls_judge_server(tmp_path_factory):
+    """The judge behind TLS, with a self-signed certificate for 127.0.0.1."""
+    if shutil.which("openssl") is None:
+        pytest.skip("openssl is needed to create a test certificate")
+    directory = tmp_path_factory.mktemp("tls")
+    cert_path, key_path = str(directory / "cert.pem"), str(directory / "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=127.0.0.1",
+         "-addext", "subjectAltName=IP:127.0.0.1", "-keyout", key_path, "-out", cert_path],
+        check=True, capture_output=True,
+    )
+    server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    server_context.load_cert_chain(cert_path, key_path)
+    server = Ver4.start_judge_server("127.0.0.1", 0)
+    server.socket = server_context.wrap_socket(server.socket, server_side=True)
+    yield server, cert_path
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tls_judge_url(tls_judge_server, scanner_config, monkeypatch):
+    server, cert_path = tls_judge_server
+    monkeypatch.setattr(Ver4, "_ssl_context", ssl.create_default_context(cafile=cert_path))
+    url = "https://127.0.0.1:%d/judge" % server.server_address[1]
+    scanner_config['judge_url'] = url
+    return url
+
+
+@pytest.fixture
+def judge_url(judge_server, scanner_config):
+    url = "http://127.0.0.1:%d/judge" % judge_server.server_address[1]
+    scanner_config['judge_url'] = url
+    return url
+
+
+@pytest.fixture(scope="session")
+def stand_in_proxy():
+    server = _serve(StandInProxyHandler)
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def auth_proxy():
+    server = _serve(AuthProxyHandler)
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stalling_proxy():
+    server = _serve(StallingProxyHandler)
+    server.stall = threading.Event()
+    server.stall.set()
+    server.stalled = threading.Event() # Set once a connection has been held
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="session")
+def flood_proxy():
+    server = _serve(FloodProxyHandler)
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+@pytest.fixture
+def closed_port():
+    return _free_port()
+
+
+@pytest.fixture
+def coordinator_port(scanner_config):
+    port = _free_port()
+    scanner_config.update(coordinator_host="127.0.0.1", coordinator_port=port, coordinator_token="")
+    return port
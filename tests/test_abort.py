@@ -0,0 +1,31 @@
+import time
+
+import Ver4
+
+
+def test_abort_cancels_running_probes_of_its_group(judge_url, stalling_proxy, scanner_config):
+    scanner_config['read_timeout'] = 30.0
+    proxy = "http://127.0.0.1:%d" % stalling_proxy.server_address[1]
+    probes = Ver4.ProbeGroup()
+    with probes.executor(2) as executor:
+        future = executor.submit(Ver4.test_proxy_judge, proxy)
+        assert stalling_proxy.stalled.wait(5)
+        start = time.time()
+        probes.abort()
+        assert future.result(timeout=5) == (False, None, "Unknown", proxy)
+    assert time.time() - start < 2
+    assert Ver4._failure_reasons[proxy] == "aborted"
+
+
+def test_abort_does_not_outlive_its_group(judge_url, stand_in_proxy):
+    proxy = f"http://127.0.0.1:{stand_in_proxy}"
+    aborted = Ver4.ProbeGroup()
+    aborted.abort()
+    with aborted.executor(1) as executor:
+        assert not executor.submit(Ver4.test_proxy_judge, proxy).result()[0]
+
+    # Direct calls and later scans are unaffected
+    assert Ver4.test_proxy_judge(proxy)[0]
+    assert Ver4.check_anonymity(proxy) in (0, 5, 10)
+    with Ver4.ProbeGroup().executor(1) as executor:
+        assert executor.submit(Ver4.test_proxy_judge, proxy).result()[0]
@@ -0,0 +1,20 @@
+import asyncio
+import pytest
+
+import Ver4
+from conftest import run_check
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+def test_overlong_response_line_fails_the_probe(engine, judge_url, flood_proxy):
+    proxy = f"http://127.0.0.1:{flood_proxy}"
+    assert not run_check(engine, proxy)[0]
+    assert Ver4._failure_reasons[proxy] == "response line too long"
+
+
+def test_overlong_response_line_does_not_stop_the_scan(judge_url, flood_proxy, stand_in_proxy):
+    records = [Ver4.ProxyRecord.parse(f"http://127.0.0.1:{port}") for port in (flood_proxy, stand_in_proxy)]
+    results = []
+    asyncio.run(Ver4._async_scan(records, Ver4.async_test_proxy_judge, None, results.append, False))
+    outcomes = {proxy_str: success for success, _, _, proxy_str in results}
+    assert outcomes == {records[0].url: False, records[1].url: True}
@@ -0,0 +1,47 @@
+import os
+
+import Ver4
+
+
+def test_checkpoint_round_trip(tmp_path):
+    checkpoint = Ver4.ScanCheckpoint.for_scan("hard", "proxies.txt")
+    checkpoint.open("hard", "proxies.txt", resume=False)
+    checkpoint.record("http://1.1.1.1:80", True, 120.0, 10, None, {"connect": 5.0})
+    checkpoint.record("http://2.2.2.2:80", False, None, "Unknown", "timeout (read)")
+    checkpoint.close(finished=False)
+
+    started, results, phases = Ver4.ScanCheckpoint.for_scan("hard", "proxies.txt").load("hard", "proxies.txt")
+    assert started is not None
+    assert results == {"http://1.1.1.1:80": (True, 120.0, 10), "http://2.2.2.2:80": (False, None, "Unknown")}
+    assert phases == {"http://1.1.1.1:80": {"connect": 5.0}}
+
+    checkpoint = Ver4.ScanCheckpoint.for_scan("hard", "proxies.txt")
+    checkpoint.open("hard", "proxies.txt", resume=True)
+    checkpoint.close(finished=True)
+    assert not os.path.exists(checkpoint.path)
+
+
+def test_other_scans_do_not_overwrite_an_unfinished_checkpoint(tmp_path):
+    hard = Ver4.ScanCheckpoint.for_scan("hard", "proxies.txt")
+    hard.open("hard", "proxies.txt", resume=False)
+    hard.record("http://1.1.1.1:80", True, 120.0, 10)
+    hard.close(finished=False)
+
+    for method, list_path in [("soft", "proxies.txt"), ("hard", "other.txt")]:
+        other = Ver4.ScanCheckpoint.for_scan(method, list_path)
+        assert other.path != hard.path
+        assert other.load(method, list_path) is None
+        other.open(method, list_path, resume=False)
+        other.close(finished=True)
+
+    assert Ver4.ScanCheckpoint.for_scan("hard", "proxies.txt").load("hard", "proxies.txt")[1] == {"http://1.1.1.1:80": (True, 120.0, 10)}
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    checkpoint = Ver4.ScanCheckpoint.for_scan("soft", "proxies.txt")
+    checkpoint.open("soft", "proxies.txt", resume=False)
+    checkpoint.record("http://1.1.1.1:80", True, 50.0, 5)
+    checkpoint.close(finished=False)
+    with open(checkpoint.path, "a") as f:
+        f.write('["http://2.2.2.2:80", tr')
+    assert checkpoint.load("soft", "proxies.txt")[1] == {"http://1.1.1.1:80": (True, 50.0, 5)}
@@ -0,0 +1,144 @@
+import http.server
+import multiprocessing
+import signal
+import threading
+import time
+
+import pytest
+import requests
+
+import Ver4
+
+
+def test_coordinator_accepts_only_results_of_the_leaseholder():
+    coordinator = Ver4.ScanCoordinator(["http://1.1.1.1:80", "http://2.2.2.2:80"], "judge", None, 10, 60)
+    lease = coordinator.lease("worker-1")
+    assert lease["proxies"] == ["http://1.1.1.1:80", "http://2.2.2.2:80"]
+    result = ["http://1.1.1.1:80", True, 120.0, 10, None, None]
+
+    coordinator.submit("worker-2", lease["batch_id"], [result], False) # Foreign worker
+    coordinator.submit("worker-1", lease["batch_id"] + 1, [result], False) # Unknown batch
+    coordinator.submit("worker-1", lease["batch_id"], [["http://9.9.9.9:80", True, 1.0, 10, None, None], result[:3], "junk"], False)
+    assert coordinator.results.empty()
+
+    coordinator.submit("worker-1", lease["batch_id"], [result, result], False)
+    assert coordinator.results.qsize() == 1
+    assert not coordinator.complete
+
+    coordinator.submit("worker-1", lease["batch_id"], [["http://2.2.2.2:80", False, None, "Unknown", "timeout", None]], True)
+    assert coordinator.complete
+    assert coordinator.lease("worker-1") == {"done": True}
+
+
+def test_coordinator_requeues_expired_leases():
+    coordinator = Ver4.ScanCoordinator(["http://1.1.1.1:80"], "judge", None, 10, 0.01)
+    first = coordinator.lease("worker-1")
+    time.sleep(0.05)
+    second = coordinator.lease("worker-2")
+    assert second["proxies"] == first["proxies"]
+
+    # The first worker lost its lease, so its late answer is dropped
+    coordinator.submit("worker-1", first["batch_id"], [["http://1.1.1.1:80", True, 1.0, 10, None, None]], True)
+    assert coordinator.results.empty()
+    coordinator.submit("worker-2", second["batch_id"], [["http://1.1.1.1:80", True, 1.0, 10, None, None]], True)
+    assert coordinator.complete
+
+
+def test_coordinator_refuses_public_address_without_token(scanner_config):
+    scanner_config.update(coordinator_host="0.0.0.0", coordinator_token="")
+    assert Ver4._run_coordinator(["http://1.1.1.1:80"], "judge", None, lambda result: None, time.time() + 5) is False
+
+
+@pytest.mark.parametrize("port", [70000, -1])
+def test_coordinator_reports_invalid_port(port, scanner_config):
+    scanner_config.update(coordinator_host="127.0.0.1", coordinator_port=port)
+    assert Ver4._run_coordinator(["http://1.1.1.1:80"], "judge", None, lambda result: None, time.time() + 5) is False
+
+
+@pytest.mark.parametrize("value", ["0", "65536", "70000", "http"])
+def test_port_flag_is_range_checked(value, capsys):
+    with pytest.raises(SystemExit):
+        Ver4.build_arg_parser().parse_args(["check", "--distributed", "--port", value])
+    assert "--port" in capsys.readouterr().err
+
+
+def test_coordinator_endpoint_rejects_malformed_requests():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Ver4.CoordinatorRequestHandler)
+    server.daemon_threads = True
+    server.coordinator = Ver4.ScanCoordinator(["http://1.1.1.1:80"], "judge", None, 10, 60)
+    server.token = ""
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = "http://127.0.0.1:%d" % server.server_address[1]
+    try:
+        for body in ["[]", "1", "null", "{not json"]:
+            response = requests.post(base_url + "/lease", data=body, timeout=5)
+            assert response.status_code == 400
+        batch_id = requests.post(base_url + "/lease", json={"worker": "w"}, timeout=5).json()["batch_id"]
+        for payload in [{"batch_id": [batch_id], "results": []}, {"batch_id": batch_id, "results": 5}, {"batch_id": batch_id, "results": {"a": 1}}]:
+            response = requests.post(base_url + "/results", json=dict(payload, worker="w"), timeout=5)
+            assert response.json() == {"ok": True}
+        assert server.coordinator.results.empty()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_distributed_scan_with_worker(judge_url, stand_in_proxy, closed_port, coordinator_port, scanner_config):
+    scanner_config.update(distributed_batch_size=1, lease_timeout=5, max_workers=2)
+
+    good = f"http://127.0.0.1:{stand_in_proxy}"
+    dead = f"http://127.0.0.1:{closed_port}"
+    worker = threading.Thread(target=Ver4.run_worker, args=(f"http://127.0.0.1:{coordinator_port}", "worker-1"), daemon=True)
+    worker.start()
+    results = []
+    assert Ver4._run_coordinator([good, dead], "judge", None, results.append, time.time() + 60)
+    worker.join(10)
+
+    outcomes = {result[0]: result[1] for result in results}
+    assert outcomes == {good: True, dead: False}
+
+
+def _worker_main(coordinator_url, worker_id, worker_config):
+    """Entry point of a worker process started by the multi-process test."""
+    Ver4.config.update(worker_config)
+    Ver4.run_worker(coordinator_url, worker_id)
+
+
+def test_distributed_scan_survives_a_worker_process_dying_mid_batch(judge_url, stalling_proxy, stand_in_proxy, closed_port, coordinator_port, scanner_config):
+    scanner_config.update(distributed_batch_size=1, lease_timeout=2, read_timeout=30, max_workers=2)
+    stalled = f"http://127.0.0.1:{stalling_proxy.server_address[1]}"
+    good = f"http://127.0.0.1:{stand_in_proxy}"
+    dead = f"http://127.0.0.1:{closed_port}"
+    coordinator_url = f"http://127.0.0.1:{coordinator_port}"
+    context = multiprocessing.get_context("spawn")
+
+    def start_worker(worker_id):
+        process = context.Process(target=_worker_main, args=(coordinator_url, worker_id, dict(scanner_config)), daemon=True)
+        process.start()
+        return process
+
+    workers = []
+
+    def orchestrate():
+        # The first worker leases the stalling proxy and is killed while its check hangs
+        workers.append(start_worker("worker-1"))
+        if stalling_proxy.stalled.wait(30):
+            workers[0].kill()
+        stalling_proxy.stall.clear()
+        workers.extend(start_worker(f"worker-{number}") for number in (2, 3))
+
+    orchestrator = threading.Thread(target=orchestrate, daemon=True)
+    orchestrator.start()
+    results = []
+    try:
+        assert Ver4._run_coordinator([stalled, good, dead], "judge", None, results.append, time.time() + 90)
+    finally:
+        orchestrator.join(30)
+        for process in workers:
+            process.join(10)
+            if process.is_alive():
+                process.kill()
+
+    assert workers[0].exitcode == -signal.SIGKILL
+    outcomes = {result[0]: result[1] for result in results}
+    assert outcomes == {stalled: True, good: True, dead: False}
@@ -0,0 +1,37 @@
+import Ver4
+
+
+def update(monkeypatch, lines):
+    """Runs an update whose only source returns the given lines."""
+    monkeypatch.setattr(Ver4, "_fetch_source", lambda url, cache_entry: ("downloaded", list(lines), {}))
+    assert Ver4.fetch_proxies()
+
+
+def read_delta():
+    with open(Ver4.config['delta_file']) as f:
+        return f.read().split()
+
+
+def test_delta_builds_up_until_a_finished_new_only_scan(judge_url, stand_in_proxy, closed_port, scanner_config, monkeypatch):
+    monkeypatch.setattr(Ver4, "interactive", False)
+    scanner_config.update(proxy_sources=["http://source.invalid/list.txt"], scan_new_only=True)
+    good = f"http://127.0.0.1:{stand_in_proxy}"
+    dead = f"http://127.0.0.1:{closed_port}"
+    also_good = f"socks5://127.0.0.1:{stand_in_proxy}"
+
+    update(monkeypatch, [good, dead])
+    update(monkeypatch, [good, dead, also_good])
+    assert read_delta() == [good, dead, also_good] # The second update adds to the untested entries
+
+    # A scan that stops at its target leaves the delta for the next one
+    scanner_config['target_count'] = 1
+    assert Ver4.check_proxies_with_method(Ver4.test_proxy_judge, "Judge check", "works")
+    assert read_delta() == [good, dead, also_good]
+
+    scanner_config['target_count'] = 0
+    working = Ver4.check_proxies_with_method(Ver4.test_proxy_judge, "Judge check", "works")
+    assert sorted(url for url, _, _ in working) == sorted([good, also_good])
+    assert read_delta() == []
+
+    update(monkeypatch, [good, also_good])
+    assert read_delta() == []
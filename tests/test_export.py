@@ -0,0 +1,51 @@
+import csv
+import json
+import os
+
+import Ver4
+
+
+def test_files_are_published_atomically_at_finish(tmp_path):
+    directory = str(tmp_path / "results")
+    os.makedirs(directory)
+    final_path = os.path.join(directory, "working_soft.jsonl")
+    with open(final_path, "w") as f:
+        f.write("previous scan\n")
+
+    exporter = Ver4.ResultExporter("soft", ["jsonl", "csv", "txt"], directory)
+    exporter.write("http://10.0.0.1:8080", 120, 10, {"connect": 20})
+    # Readers keep seeing the previous files while the scan is running
+    with open(final_path) as f:
+        assert f.read() == "previous scan\n"
+    assert sorted(os.listdir(directory)) == ["working_soft.csv.part", "working_soft.jsonl", "working_soft.jsonl.part"]
+
+    working = [("http://10.0.0.1:8080", 120, 10), ("socks5://10.0.0.2:1080", 80, 5)] # The second was carried forward
+    published = exporter.finish(working, {})
+    assert published == [os.path.join(directory, f"working_soft.{fmt}") for fmt in ("jsonl", "csv", "txt")]
+    assert sorted(os.listdir(directory)) == ["working_soft.csv", "working_soft.jsonl", "working_soft.txt"]
+    with open(final_path) as f:
+        rows = [json.loads(line) for line in f]
+    assert [(row["proxy"], row["ping_ms"], row["phases"]) for row in rows] == [
+        ("http://10.0.0.1:8080", 120, {"connect": 20}), ("socks5://10.0.0.2:1080", 80, None),
+    ]
+    with open(os.path.join(directory, "working_soft.csv"), newline="") as f:
+        assert [row["proxy"] for row in csv.DictReader(f)] == ["http://10.0.0.1:8080", "socks5://10.0.0.2:1080"]
+
+
+def read_txt(directory):
+    with open(os.path.join(directory, "working_soft.txt")) as f:
+        return f.read().split()
+
+
+def test_txt_list_follows_the_rank_order(tmp_path, scanner_config):
+    working = [("http://10.0.0.1:1", 300, 10), ("http://10.0.0.2:2", 100, 10), ("http://10.0.0.3:3", 200, 10)]
+    phases = {"http://10.0.0.1:1": {"ttfb": 10}, "http://10.0.0.2:2": {"ttfb": 50}}
+
+    scanner_config['rank_by'] = "ping"
+    Ver4.ResultExporter("soft", ["txt"], str(tmp_path)).finish(working, phases)
+    assert read_txt(str(tmp_path)) == ["http://10.0.0.2:2", "http://10.0.0.3:3", "http://10.0.0.1:1"]
+
+    # Ranked by a phase, proxies without timings go last
+    scanner_config['rank_by'] = "ttfb"
+    Ver4.ResultExporter("soft", ["txt"], str(tmp_path)).finish(working, phases)
+    assert read_txt(str(tmp_path)) == ["http://10.0.0.1:1", "http://10.0.0.2:2", "http://10.0.0.3:3"]
@@ -0,0 +1,37 @@
+import time
+
+import pytest
+
+import Ver4
+
+
+def test_recent_results_for_only_returns_the_requested_fresh_rows(tmp_path):
+    health_db = Ver4.ProxyHealthDB(str(tmp_path / "health.db"))
+    for port in (1001, 1002, 1003):
+        health_db.record(f"http://10.0.0.1:{port}", "judge", True, 50, 5)
+    health_db.record("http://10.0.0.1:1002", "soft", False, None, "Unknown")
+    health_db.commit()
+    health_db.conn.execute("UPDATE proxy_health SET last_checked = ? WHERE proxy = ?", (time.time() - 3600, "http://10.0.0.1:1003"))
+
+    results = health_db.recent_results_for(["http://10.0.0.1:1002", "http://10.0.0.1:1003", "http://10.0.0.1:1004"], "judge", 600)
+    assert results == {"http://10.0.0.1:1002": (True, 50, 5)}
+    assert health_db.recent_results_for([], "judge", 600) == {}
+    assert health_db.recent_results_for(["http://10.0.0.1:1001"], "judge", 0) == {}
+
+
+def test_streaming_scan_skips_recent_proxies_batch_by_batch(judge_url, stand_in_proxy, closed_port, scanner_config, monkeypatch):
+    monkeypatch.setattr(Ver4, "interactive", False)
+    monkeypatch.setattr(Ver4, "HEALTH_LOOKUP_BATCH_SIZE", 1)
+    monkeypatch.setattr(Ver4.ProxyHealthDB, "recent_results", lambda *args: pytest.fail("loaded every recent row"))
+    scanner_config.update(streaming_scan=True, health_ttl=600)
+    skipped = f"http://127.0.0.1:{closed_port}" # Would fail if tested
+    tested = f"http://127.0.0.1:{stand_in_proxy}"
+    with open(Ver4.proxy_file, "w") as f:
+        f.write(f"{skipped}\n{tested}\n")
+    health_db = Ver4.ProxyHealthDB(scanner_config['health_db_file'])
+    health_db.record(skipped, "soft", True, 42, 10) # Judge checks are stored as soft checks
+    health_db.commit()
+
+    working = Ver4.check_proxies_with_method(Ver4.test_proxy_judge, "Judge check", "works")
+    assert sorted(url for url, _, _ in working) == sorted([skipped, tested])
+    assert (skipped, 42, 10) in working
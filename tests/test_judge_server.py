@@ -0,0 +1,9 @@
+import pytest
+
+from conftest import run_check
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+def test_judge_url_without_path(engine, judge_server, stand_in_proxy, scanner_config):
+    scanner_config['judge_url'] = "http://127.0.0.1:%d" % judge_server.server_address[1]
+    assert run_check(engine, f"http://127.0.0.1:{stand_in_proxy}")[0]
@@ -0,0 +1,46 @@
+import pytest
+
+import Ver4
+
+
+@pytest.mark.parametrize("reason, category", [
+    ("timeout (connect)", "timeout_connect"),
+    ("timeout (read)", "timeout_read"),
+    ("local socket error", "local_socket"),
+    ("tls error", "tls"),
+    ("[SSL: WRONG_VERSION_NUMBER] wrong version number (_ssl.c:1006)", "tls"),
+    ("CONNECT refused (407)", "proxy_refused"),
+    ("SOCKS5 request rejected (5)", "proxy_refused"),
+    ("connection error", "connection"),
+    ("0 bytes read on a total of 8 expected bytes", "connection"),
+    ("unexpected status 403 from https://example.com/", "validation"),
+    ("body pattern not found from https://example.com/", "validation"),
+    ("response line too long", "validation"),
+    ("invalid port in http://example.com:99999/", "other"),
+    ("aborted", "other"),
+    (None, "other"),
+])
+def test_failure_reasons_map_to_fixed_categories(reason, category):
+    assert Ver4._failure_category(reason) == category
+
+
+def test_failure_metric_uses_categories(monkeypatch):
+    monkeypatch.setattr(Ver4, "metrics", Ver4.MetricsRegistry())
+    Ver4.metrics.declare("proxy_scanner_probes_total", "counter", "", ("protocol", "result"))
+    Ver4.metrics.declare("proxy_scanner_failures_total", "counter", "", ("protocol", "reason"))
+    for port in range(50):
+        Ver4._record_probe_metrics("http://1.2.3.4:80", False, None, f"CONNECT refused ({port})", None)
+    assert Ver4.metrics.metrics["proxy_scanner_failures_total"]["samples"] == {("http", "proxy_refused"): 50}
+
+
+@pytest.mark.parametrize("value", ["0", "99999"])
+def test_metrics_port_flag_is_range_checked(value):
+    with pytest.raises(SystemExit):
+        Ver4.build_arg_parser().parse_args(["check", "--metrics-port", value])
+
+
+def test_metrics_server_reports_invalid_port(scanner_config, monkeypatch):
+    monkeypatch.setattr(Ver4, "_metrics_server", None)
+    scanner_config.update(metrics_enabled=True, metrics_host="127.0.0.1", metrics_port=99999)
+    Ver4.start_metrics_server()
+    assert Ver4._metrics_server is None
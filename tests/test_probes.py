@@ -0,0 +1,28 @@
+import pytest
+
+import Ver4
+from conftest import run_check
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+@pytest.mark.parametrize("scheme", ["http", "socks5"])
+def test_judge_check_through_proxy(engine, scheme, judge_url, stand_in_proxy):
+    proxy = f"{scheme}://127.0.0.1:{stand_in_proxy}"
+    success, ping, anonymity_rating, proxy_str = run_check(engine, proxy)
+    assert success
+    assert proxy_str == proxy
+    assert ping is not None and ping >= 0
+    assert anonymity_rating in (0, 5, 10)
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+@pytest.mark.parametrize("scheme", ["http", "socks5"])
+def test_https_judge_check_through_proxy(engine, scheme, tls_judge_url, stand_in_proxy):
+    assert run_check(engine, f"{scheme}://127.0.0.1:{stand_in_proxy}")[0]
+
+
+@pytest.mark.parametrize("engine", ["threads", "asyncio"])
+def test_unreachable_proxy_fails(engine, judge_url, closed_port):
+    proxy = f"socks5://127.0.0.1:{closed_port}"
+    assert run_check(engine, proxy) == (False, None, "Unknown", proxy)
+    assert Ver4._failure_reasons[proxy]
@@ -0,0 +1,54 @@
+import pytest
+
+import Ver4
+
+
+@pytest.fixture
+def scheduler(scanner_config):
+    scanner_config.update(revalidate_interval=60, revalidate_fast_ping=1000, revalidate_max_backoff=600)
+    return Ver4.RevalidationScheduler()
+
+
+def test_passing_proxies_come_back_after_the_interval(scheduler):
+    scheduler.add("http://1.1.1.1:80", 0)
+    assert scheduler.pop_due(0) == "http://1.1.1.1:80"
+    assert scheduler.reschedule("http://1.1.1.1:80", True, 200, 100) == 60
+    assert scheduler.reschedule("http://1.1.1.1:80", True, 2000, 100) == 120 # Slow proxies wait twice as long
+    assert scheduler.next_due() == 220
+
+
+def test_failures_back_off_exponentially_up_to_the_cap(scheduler):
+    scheduler.add("http://1.1.1.1:80", 0)
+    waits = [scheduler.reschedule("http://1.1.1.1:80", False, None, 0) for _ in range(6)]
+    assert waits == [120, 240, 480, 600, 600, 600]
+    assert scheduler.reschedule("http://1.1.1.1:80", True, 100, 0) == 60 # A pass resets the backoff
+    assert scheduler.failures["http://1.1.1.1:80"] == 0
+
+
+def test_stale_heap_entries_are_skipped(scheduler):
+    scheduler.add("http://1.1.1.1:80", 10)
+    scheduler.add("http://2.2.2.2:80", 20)
+    scheduler.reschedule("http://1.1.1.1:80", True, 100, 100) # Moves 1.1.1.1 to 160; its entry at 10 is stale
+    assert scheduler.next_due() == 20
+    assert scheduler.pop_due(15) is None
+    assert scheduler.pop_due(20) == "http://2.2.2.2:80"
+    assert scheduler.pop_due(159) is None
+    assert scheduler.pop_due(160) == "http://1.1.1.1:80"
+    assert scheduler.next_due() is None
+    assert not scheduler.heap
+
+
+def test_removed_proxies_are_never_due_again(scheduler):
+    scheduler.add("http://1.1.1.1:80", 0)
+    assert scheduler.pop_due(0) == "http://1.1.1.1:80"
+    scheduler.remove("http://1.1.1.1:80")
+    assert scheduler.reschedule("http://1.1.1.1:80", True, 100, 0) is None
+    assert scheduler.next_due() is None
+    assert len(scheduler) == 0
+
+
+@pytest.mark.parametrize("value", ["-5", "x"])
+def test_refresh_flag_rejects_negative_values(value):
+    with pytest.raises(SystemExit):
+        Ver4.build_arg_parser().parse_args(["daemon", "--refresh", value])
+    assert Ver4.build_arg_parser().parse_args(["daemon", "--refresh", "0"]).refresh == 0
@@ -0,0 +1,27 @@
+import threading
+import time
+
+import Ver4
+
+
+def test_sharded_scan_while_another_thread_holds_the_metrics_lock(judge_url, stand_in_proxy, closed_port):
+    records = [Ver4.ProxyRecord.parse(url) for url in (
+        f"http://127.0.0.1:{stand_in_proxy}", f"socks5://127.0.0.1:{stand_in_proxy}", f"http://127.0.0.1:{closed_port}",
+    )]
+    results = []
+    release = threading.Event()
+
+    def hold_lock():
+        with Ver4.metrics.lock:
+            release.wait(30)
+
+    holder = threading.Thread(target=hold_lock)
+    holder.start()
+    try:
+        # A forked worker would inherit the held lock and block on its first metrics update until the deadline
+        assert Ver4._run_sharded(records, Ver4.test_proxy_judge, None, results.append, False, 2, deadline=time.time() + 20)
+    finally:
+        release.set()
+        holder.join()
+    outcomes = {proxy_str: success for success, _, _, proxy_str in results}
+    assert outcomes == {records[0].url: True, records[1].url: True, records[2].url: False}
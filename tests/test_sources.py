@@ -0,0 +1,92 @@
+import gzip
+import os
+import http.server
+import threading
+
+import pytest
+
+import Ver4
+
+
+class SourceHandler(http.server.BaseHTTPRequestHandler):
+    """Serves server.bodies[path] with an ETag and Last-Modified, answering 304 to matching validators."""
+    etag = '"v1"'
+    last_modified = "Mon, 05 Oct 2026 10:00:00 GMT"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        if self.path in self.server.failing:
+            self.send_error(500)
+            return
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = "".join(line + "\n" for line in self.server.bodies[self.path]).encode("utf-8")
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", self.etag)
+        self.send_header("Last-Modified", self.last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def source_server(scanner_config):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), SourceHandler)
+    server.requests = []
+    server.failing = set()
+    server.bodies = {
+        "/a.txt": ["http://10.0.0.1:8080", "socks5://10.0.0.2:1080", "HTTP://10.0.0.3:03128"],
+        "/b.txt": ["http://10.0.0.1:8080/", "http://10.0.0.3:3128", "socks4://10.0.0.4:4145", "not a proxy"],
+    }
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = "http://127.0.0.1:%d" % server.server_address[1]
+    scanner_config['proxy_sources'] = [base + "/a.txt", base + "/b.txt"]
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def read_list():
+    with open(Ver4.proxy_file) as f:
+        return f.read().split()
+
+
+def test_sources_are_merged_without_duplicates(source_server):
+    assert Ver4.fetch_proxies()
+    assert read_list() == ["http://10.0.0.1:8080", "socks5://10.0.0.2:1080", "http://10.0.0.3:3128", "socks4://10.0.0.4:4145"]
+
+
+def test_unchanged_source_is_served_from_cache(source_server):
+    assert Ver4.fetch_proxies()
+    first = read_list()
+    source_server.requests.clear()
+    source_server.bodies["/a.txt"] = [] # Only a full download could return this
+
+    assert Ver4.fetch_proxies()
+    headers = dict(source_server.requests)["/a.txt"]
+    assert headers["If-None-Match"] == SourceHandler.etag
+    assert headers["If-Modified-Since"] == SourceHandler.last_modified
+    assert read_list() == first
+
+
+def test_failing_source_falls_back_to_its_cached_copy(source_server):
+    assert Ver4.fetch_proxies()
+    first = read_list()
+    source_server.failing.add("/a.txt")
+
+    assert Ver4.fetch_proxies()
+    assert read_list() == first
+
+
+def test_failing_source_without_cache_keeps_the_list(source_server):
+    source_server.failing.update(["/a.txt", "/b.txt"])
+    assert not Ver4.fetch_proxies()
+    assert not os.path.exists(Ver4.proxy_file)